@@ -0,0 +1,54 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Benchmark of recall against speed for the approximate
+hierarchical K-Means assigner, relative to exact
+brute-force assignment, on large codebooks.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_assignment.py
+"""
+
+import time
+
+import numpy as np
+
+from theama.feature_encoding import BruteForceAssigner, HierarchicalKMeansAssigner
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rng = np.random.RandomState(0)
+    dimension = 64
+    n_features = 20000
+
+    for codebook_size in [4096, 16384, 65536]:
+        # Clustered data so that nearest-centroid structure is meaningful
+        centroids = rng.standard_normal((codebook_size, dimension)).astype('float32')
+        local_features = centroids[rng.randint(0, codebook_size, n_features)] + \
+            0.5 * rng.standard_normal((n_features, dimension)).astype('float32')
+
+        exact_assigner = BruteForceAssigner().fit(centroids)
+        exact, exact_time = timed(exact_assigner.assign, local_features)
+        print('K={:<6d} brute-force          time={:7.3f}s'.format(codebook_size, exact_time))
+
+        for n_probes in [1, 2, 4, 8, 16]:
+            assigner = HierarchicalKMeansAssigner(n_probes=n_probes)
+            _, build_time = timed(assigner.fit, centroids)
+            approximate, assign_time = timed(assigner.assign, local_features)
+
+            print('K={:<6d} hkm n_probes={:<3d}    time={:7.3f}s speedup={:5.1f}x recall={:.3f} build={:.1f}s'.format(
+                codebook_size, n_probes, assign_time, exact_time / assign_time,
+                np.mean(approximate == exact), build_time
+            ))
+
+
+if __name__ == '__main__':
+    main()
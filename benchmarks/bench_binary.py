@@ -0,0 +1,51 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Benchmark comparing BoW encoding of packed binary
+descriptors (ORB-like, 32 bytes) in Hamming space against
+treating them as Euclidean float vectors.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_binary.py
+"""
+
+import timeit
+
+import numpy as np
+
+from theama.feature_encoding import BOW
+
+
+def main():
+    rng = np.random.RandomState(0)
+    n_bytes = 32
+
+    for codebook_size, n_features in [(256, 5000), (1024, 20000)]:
+        descriptors = rng.randint(0, 256, (n_features, n_bytes)).astype('uint8')
+
+        hamming = BOW(codebook_size, metric='hamming')
+        hamming.codebook = descriptors[rng.choice(n_features, codebook_size, replace=False)]
+
+        # Euclidean baseline on bytes upcast to float, as before
+        euclidean = BOW(codebook_size)
+        euclidean.codebook = hamming.codebook.astype('float64')
+
+        euclidean_time = min(timeit.repeat(
+            lambda: euclidean.compute_feature_vector(descriptors.astype('float64')),
+            number=1, repeat=3
+        ))
+        hamming_time = min(timeit.repeat(
+            lambda: hamming.compute_feature_vector(descriptors),
+            number=1, repeat=3
+        ))
+
+        print('K={:<5d} N={:<6d} euclidean={:7.4f}s hamming={:7.4f}s speedup={:5.1f}x'.format(
+            codebook_size, n_features, euclidean_time,
+            hamming_time, euclidean_time / hamming_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
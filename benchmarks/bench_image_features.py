@@ -0,0 +1,51 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Benchmark comparing batched HOG, sliding-window HOG and
+batched LBP against per-image scikit-image calls.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_image_features.py
+"""
+
+import timeit
+
+import numpy as np
+
+from theama.feature import compute_hog, compute_lbp
+from theama.feature import compute_hog_batch, compute_hog_windows, compute_lbp_batch
+
+
+def report(name, baseline, batched):
+    baseline_time = min(timeit.repeat(baseline, number=1, repeat=3))
+    batched_time = min(timeit.repeat(batched, number=1, repeat=3))
+
+    print('{:<24s} per-image={:7.4f}s batched={:7.4f}s speedup={:5.1f}x'.format(
+        name, baseline_time, batched_time, baseline_time / batched_time
+    ))
+
+
+def main():
+    rng = np.random.RandomState(0)
+    crops = rng.randint(0, 256, (500, 128, 64)).astype('uint8')
+    image = rng.randint(0, 256, (480, 640)).astype('uint8')
+
+    report('hog 500x128x64',
+           lambda: [compute_hog(crop) for crop in crops],
+           lambda: compute_hog_batch(crops))
+
+    report('lbp 500x128x64 P=8',
+           lambda: [compute_lbp(crop, 1, 8, 'uniform') for crop in crops],
+           lambda: compute_lbp_batch(crops, 1, 8, 'uniform'))
+
+    report('hog windows 480x640',
+           lambda: [compute_hog(image[r:r + 128, c:c + 64])
+                    for r in range(0, 480 - 128 + 1, 8)
+                    for c in range(0, 640 - 64 + 1, 8)],
+           lambda: compute_hog_windows(image, (128, 64), step=(8, 8)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Benchmark of VLAD and BoW encoding time and output size
+with float64 and float32 compute paths, and of the storage
+size of float16 and int8 outputs.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_precision.py
+"""
+
+import timeit
+
+import numpy as np
+
+from theama.feature_encoding import BOW, VLAD
+
+
+def best_time(function):
+    return min(timeit.repeat(function, number=1, repeat=3))
+
+
+def main():
+    rng = np.random.RandomState(0)
+    dimension = 128
+    local_features = rng.random_sample((40000, dimension)).astype(np.float32)
+    offsets = np.arange(0, 40001, 500)
+    codebook = local_features[rng.choice(len(local_features), 256, replace=False)]
+
+    configurations = [
+        ('VLAD float64', VLAD(256, dtype='float64')),
+        ('VLAD float32', VLAD(256, dtype='float32')),
+        ('VLAD float32 -> float16', VLAD(256, dtype='float32', output_dtype='float16')),
+        ('VLAD float32 -> int8', VLAD(256, dtype='float32', output_dtype='int8')),
+        ('BoW  float64', BOW(256, dtype='float64')),
+        ('BoW  float32', BOW(256, dtype='float32')),
+    ]
+
+    for name, encoder in configurations:
+        encoder.codebook = codebook
+        elapsed = best_time(lambda: encoder.compute_feature_vectors(local_features, offsets=offsets))
+        output = encoder.compute_feature_vectors(local_features, offsets=offsets)
+        print('{:<26s} encode={:7.4f}s output={:8.2f} MB'.format(name, elapsed, output.nbytes / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Benchmark of VLAD encoding time with hard assignment on a
+large codebook against soft and multiple assignment on a
+4x smaller codebook, and of the partial-sort top-k search
+against a full sort of the distances.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_soft_assignment.py
+"""
+
+import timeit
+
+import numpy as np
+
+from theama.feature_encoding import VLAD
+from theama.feature_encoding.assignment import smallest_k, squared_distances
+
+
+def best_time(function):
+    return min(timeit.repeat(function, number=1, repeat=3))
+
+
+def main():
+    rng = np.random.RandomState(0)
+    dimension = 64
+    local_features = rng.random_sample((20000, dimension))
+    offsets = np.arange(0, 20001, 500)
+
+    configurations = [
+        ('hard     K=1024', VLAD(1024), 1024),
+        ('soft     K=256 k=5', VLAD(256, assignment='soft', n_neighbors=5), 256),
+        ('multiple K=256 k=5', VLAD(256, assignment='multiple', n_neighbors=5), 256),
+    ]
+
+    for name, encoder, codebook_size in configurations:
+        encoder.codebook = local_features[rng.choice(len(local_features), codebook_size, replace=False)]
+        elapsed = best_time(lambda: encoder.compute_feature_vectors(local_features, offsets=offsets))
+        print('{:<20s} encode={:7.4f}s'.format(name, elapsed))
+
+    distances = squared_distances(local_features[:4096], local_features[:1024])
+    partial = best_time(lambda: smallest_k(distances, 5))
+    full = best_time(lambda: np.argsort(distances, axis=1)[:, :5])
+    print('top-5 of 1024: partial sort={:7.4f}s full sort={:7.4f}s speedup={:5.1f}x'.format(
+        partial, full, full / partial
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Benchmark of single-pass spatial pyramid VLAD encoding,
+with one cluster assignment per local feature, against
+encoding every pyramid region separately.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_spatial_pyramid.py
+"""
+
+import timeit
+
+import numpy as np
+
+from theama.feature_encoding import VLAD
+
+
+def best_time(function):
+    return min(timeit.repeat(function, number=1, repeat=3))
+
+
+def per_region(encoder, local_features, positions, offsets, image_shape, grids):
+    height, width = image_shape
+    feature_vectors = []
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        features = local_features[start:stop]
+        x, y = positions[start:stop].T
+        regions = []
+        for rows, columns in grids:
+            row = np.minimum((y * rows / height).astype(int), rows - 1)
+            column = np.minimum((x * columns / width).astype(int), columns - 1)
+            for cell in range(rows * columns):
+                inside = row * columns + column == cell
+                regions.append(encoder.compute_feature_vector(features[inside]))
+        feature_vectors.append(np.concatenate(regions))
+
+    return np.array(feature_vectors)
+
+
+def main():
+    rng = np.random.RandomState(0)
+    dimension = 64
+    image_shape = (480, 640)
+    local_features = rng.random_sample((20000, dimension))
+    positions = rng.random_sample((20000, 2)) * [image_shape[1], image_shape[0]]
+    offsets = np.arange(0, 20001, 500)
+    codebook = local_features[rng.choice(len(local_features), 256, replace=False)]
+
+    for grids in [((1, 1),), ((1, 1), (2, 2)), ((1, 1), (2, 2), (3, 1))]:
+        pyramid = VLAD(256)
+        pyramid.codebook = codebook
+        region = VLAD(256, normalization=None)
+        region.codebook = codebook
+
+        single_pass = best_time(lambda: pyramid.compute_pyramid_feature_vectors(
+            local_features, positions, offsets, image_shape, grids
+        ))
+        separate = best_time(lambda: per_region(
+            region, local_features, positions, offsets, image_shape, grids
+        ))
+
+        print('grids={:<26s} single pass={:7.4f}s per region={:7.4f}s speedup={:5.1f}x'.format(
+            str(grids), single_pass, separate, separate / single_pass
+        ))
+
+
+if __name__ == '__main__':
+    main()
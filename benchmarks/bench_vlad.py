@@ -0,0 +1,80 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Benchmark comparing the vectorised VLAD encoder against the
+original per-descriptor loop implementation.
+
+Usage:
+    PYTHONPATH=. python benchmarks/bench_vlad.py
+"""
+
+import timeit
+
+import numpy as np
+
+from theama.feature_encoding import VLAD
+
+
+def reference_vlad(codebook, local_features):
+    """Function implementing the original loop-based
+    VLAD computation, kept here as a baseline.
+    """
+
+    cluster_feature_map = {i: [] for i in range(codebook.shape[0])}
+
+    for local_feature in local_features:
+        closest_visual_word_index = np.linalg.norm(
+            codebook - local_feature.reshape(1, -1),
+            axis=1
+        ).argmin()
+
+        cluster_feature_map[closest_visual_word_index].append(local_feature)
+
+    vlad_descriptor = []
+    for visual_word_index, associated_local_features in cluster_feature_map.items():
+        visual_word = codebook[visual_word_index]
+
+        sum_of_residuals = np.zeros_like(visual_word, dtype=np.float64)
+        for local_feature in associated_local_features:
+            sum_of_residuals += local_feature - visual_word
+        vlad_descriptor.append(sum_of_residuals)
+
+    vlad_descriptor = np.array(vlad_descriptor).ravel()
+
+    return vlad_descriptor / np.linalg.norm(vlad_descriptor)
+
+
+def main():
+    rng = np.random.RandomState(0)
+    dimension = 128
+
+    for codebook_size, n_features in [(64, 5000), (256, 5000), (256, 20000)]:
+        vlad = VLAD(codebook_size)
+        vlad.codebook = rng.random_sample((codebook_size, dimension))
+        local_features = rng.random_sample((n_features, dimension))
+
+        np.testing.assert_allclose(
+            vlad.compute_feature_vector(local_features),
+            reference_vlad(vlad.codebook, local_features),
+            atol=1e-10
+        )
+
+        reference_time = min(timeit.repeat(
+            lambda: reference_vlad(vlad.codebook, local_features),
+            number=1, repeat=3
+        ))
+        vectorised_time = min(timeit.repeat(
+            lambda: vlad.compute_feature_vector(local_features),
+            number=1, repeat=3
+        ))
+
+        print('K={:<5d} N={:<6d} reference={:8.4f}s vectorised={:8.4f}s speedup={:6.1f}x'.format(
+            codebook_size, n_features, reference_time,
+            vectorised_time, reference_time / vectorised_time
+        ))
+
+
+if __name__ == '__main__':
+    main()
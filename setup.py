@@ -15,6 +15,7 @@ setup(
   install_requires=[
           'scikit-learn',
           'numpy',
+          'scipy',
       ],
   classifiers=[
     'Development Status :: 3 - Alpha',
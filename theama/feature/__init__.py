@@ -1,10 +1,18 @@
 from .interest_point import ORB
 from .interest_point import BRISK
+from .interest_point import keypoints_to_array
 from .image_features import compute_hog, compute_lbp
+from .image_features import compute_hog_batch, compute_hog_windows, compute_lbp_batch
+from .batch import extract_features
 
 __all__ = [
     'ORB',
     'BRISK',
+    'keypoints_to_array',
     'compute_lbp',
-    'compute_hog'
+    'compute_hog',
+    'compute_hog_batch',
+    'compute_hog_windows',
+    'compute_lbp_batch',
+    'extract_features'
 ]
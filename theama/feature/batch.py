@@ -0,0 +1,156 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- OpenCV: https://opencv.org/license/
+- NumPy: https://www.numpy.org/license.html#
+
+Module for extracting features from collections of images
+on a pool of threads or processes.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from .image_features import compute_hog, compute_lbp
+from .interest_point import BRISK, ORB
+from ..utils.parallel import bounded_map, check_backend, effective_n_jobs
+
+INTEREST_POINT_EXTRACTORS = {
+    'orb': ORB,
+    'brisk': BRISK
+}
+
+IMAGE_FEATURE_EXTRACTORS = {
+    'hog': compute_hog,
+    'lbp': compute_lbp
+}
+
+# Detector instances are not safe to share, so every thread keeps its own
+_thread_state = threading.local()
+
+
+def _detector(extractor):
+    """Function to return the detector owned by the
+    calling thread, creating it on first use.
+    """
+
+    detectors = getattr(_thread_state, 'detectors', None)
+    if detectors is None:
+        detectors = _thread_state.detectors = {}
+
+    if extractor not in detectors:
+        detectors[extractor] = INTEREST_POINT_EXTRACTORS[extractor]()
+
+    return detectors[extractor]
+
+
+def _load_image(image, grayscale):
+    """Function to read an image from a path if needed,
+    and optionally convert it to grayscale.
+    """
+
+    if isinstance(image, str):
+        path = image
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+        if image is None:
+            raise Exception('Could not read image: ' + path)
+    elif grayscale and image.ndim == 3 and image.shape[-1] == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    return image
+
+
+def _extract_single(task):
+    """Function run by a worker to extract the features of
+    one image.
+    """
+
+    image, extractor, grayscale, kwargs = task
+    image = _load_image(image, grayscale)
+
+    if extractor in INTEREST_POINT_EXTRACTORS:
+        return _detector(extractor).detect_and_compute(image, as_array=True)
+
+    return IMAGE_FEATURE_EXTRACTORS[extractor](image, **kwargs)
+
+
+def extract_features(images, extractor='orb', n_jobs=1, backend='thread',
+                     grayscale=False, return_keypoints=False, **kwargs):
+    """Function to extract features from a collection of
+    images on a pool of workers. Each worker reuses its
+    own detector instance, and results are returned in
+    input order.
+
+    For the interest point extractors ('orb' and 'brisk'),
+    the descriptors of all images are returned as one
+    concatenated array plus offsets, which can be passed
+    directly to the compute_feature_vectors method of the
+    feature encoders.
+
+    Images are consumed lazily, so a streaming reader such
+    as theama.utils.streaming.read_images can be passed
+    without loading the whole collection first.
+
+    Args:
+        images: Iterable of images, given as NumPy arrays or
+                file paths.
+        extractor: One of 'orb', 'brisk', 'hog' or 'lbp'.
+        n_jobs: Number of workers.
+        backend: Either 'thread' or 'process'.
+        grayscale: Boolean flag indicating whether to convert
+                   images to grayscale before extraction.
+        return_keypoints: Boolean flag indicating whether to
+                          also return the keypoints of every
+                          image as structured arrays. Only
+                          used by interest point extractors.
+        **kwargs: Keyword arguments passed to compute_hog or
+                  compute_lbp.
+
+    Returns:
+        For 'orb' and 'brisk', a tuple of (descriptors,
+        offsets), or (descriptors, offsets, keypoints) when
+        return_keypoints is set. For 'hog' and 'lbp', a list
+        with the features of every image.
+    """
+
+    if extractor not in INTEREST_POINT_EXTRACTORS and \
+            extractor not in IMAGE_FEATURE_EXTRACTORS:
+        raise Exception('Unknown extractor: ' + str(extractor))
+
+    check_backend(backend)
+
+    tasks = ((image, extractor, grayscale, kwargs) for image in images)
+    n_jobs = effective_n_jobs(n_jobs)
+
+    if n_jobs == 1:
+        results = [_extract_single(task) for task in tasks]
+    else:
+        executor_class = ThreadPoolExecutor if backend == 'thread' else ProcessPoolExecutor
+        with executor_class(max_workers=n_jobs) as executor:
+            results = list(bounded_map(executor, _extract_single, tasks, 4 * n_jobs))
+
+    if extractor in IMAGE_FEATURE_EXTRACTORS:
+        return results
+
+    keypoints = [result[0] for result in results]
+    descriptors = [result[1] for result in results]
+
+    offsets = np.zeros((len(descriptors) + 1,), dtype=np.intp)
+    np.cumsum([len(d) for d in descriptors], out=offsets[1:])
+
+    if descriptors:
+        descriptors = np.concatenate(descriptors)
+    else:
+        descriptor_size = INTEREST_POINT_EXTRACTORS[extractor]().descriptor_size
+        descriptors = np.zeros((0, descriptor_size), dtype=np.uint8)
+
+    if return_keypoints:
+        return descriptors, offsets, keypoints
+
+    return descriptors, offsets
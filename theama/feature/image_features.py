@@ -5,12 +5,22 @@ License: Apache 2.0
 
 Redistribution Licences:
 - Scikit-Image: https://scikit-image.org/docs/dev/license.html
+- NumPy: https://www.numpy.org/license.html#
 
-Module for image feature computation.
+Module for image feature computation. Besides the per-image
+wrappers around scikit-image, it contains vectorised HOG and
+LBP implementations for stacks of same-size images.
 """
 
+import numpy as np
 from skimage.feature import hog, local_binary_pattern
 
+HOG_BLOCK_NORMS = ('L1', 'L1-sqrt', 'L2', 'L2-Hys')
+LBP_METHODS = ('default', 'uniform')
+
+# Number of set bits of every byte value
+_BYTE_POPCOUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
 
 def compute_hog(input_image, *args, **kwargs):
     """
@@ -45,4 +55,313 @@ def compute_lbp(input_image, radius=3, n_points=24, *args, **kwargs):
 
     """
 
-    return local_binary_pattern(input_image, radius, n_points, *args, **kwargs)
+    return local_binary_pattern(input_image, n_points, radius, *args, **kwargs)
+
+
+def _validate_stack(images):
+    """Function to check that images form a stack of
+    grayscale images of shape (N, H, W).
+    """
+
+    images = np.asarray(images)
+    if images.ndim != 3:
+        raise Exception('Images must be a stack of shape (N, H, W).')
+
+    return images
+
+
+def _hog_cell_histograms(images, orientations, pixels_per_cell):
+    """Function to compute the orientation histograms of
+    the cells of a stack of images, with the same
+    gradients and binning as skimage.feature.hog.
+
+    Returns:
+        Array of shape (N, n_cells_row, n_cells_col,
+        orientations).
+    """
+
+    if images.dtype not in (np.float32, np.float64):
+        images = images.astype(np.float64)
+
+    c_row, c_col = pixels_per_cell
+    n_images, height, width = images.shape
+    n_cells_row, n_cells_col = height // c_row, width // c_col
+
+    g_row = np.zeros(images.shape, dtype=images.dtype)
+    g_row[:, 1:-1, :] = images[:, 2:, :] - images[:, :-2, :]
+    g_col = np.zeros(images.shape, dtype=images.dtype)
+    g_col[:, :, 1:-1] = images[:, :, 2:] - images[:, :, :-2]
+
+    g_row = g_row[:, :n_cells_row * c_row, :n_cells_col * c_col].astype(np.float64)
+    g_col = g_col[:, :n_cells_row * c_row, :n_cells_col * c_col].astype(np.float64)
+
+    magnitude = np.hypot(g_col, g_row)
+    orientation = np.rad2deg(np.arctan2(g_row, g_col)) % 180
+
+    # Bin i holds orientations in [i, i + 1) * 180 / orientations;
+    # values rounded up to 180 fall in no bin
+    edges = (180. / orientations) * np.arange(orientations + 1)
+    bins = np.searchsorted(edges, orientation, side='right') - 1
+    magnitude[bins >= orientations] = 0
+    np.minimum(bins, orientations - 1, out=bins)
+
+    cells = (np.arange(n_cells_row * c_row) // c_row)[:, None] * n_cells_col + \
+        (np.arange(n_cells_col * c_col) // c_col)[None, :]
+    cells = cells[None] + (np.arange(n_images) * n_cells_row * n_cells_col)[:, None, None]
+
+    histograms = np.bincount(
+        (cells * orientations + bins).ravel(),
+        weights=magnitude.ravel(),
+        minlength=n_images * n_cells_row * n_cells_col * orientations
+    )
+
+    return histograms.reshape(n_images, n_cells_row, n_cells_col, orientations) / (c_row * c_col)
+
+
+def _hog_normalized_blocks(histograms, cells_per_block, block_norm, eps=1e-5):
+    """Function to group cell histograms into overlapping
+    blocks and normalise every block.
+
+    Returns:
+        Array of shape (N, n_blocks_row, n_blocks_col,
+        b_row, b_col, orientations).
+    """
+
+    if block_norm not in HOG_BLOCK_NORMS:
+        raise Exception('Block norm must be one of {}.'.format(', '.join(HOG_BLOCK_NORMS)))
+
+    b_row, b_col = cells_per_block
+    if histograms.shape[1] < b_row or histograms.shape[2] < b_col:
+        raise Exception('Images are too small for the cell and block sizes.')
+
+    blocks = np.lib.stride_tricks.sliding_window_view(histograms, (b_row, b_col), axis=(1, 2))
+    blocks = blocks.transpose(0, 1, 2, 4, 5, 3)
+    axes = (3, 4, 5)
+
+    if block_norm in ('L1', 'L1-sqrt'):
+        blocks = blocks / (np.abs(blocks).sum(axis=axes, keepdims=True) + eps)
+        if block_norm == 'L1-sqrt':
+            blocks = np.sqrt(blocks)
+        return blocks
+
+    blocks = blocks / np.sqrt((blocks ** 2).sum(axis=axes, keepdims=True) + eps ** 2)
+    if block_norm == 'L2-Hys':
+        blocks = np.minimum(blocks, 0.2)
+        blocks = blocks / np.sqrt((blocks ** 2).sum(axis=axes, keepdims=True) + eps ** 2)
+
+    return blocks
+
+
+def compute_hog_batch(images, orientations=9, pixels_per_cell=(8, 8),
+                      cells_per_block=(3, 3), block_norm='L2-Hys'):
+    """Function to compute the HOG descriptors of a stack
+    of same-size grayscale images, such as detection
+    crops, at once. Gradients, orientation binning and
+    block normalisation are vectorised over the whole
+    stack, and the result matches skimage.feature.hog
+    with the same parameters applied to every image.
+
+    Args:
+        images: Array of shape (N, H, W).
+        orientations: Number of orientation bins.
+        pixels_per_cell: Tuple (rows, cols) of cell size.
+        cells_per_block: Tuple (rows, cols) of block size,
+                         in cells.
+        block_norm: One of 'L1', 'L1-sqrt', 'L2' or 'L2-Hys'.
+
+    Returns:
+        Array of shape (N, D) of HOG descriptors.
+    """
+
+    images = _validate_stack(images)
+
+    histograms = _hog_cell_histograms(images, orientations, pixels_per_cell)
+    blocks = _hog_normalized_blocks(histograms, cells_per_block, block_norm)
+
+    return blocks.reshape(len(images), -1)
+
+
+def compute_hog_windows(images, window_shape, step=None, orientations=9,
+                        pixels_per_cell=(8, 8), cells_per_block=(3, 3),
+                        block_norm='L2-Hys'):
+    """Function to compute the HOG descriptors of all
+    sliding windows of one or several images. Cell
+    histograms and normalised blocks are computed once
+    over the whole image and shared by every window that
+    contains them, instead of being recomputed per window.
+
+    Windows are aligned to the cell grid, so step must be
+    a multiple of the cell size. As gradients are taken
+    over the whole image, pixels on window borders use
+    their neighbours outside the window, unlike HOG
+    computed on a crop.
+
+    Args:
+        images: Image of shape (H, W), or stack of shape
+                (N, H, W).
+        window_shape: Tuple (rows, cols) of window size.
+        step: Optional tuple (rows, cols) of window step.
+              Default is one cell.
+        orientations: Number of orientation bins.
+        pixels_per_cell: Tuple (rows, cols) of cell size.
+        cells_per_block: Tuple (rows, cols) of block size,
+                         in cells.
+        block_norm: One of 'L1', 'L1-sqrt', 'L2' or 'L2-Hys'.
+
+    Returns:
+        Array of shape (n_windows_row, n_windows_col, D),
+        with a leading N axis for stacks, where window
+        (i, j) has its top-left corner at pixel
+        (i * step[0], j * step[1]).
+    """
+
+    images = np.asarray(images)
+    single_image = images.ndim == 2
+    if single_image:
+        images = images[None]
+    images = _validate_stack(images)
+
+    c_row, c_col = pixels_per_cell
+    b_row, b_col = cells_per_block
+    step_row, step_col = pixels_per_cell if step is None else step
+
+    if step_row % c_row or step_col % c_col:
+        raise Exception('Window step must be a multiple of the cell size.')
+
+    # Blocks per window along each axis
+    w_row = window_shape[0] // c_row - b_row + 1
+    w_col = window_shape[1] // c_col - b_col + 1
+    if w_row < 1 or w_col < 1:
+        raise Exception('Window is too small for the cell and block sizes.')
+
+    histograms = _hog_cell_histograms(images, orientations, pixels_per_cell)
+    blocks = _hog_normalized_blocks(histograms, cells_per_block, block_norm)
+
+    if blocks.shape[1] < w_row or blocks.shape[2] < w_col:
+        raise Exception('Images are smaller than the window.')
+
+    windows = np.lib.stride_tricks.sliding_window_view(blocks, (w_row, w_col), axis=(1, 2))
+    windows = windows[:, ::step_row // c_row, ::step_col // c_col]
+    # (N, Wr, Wc, b_row, b_col, o, w_row, w_col) -> (N, Wr, Wc, w_row, w_col, b_row, b_col, o)
+    windows = windows.transpose(0, 1, 2, 6, 7, 3, 4, 5)
+    windows = windows.reshape(windows.shape[:3] + (-1,))
+
+    return windows[0] if single_image else windows
+
+
+def _popcount(values):
+    """Function to count the set bits of every value of a
+    uint32 array, one byte at a time from a lookup table.
+    """
+
+    counts = _BYTE_POPCOUNTS[values.view(np.uint8)].reshape(values.shape + (4,))
+
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+def uniform_lbp_codes(codes, n_points):
+    """Function to convert LBP codes to rotation-invariant
+    uniform LBP codes: the number of set bits for patterns
+    with at most two circular 0/1 transitions, and
+    n_points + 1 otherwise. Transitions are the set bits of
+    a code XOR-ed with its circular rotation by one bit, so
+    the conversion is computed per pixel, without a table
+    over all 2 ** n_points patterns.
+
+    Args:
+        codes: uint32 array of LBP codes.
+        n_points: Number of circularly symmetric neighbours.
+
+    Returns:
+        uint8 array of the same shape as codes.
+    """
+
+    rotated = codes >> 1
+    rotated |= (codes & 1) << np.uint32(n_points - 1)
+    rotated ^= codes
+
+    uniform = _popcount(codes)
+    uniform[_popcount(rotated) > 2] = n_points + 1
+
+    return uniform
+
+
+def compute_lbp_batch(images, radius=3, n_points=24, method='default'):
+    """Function to compute the LBP codes of a stack of
+    same-size grayscale images at once. Neighbours are
+    sampled with bilinear interpolation, as in
+    skimage.feature.local_binary_pattern, for all images
+    and pixels in one vectorised pass per neighbour, and
+    uniform codes are derived from the bit counts of the
+    codes.
+
+    Args:
+        images: Array of shape (N, H, W).
+        radius: Radius of the circle of neighbours.
+        n_points: Number of circularly symmetric neighbours.
+        method: 'default' or 'uniform'.
+
+    Returns:
+        Integer array of shape (N, H, W) of LBP codes.
+    """
+
+    if method not in LBP_METHODS:
+        raise Exception('Method must be one of {}.'.format(', '.join(LBP_METHODS)))
+    if n_points > 32:
+        raise Exception('At most 32 points are supported.')
+
+    images = _validate_stack(images).astype(np.float64)
+    n_images, height, width = images.shape
+
+    pad = int(np.ceil(radius)) + 1
+    padded = np.pad(images, ((0, 0), (pad, pad), (pad, pad)))
+
+    angles = 2 * np.pi * np.arange(n_points, dtype=np.float64) / n_points
+    row_offsets = np.round(-radius * np.sin(angles), 5)
+    col_offsets = np.round(radius * np.cos(angles), 5)
+
+    rows = np.arange(height, dtype=np.float64)[None, :, None]
+    cols = np.arange(width, dtype=np.float64)[None, None, :]
+
+    def shifted(row_shift, col_shift):
+        return padded[:, pad + row_shift:pad + row_shift + height,
+                      pad + col_shift:pad + col_shift + width]
+
+    def interpolate_row(row_shift, col_min, col_max, dc, out):
+        if col_min == col_max:
+            out[...] = shifted(row_shift, col_min)
+        else:
+            np.multiply(1 - dc, shifted(row_shift, col_min), out=out)
+            out += dc * shifted(row_shift, col_max)
+        return out
+
+    texture = np.empty(images.shape)
+    bottom = np.empty(images.shape)
+    bit = np.empty(images.shape, dtype=bool)
+    codes = np.zeros(images.shape, dtype=np.uint32)
+
+    # Bits are shifted in from the most significant one, so
+    # that codes are built in place
+    for i in reversed(range(n_points)):
+        row_min, row_max = int(np.floor(row_offsets[i])), int(np.ceil(row_offsets[i]))
+        col_min, col_max = int(np.floor(col_offsets[i])), int(np.ceil(col_offsets[i]))
+
+        # Fractions taken from absolute positions, as in scikit-image
+        dr = (rows + row_offsets[i]) - (rows + row_min)
+        dc = (cols + col_offsets[i]) - (cols + col_min)
+
+        interpolate_row(row_min, col_min, col_max, dc, texture)
+        if row_min != row_max:
+            interpolate_row(row_max, col_min, col_max, dc, bottom)
+            texture *= 1 - dr
+            bottom *= dr
+            texture += bottom
+
+        np.greater_equal(texture, images, out=bit)
+        np.left_shift(codes, 1, out=codes)
+        np.bitwise_or(codes, bit, out=codes)
+
+    if method == 'uniform':
+        return uniform_lbp_codes(codes, n_points)
+
+    return codes
@@ -1,7 +1,10 @@
 from .brisk import BRISK
 from .orb import ORB
+from .utils import keypoints_to_array, KEYPOINT_DTYPE
 
 __all__ = [
     'BRISK',
-    'ORB'
+    'ORB',
+    'keypoints_to_array',
+    'KEYPOINT_DTYPE'
 ]
\ No newline at end of file
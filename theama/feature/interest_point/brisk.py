@@ -5,12 +5,16 @@ License: Apache 2.0
 
 Redistribution Licensing:
 - OpenCV: https://opencv.org/license/
+- NumPy: https://www.numpy.org/license.html#
 
 Module for BRISK interest points detection and
 descriptor computation.
 """
 
 import cv2
+import numpy as np
+
+from .utils import keypoints_to_array, validate_image
 
 
 class BRISK(object):
@@ -22,6 +26,12 @@ class BRISK(object):
     def __init__(self):
         self.brisk = cv2.BRISK_create()
 
+    @property
+    def descriptor_size(self):
+        """Number of bytes in every BRISK descriptor."""
+
+        return self.brisk.descriptorSize()
+
     def detect(self, input_image):
         """Function to detect BRISK interest points.
 
@@ -33,14 +43,7 @@ class BRISK(object):
             interest points.
         """
 
-        if input_image.dtype.name != 'uint8':
-            raise Exception('Ensure dtype is uint8.')
-
-        if len(input_image.shape) > 3 or \
-                len(input_image.shape) < 2 or \
-                (len(input_image.shape) == 3 and
-                 input_image.shape[-1] not in [1, 3]):
-            raise Exception('Must be an image with 1 or 3 channels.')
+        validate_image(input_image)
 
         return self.brisk.detect(input_image)
 
@@ -57,14 +60,7 @@ class BRISK(object):
             NumPy array of BRISK descriptors.
         """
 
-        if input_image.dtype.name != 'uint8':
-            raise Exception('Ensure dtype is uint8.')
-
-        if len(input_image.shape) > 3 \
-                or len(input_image.shape) < 2 or \
-                (len(input_image.shape) == 3 and
-                 input_image.shape[-1] not in [1, 3]):
-            raise Exception('Must be an image with 1 or 3 channels.')
+        validate_image(input_image)
 
         if not keypoints:
             raise Exception('No keypoints.')
@@ -75,3 +71,35 @@ class BRISK(object):
         _, descriptors = self.brisk.compute(input_image, keypoints)
 
         return descriptors
+
+    def detect_and_compute(self, input_image, as_array=False):
+        """Function to detect BRISK interest points and
+        compute their descriptors in a single pass, so that
+        the image is validated once and OpenCV builds the
+        image pyramid only once.
+
+        Args:
+            input_image: Input image. Must be of type uint8.
+            as_array: Boolean flag indicating whether to return
+                      the keypoints as a structured NumPy array
+                      with fields x, y, size, angle, response
+                      and octave, instead of a list of KeyPoint
+                      objects.
+
+        Returns:
+            Tuple of (keypoints, NumPy array of BRISK descriptors).
+            The descriptor array has zero rows when no
+            interest points are found.
+        """
+
+        validate_image(input_image)
+
+        keypoints, descriptors = self.brisk.detectAndCompute(input_image, None)
+
+        if descriptors is None:
+            descriptors = np.zeros((0, self.descriptor_size), dtype=np.uint8)
+
+        if as_array:
+            keypoints = keypoints_to_array(keypoints)
+
+        return keypoints, descriptors
@@ -0,0 +1,59 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- OpenCV: https://opencv.org/license/
+- NumPy: https://www.numpy.org/license.html#
+
+Module with helpers shared by the interest point detectors.
+"""
+
+import numpy as np
+
+KEYPOINT_DTYPE = np.dtype([
+    ('x', np.float32),
+    ('y', np.float32),
+    ('size', np.float32),
+    ('angle', np.float32),
+    ('response', np.float32),
+    ('octave', np.int32)
+])
+
+
+def validate_image(input_image):
+    """Function to check that an image can be passed to
+    the OpenCV interest point detectors.
+
+    Args:
+        input_image: Input image.
+    """
+
+    if input_image.dtype.name != 'uint8':
+        raise Exception('Ensure dtype is uint8.')
+
+    if len(input_image.shape) > 3 or \
+            len(input_image.shape) < 2 or \
+            (len(input_image.shape) == 3 and
+             input_image.shape[-1] not in [1, 3]):
+        raise Exception('Must be an image with 1 or 3 channels.')
+
+
+def keypoints_to_array(keypoints):
+    """Function to convert a list of cv2.KeyPoint objects
+    to a compact structured NumPy array.
+
+    Args:
+        keypoints: List of cv2.KeyPoint objects.
+
+    Returns:
+        Structured array with fields x, y, size, angle,
+        response and octave.
+    """
+
+    return np.array(
+        [(kp.pt[0], kp.pt[1], kp.size, kp.angle, kp.response, kp.octave)
+         for kp in keypoints],
+        dtype=KEYPOINT_DTYPE
+    )
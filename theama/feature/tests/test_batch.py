@@ -0,0 +1,80 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for batch feature extraction.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from theama.feature import ORB, extract_features
+from theama.utils.utils import load_lena
+
+
+class BatchExtractionTests(unittest.TestCase):
+    """
+    Class for batch feature extraction unit tests.
+    """
+
+    def setUp(self):
+        image = load_lena()
+        self.images = [image, image[::2, ::2].copy(), np.zeros((64, 64, 3), dtype='uint8')]
+
+    def test_orb_batch_matches_single_images(self):
+        """Function to test that batch ORB extraction on a
+        thread pool returns concatenated descriptors with
+        offsets, in input order.
+        """
+
+        descriptors, offsets, keypoints = extract_features(
+            self.images, 'orb', n_jobs=2, return_keypoints=True
+        )
+
+        orb = ORB()
+        for i, image in enumerate(self.images):
+            _, expected = orb.detect_and_compute(image)
+            np.testing.assert_array_equal(descriptors[offsets[i]:offsets[i + 1]], expected)
+            self.assertEqual(len(keypoints[i]), len(expected))
+
+        self.assertEqual(offsets[-1], len(descriptors))
+
+    def test_extraction_from_paths(self):
+        """Function to test that images can be given as file
+        paths, and that the process backend returns the same
+        result as the serial path.
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            paths = []
+            for i, image in enumerate(self.images[:2]):
+                paths.append(os.path.join(directory, '{}.png'.format(i)))
+                cv2.imwrite(paths[-1], image)
+
+            serial = extract_features(paths, 'brisk')
+            parallel = extract_features(paths, 'brisk', n_jobs=2, backend='process')
+        finally:
+            shutil.rmtree(directory)
+
+        np.testing.assert_array_equal(serial[0], parallel[0])
+        np.testing.assert_array_equal(serial[1], parallel[1])
+
+    def test_lbp_batch(self):
+        """Function to test batch extraction of image
+        features, which are returned as a list.
+        """
+
+        features = extract_features(self.images, 'lbp', n_jobs=2, grayscale=True)
+
+        self.assertEqual(len(features), 3)
+        self.assertEqual(features[1].shape, self.images[1].shape[:2])
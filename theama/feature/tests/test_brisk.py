@@ -120,3 +120,29 @@ class BriskTests(unittest.TestCase):
             self.brisk.describe(self.image, keypoints)
 
         self.assertTrue('No keypoints.' in str(context.exception))
+
+    def test_brisk_detect_and_compute(self):
+        """Function to test the single-pass detection and
+        description of BRISK interest points. Asserts that
+        there is one descriptor per keypoint, and that the
+        structured keypoint array matches the KeyPoint list.
+        """
+
+        keypoints, descriptors = self.brisk.detect_and_compute(self.image)
+        keypoint_array, _ = self.brisk.detect_and_compute(self.image, as_array=True)
+
+        self.assertGreater(len(keypoints), 0)
+        self.assertEqual(len(keypoints), len(descriptors))
+        self.assertEqual(len(keypoint_array), len(keypoints))
+        np.testing.assert_allclose(keypoint_array['x'], [kp.pt[0] for kp in keypoints])
+        np.testing.assert_allclose(keypoint_array['response'], [kp.response for kp in keypoints])
+
+    def test_brisk_detect_and_compute_no_keypoints(self):
+        """Function to test that an image without interest
+        points yields an empty descriptor array.
+        """
+
+        keypoints, descriptors = self.brisk.detect_and_compute(np.zeros((64, 64), dtype='uint8'))
+
+        self.assertEqual(len(keypoints), 0)
+        self.assertEqual(descriptors.shape[0], 0)
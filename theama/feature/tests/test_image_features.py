@@ -11,9 +11,12 @@ Module with unit tests for the image features.
 
 import unittest
 
+import cv2
 import numpy as np
+from skimage.feature import hog, local_binary_pattern
 
-from theama.feature import compute_hog
+from theama.feature import compute_hog, compute_hog_batch, compute_hog_windows
+from theama.feature import compute_lbp, compute_lbp_batch
 from theama.utils.utils import load_lena
 
 
@@ -34,3 +37,85 @@ class ImageFeatureTest(unittest.TestCase):
             compute_hog(invalid_image)
 
         self.assertTrue('negative dimensions are not allowed' in str(context.exception))
+
+
+class BatchImageFeatureTest(unittest.TestCase):
+    """
+    Class for batched HOG and LBP unit tests.
+    """
+
+    def setUp(self):
+        self.gray = cv2.cvtColor(load_lena(), cv2.COLOR_BGR2GRAY)
+        rng = np.random.RandomState(0)
+        corners = rng.randint(0, 150, (6, 2))
+        self.crops = np.stack([self.gray[r:r + 64, c:c + 48] for r, c in corners])
+
+    def test_hog_batch_matches_skimage(self):
+        """Function to test that batched HOG matches
+        scikit-image for every block normalisation.
+        """
+
+        for block_norm in ('L1', 'L1-sqrt', 'L2', 'L2-Hys'):
+            expected = np.array([hog(crop, block_norm=block_norm) for crop in self.crops])
+
+            np.testing.assert_allclose(
+                compute_hog_batch(self.crops, block_norm=block_norm),
+                expected,
+                atol=1e-6
+            )
+
+    def test_hog_windows_share_blocks(self):
+        """Function to test that sliding-window HOG gathers
+        the blocks of the whole image at the window positions.
+        """
+
+        windows = compute_hog_windows(self.gray, (64, 48), step=(16, 8))
+        blocks = hog(self.gray, feature_vector=False)
+
+        # 8 x 6 cells per window give 6 x 4 blocks of 3 x 3 cells
+        self.assertEqual(windows.shape, ((28 - 8) // 2 + 1, 28 - 6 + 1, 6 * 4 * 81))
+        np.testing.assert_allclose(windows[3, 5], blocks[6:12, 5:9].ravel(), atol=1e-6)
+
+        stacked = compute_hog_windows(np.stack([self.gray, self.gray]), (64, 48), step=(16, 8))
+        np.testing.assert_array_equal(stacked[1], windows)
+
+    def test_hog_windows_invalid_step(self):
+        """Function to test that a step off the cell grid
+        raises an exception.
+        """
+
+        with self.assertRaises(Exception) as context:
+            compute_hog_windows(self.gray, (64, 48), step=(4, 8))
+
+        self.assertTrue('multiple of the cell size' in str(context.exception))
+
+    def test_lbp_batch_matches_skimage(self):
+        """Function to test that batched LBP codes, including
+        uniform codes derived from bit counts, equal
+        scikit-image.
+        """
+
+        for n_points, radius in ((8, 1), (16, 2.5), (24, 3)):
+            for method in ('default', 'uniform'):
+                expected = np.array([
+                    local_binary_pattern(crop, n_points, radius, method) for crop in self.crops
+                ])
+
+                np.testing.assert_array_equal(
+                    compute_lbp_batch(self.crops, radius, n_points, method),
+                    expected
+                )
+                np.testing.assert_array_equal(
+                    compute_lbp(self.crops[0], radius, n_points, method),
+                    expected[0]
+                )
+
+    def test_invalid_stack(self):
+        """Function to test that a single image passed as a
+        stack raises an exception.
+        """
+
+        with self.assertRaises(Exception) as context:
+            compute_lbp_batch(self.gray)
+
+        self.assertTrue('stack of shape (N, H, W)' in str(context.exception))
@@ -1,7 +1,13 @@
 from .vlad import VLAD
 from .bow import BOW
+from .fisher_vector import FV
+from .assignment import BruteForceAssigner, HierarchicalKMeansAssigner, HammingAssigner
 
 __all__ = [
     'VLAD',
-    'BOW'
-]
\ No newline at end of file
+    'BOW',
+    'FV',
+    'BruteForceAssigner',
+    'HierarchicalKMeansAssigner',
+    'HammingAssigner'
+]
@@ -0,0 +1,214 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+- SciPy: https://www.scipy.org/scipylib/license.html
+
+Module containing vectorised aggregation routines that
+pool assigned local features into per-cluster statistics,
+optionally split into segments (one segment per image).
+"""
+
+import numpy as np
+from scipy import sparse
+
+
+def concatenate_segments(local_features, offsets=None, dimension=None, dtype=np.float64):
+    """Function to bring a batch of local feature matrices
+    into a single concatenated matrix plus offsets.
+
+    Args:
+        local_features: Either a list of data matrices (one
+                        per image, entries may be None or
+                        empty), or a single concatenated
+                        data matrix when offsets is given.
+        offsets: Optional integer array of length N + 1 such
+                 that the features of image i are the rows
+                 offsets[i]:offsets[i + 1] of local_features.
+        dimension: Feature dimensionality, used to shape
+                   empty entries.
+        dtype: Data type used for empty entries.
+
+    Returns:
+        Tuple of (concatenated data matrix, offsets).
+    """
+
+    if offsets is not None:
+        offsets = np.asarray(offsets, dtype=np.intp)
+        local_features = np.asarray(local_features)
+
+        if offsets.ndim != 1 or len(offsets) < 1 or offsets[0] != 0 or \
+                offsets[-1] != local_features.shape[0] or \
+                np.any(np.diff(offsets) < 0):
+            raise Exception('Offsets must be non-decreasing, start at 0 and end at the number of features.')
+
+        return local_features, offsets
+
+    segments = []
+    for features in local_features:
+        if features is None or len(features) == 0:
+            features = np.zeros((0, dimension), dtype=dtype)
+        segments.append(np.asarray(features))
+
+    lengths = [len(features) for features in segments]
+    offsets = np.zeros((len(segments) + 1,), dtype=np.intp)
+    np.cumsum(lengths, out=offsets[1:])
+
+    if segments:
+        dtype = np.result_type(*[features.dtype for features in segments if len(features)] or [dtype])
+        local_features = np.concatenate([features.astype(dtype, copy=False) for features in segments])
+    else:
+        local_features = np.zeros((0, dimension), dtype=dtype)
+
+    return local_features, offsets
+
+
+def segment_ids_from_offsets(offsets):
+    """Function to expand offsets into a per-feature
+    segment index.
+
+    Args:
+        offsets: Integer array of length N + 1.
+
+    Returns:
+        Integer array mapping every feature to its segment.
+    """
+
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def broadcast_segments(assignments, segment_ids, weights=None):
+    """Function to bring cluster assignments, their weights
+    and segment indices to a common shape. Segment indices
+    of shape (N, L) place every local feature in L segments,
+    such as one region per spatial pyramid level, and the
+    assignments of a feature are repeated for each of them
+    as broadcast views, without copying.
+
+    Args:
+        assignments: Cluster assignments of shape (N,) or (N, k).
+        segment_ids: Segment index of shape (N,) or (N, L).
+        weights: Optional assignment weights of the same
+                 shape as assignments.
+
+    Returns:
+        Tuple of (assignments, segment_ids, weights) of equal
+        shape, with weights None if not given.
+    """
+
+    if segment_ids.ndim == 2:
+        shape = segment_ids.shape + assignments.shape[1:]
+        assignments = np.broadcast_to(assignments[:, None], shape)
+        if weights is not None:
+            weights = np.broadcast_to(weights[:, None], shape)
+
+    segment_ids = segment_ids.reshape(segment_ids.shape + (1,) * (assignments.ndim - segment_ids.ndim))
+
+    return assignments, np.broadcast_to(segment_ids, assignments.shape), weights
+
+
+def _assignment_keys(assignments, n_clusters, segment_ids, weights=None):
+    """Function to combine cluster assignments of shape
+    (N,) or (N, k) with segment indices into flat
+    (segment, cluster) keys, along with the matching flat
+    weights.
+    """
+
+    if segment_ids is None:
+        return assignments.ravel(), None if weights is None else weights.ravel()
+
+    assignments, segment_ids, weights = broadcast_segments(assignments, segment_ids, weights)
+
+    return (segment_ids * n_clusters + assignments).ravel(), None if weights is None else weights.ravel()
+
+
+def cluster_counts(assignments, n_clusters, segment_ids=None, n_segments=1, weights=None):
+    """Function to count the number of local features
+    assigned to every cluster, per segment, using a single
+    bincount over combined (segment, cluster) keys. With
+    multiple assignment, every local feature has k
+    assignments, each counted with its weight.
+
+    Args:
+        assignments: Cluster assignments of shape (N,), or
+                     (N, k) for multiple assignment.
+        n_clusters: Number of clusters K.
+        segment_ids: Optional segment index of shape (N,),
+                     or (N, L) for features in L segments.
+        n_segments: Number of segments.
+        weights: Optional assignment weights of the same
+                 shape as assignments.
+
+    Returns:
+        Counts of shape (n_segments, K).
+    """
+
+    keys, weights = _assignment_keys(assignments, n_clusters, segment_ids, weights)
+
+    counts = np.bincount(keys, weights=weights, minlength=n_segments * n_clusters)
+
+    return counts.reshape(n_segments, n_clusters)
+
+
+def residual_sums(local_features, assignments, centroids, segment_ids=None, n_segments=1,
+                  weights=None):
+    """Function to compute, for every segment and cluster,
+    the sum of residuals between the local features
+    assigned to it and its centroid. The residual of every
+    local feature is taken before summing, in the data type
+    of the centroids, so large clusters do not lose small
+    residuals to cancellation. The per-cluster sums are
+    built with a single scatter-add. With multiple or
+    weighted assignment, the weighted sums are instead one
+    sparse matrix product per assignment column, so only
+    the residuals of one column are held at a time.
+
+    Args:
+        local_features: Data matrix of shape (N, D).
+        assignments: Cluster assignments of shape (N,), or
+                     (N, k) for multiple assignment.
+        centroids: Centroid matrix of shape (K, D).
+        segment_ids: Optional segment index of shape (N,),
+                     or (N, L) for features in L segments.
+        n_segments: Number of segments.
+        weights: Optional assignment weights of the same
+                 shape as assignments.
+
+    Returns:
+        Residual sums of shape (n_segments, K, D).
+    """
+
+    n_clusters, dimension = centroids.shape
+    local_features = np.asarray(local_features, dtype=centroids.dtype)
+    n_features = local_features.shape[0]
+
+    sums = np.zeros((n_segments * n_clusters, dimension), dtype=centroids.dtype)
+
+    if assignments.ndim == 1 and weights is None and (segment_ids is None or segment_ids.ndim == 1):
+        keys, _ = _assignment_keys(assignments, n_clusters, segment_ids)
+        np.add.at(sums, keys, local_features - centroids[assignments])
+
+        return sums.reshape(n_segments, n_clusters, dimension)
+
+    columns = assignments.reshape(n_features, -1)
+    column_weights = None if weights is None else weights.reshape(n_features, -1)
+
+    for column in range(columns.shape[1]):
+        keys, data = _assignment_keys(
+            columns[:, column],
+            n_clusters,
+            segment_ids,
+            None if column_weights is None else column_weights[:, column]
+        )
+        features = np.repeat(np.arange(n_features), keys.size // max(n_features, 1))
+        data = np.ones(keys.size, dtype=centroids.dtype) if data is None else data.astype(centroids.dtype)
+
+        sums += sparse.csr_matrix(
+            (data, (keys, features)),
+            shape=(n_segments * n_clusters, n_features)
+        ) @ (local_features - centroids[columns[:, column]])
+
+    return sums.reshape(n_segments, n_clusters, dimension)
@@ -0,0 +1,496 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing vectorised nearest-centroid assignment
+routines shared by the feature encoders. Encoders delegate
+assignment to an assigner object, which can either search
+all centroids exactly or use an approximate index.
+"""
+
+import numpy as np
+
+from .binary import hamming_distances
+
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def squared_distances(local_features, centroids, centroid_norms=None):
+    """Function to compute the squared Euclidean distance
+    between every local feature and every centroid using
+    the expansion ||x - c||^2 = ||x||^2 - 2x.c + ||c||^2,
+    so that the bulk of the work is a single matrix product.
+
+    Args:
+        local_features: Data matrix of shape (N, D).
+        centroids: Centroid matrix of shape (K, D).
+        centroid_norms: Optional precomputed squared norms
+                        of the centroids, of shape (K,).
+
+    Returns:
+        Distance matrix of shape (N, K).
+    """
+
+    local_features = np.asarray(local_features, dtype=centroids.dtype)
+
+    if centroid_norms is None:
+        centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+
+    feature_norms = np.einsum('ij,ij->i', local_features, local_features)
+
+    distances = local_features.dot(centroids.T)
+    distances *= -2.0
+    distances += feature_norms[:, None]
+    distances += centroid_norms[None, :]
+
+    # Guard against small negative values from round-off
+    np.maximum(distances, 0.0, out=distances)
+
+    return distances
+
+
+def smallest_k(distances, n_neighbors):
+    """Function to select the n_neighbors smallest
+    distances of every row, sorted in increasing order.
+    Only the selected columns are sorted, after a partial
+    sort (argpartition) of every row.
+
+    Args:
+        distances: Distance matrix of shape (N, K).
+        n_neighbors: Number of distances to select.
+
+    Returns:
+        Tuple of (distances of shape (N, n_neighbors),
+        column indices of shape (N, n_neighbors)).
+    """
+
+    n_columns = distances.shape[1]
+    n_neighbors = min(n_neighbors, n_columns)
+
+    if n_neighbors < n_columns:
+        indices = np.argpartition(distances, n_neighbors - 1, axis=1)[:, :n_neighbors]
+    else:
+        indices = np.broadcast_to(np.arange(n_columns), distances.shape)
+
+    selected = np.take_along_axis(distances, indices, axis=1)
+    order = np.argsort(selected, axis=1, kind='stable')
+
+    return np.take_along_axis(selected, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+def nearest_centroids(local_features, centroids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Function to find the index of the closest centroid
+    for every local feature. The distance matrix is
+    computed in chunks of rows so that peak memory stays
+    bounded at roughly chunk_size x K values.
+
+    Args:
+        local_features: Data matrix of shape (N, D).
+        centroids: Centroid matrix of shape (K, D).
+        chunk_size: Number of local features to process
+                    per distance computation.
+
+    Returns:
+        Integer array of shape (N,) with cluster assignments.
+    """
+
+    return BruteForceAssigner(chunk_size).fit(centroids).assign(local_features)
+
+
+class BruteForceAssigner(object):
+    """
+    Class implementing exact nearest-centroid assignment
+    by brute-force search over all centroids.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+        self.centroids = None
+        self.centroid_norms = None
+
+    def fit(self, centroids):
+        """Function to index a set of centroids.
+
+        Args:
+            centroids: Centroid matrix of shape (K, D).
+
+        Returns:
+            The fitted assigner.
+        """
+
+        self.centroids = centroids
+        self.centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+
+        return self
+
+    def assign(self, local_features):
+        """Function to find the index of the closest
+        centroid for every local feature.
+
+        Args:
+            local_features: Data matrix of shape (N, D).
+
+        Returns:
+            Integer array of shape (N,) with cluster assignments.
+        """
+
+        if self.centroids is None:
+            raise Exception('Please run fit method.')
+
+        local_features = np.asarray(local_features)
+        n_features = local_features.shape[0]
+        assignments = np.empty((n_features,), dtype=np.intp)
+
+        for start in range(0, n_features, self.chunk_size):
+            stop = min(start + self.chunk_size, n_features)
+            distances = squared_distances(
+                local_features[start:stop],
+                self.centroids,
+                self.centroid_norms
+            )
+            assignments[start:stop] = distances.argmin(axis=1)
+
+        return assignments
+
+    def kneighbors(self, local_features, n_neighbors):
+        """Function to find the n_neighbors closest
+        centroids of every local feature.
+
+        Args:
+            local_features: Data matrix of shape (N, D).
+            n_neighbors: Number of centroids per local feature.
+
+        Returns:
+            Tuple of (squared distances of shape (N,
+            n_neighbors), in increasing order, and centroid
+            indices of shape (N, n_neighbors)).
+        """
+
+        if self.centroids is None:
+            raise Exception('Please run fit method.')
+
+        local_features = np.asarray(local_features)
+        n_features = local_features.shape[0]
+        n_neighbors = min(n_neighbors, self.centroids.shape[0])
+        distances = np.empty((n_features, n_neighbors), dtype=self.centroids.dtype)
+        indices = np.empty((n_features, n_neighbors), dtype=np.intp)
+
+        for start in range(0, n_features, self.chunk_size):
+            stop = min(start + self.chunk_size, n_features)
+            distances[start:stop], indices[start:stop] = smallest_k(
+                squared_distances(
+                    local_features[start:stop],
+                    self.centroids,
+                    self.centroid_norms
+                ),
+                n_neighbors
+            )
+
+        return distances, indices
+
+
+class HierarchicalKMeansAssigner(object):
+    """
+    Class implementing approximate nearest-centroid
+    assignment with a two-level hierarchical K-Means
+    (vocabulary tree) over the centroids. The centroids are
+    grouped into cells by clustering them, every local
+    feature is routed to its n_probes closest cells, and
+    the exact search is then restricted to the centroids
+    in those cells.
+    """
+
+    def __init__(self, n_cells=None, n_probes=4, chunk_size=DEFAULT_CHUNK_SIZE,
+                 random_state=0):
+        self.n_cells = n_cells
+        self.n_probes = n_probes
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+
+        self.centroids = None
+        self.centroid_norms = None
+        self.cell_centers = None
+        self.cell_members = None
+
+    def fit(self, centroids):
+        """Function to build the vocabulary tree over a set
+        of centroids.
+
+        Args:
+            centroids: Centroid matrix of shape (K, D).
+
+        Returns:
+            The fitted assigner.
+        """
+
+        # Imported here as scikit-learn is only needed to build the tree
+        from sklearn.cluster import KMeans
+
+        n_centroids = centroids.shape[0]
+        n_cells = self.n_cells
+        if n_cells is None:
+            n_cells = int(np.ceil(np.sqrt(n_centroids)))
+        n_cells = max(min(n_cells, n_centroids), 1)
+
+        cell_assignments = KMeans(
+            n_clusters=n_cells,
+            n_init=1,
+            random_state=self.random_state
+        ).fit_predict(centroids)
+
+        self.centroids = centroids
+        self.centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        self.cell_members = [
+            np.flatnonzero(cell_assignments == cell)
+            for cell in range(n_cells)
+        ]
+        self.cell_centers = np.array([
+            centroids[members].mean(axis=0) for members in self.cell_members
+        ])
+
+        return self
+
+    def assign(self, local_features):
+        """Function to find the approximate index of the
+        closest centroid for every local feature.
+
+        Args:
+            local_features: Data matrix of shape (N, D).
+
+        Returns:
+            Integer array of shape (N,) with cluster assignments.
+        """
+
+        if self.centroids is None:
+            raise Exception('Please run fit method.')
+
+        local_features = np.asarray(local_features)
+        n_features = local_features.shape[0]
+        assignments = np.empty((n_features,), dtype=np.intp)
+
+        for start in range(0, n_features, self.chunk_size):
+            stop = min(start + self.chunk_size, n_features)
+            assignments[start:stop] = self._assign_chunk(local_features[start:stop])
+
+        return assignments
+
+    def kneighbors(self, local_features, n_neighbors):
+        """Function to find approximately the n_neighbors
+        closest centroids of every local feature, among the
+        centroids of its probed cells. When the probed cells
+        hold fewer than n_neighbors centroids, the missing
+        neighbours have an infinite distance and index -1.
+
+        Args:
+            local_features: Data matrix of shape (N, D).
+            n_neighbors: Number of centroids per local feature.
+
+        Returns:
+            Tuple of (squared distances of shape (N,
+            n_neighbors), in increasing order, and centroid
+            indices of shape (N, n_neighbors)).
+        """
+
+        if self.centroids is None:
+            raise Exception('Please run fit method.')
+
+        local_features = np.asarray(local_features)
+        n_features = local_features.shape[0]
+        n_neighbors = min(n_neighbors, self.centroids.shape[0])
+        distances = np.empty((n_features, n_neighbors), dtype=self.centroids.dtype)
+        indices = np.empty((n_features, n_neighbors), dtype=np.intp)
+
+        for start in range(0, n_features, self.chunk_size):
+            stop = min(start + self.chunk_size, n_features)
+            distances[start:stop], indices[start:stop] = self._kneighbors_chunk(
+                local_features[start:stop],
+                n_neighbors
+            )
+
+        return distances, indices
+
+    def _probes(self, local_features):
+        """Function to route every local feature to its
+        n_probes closest cells, grouping the (feature, cell)
+        pairs by cell.
+
+        Returns:
+            Tuple of (feature index of every pair in cell
+            order, boundaries of every cell in that order).
+        """
+
+        n_features = local_features.shape[0]
+        n_cells = len(self.cell_members)
+        n_probes = min(self.n_probes, n_cells)
+
+        cell_distances = squared_distances(local_features, self.cell_centers)
+        if n_probes < n_cells:
+            probes = np.argpartition(cell_distances, n_probes - 1, axis=1)[:, :n_probes]
+        else:
+            probes = np.broadcast_to(np.arange(n_cells), (n_features, n_cells))
+
+        # Group (feature, cell) pairs by cell
+        probed_cells = probes.ravel()
+        order = np.argsort(probed_cells, kind='stable')
+        probing_features = order // n_probes
+        boundaries = np.searchsorted(probed_cells[order], np.arange(n_cells + 1))
+
+        return probing_features, boundaries
+
+    def _kneighbors_chunk(self, local_features, n_neighbors):
+        """Function to search one chunk of local features,
+        keeping a running top-k per feature that is merged
+        with the candidates of every probed cell.
+        """
+
+        local_features = np.asarray(local_features, dtype=self.centroids.dtype)
+        n_features = local_features.shape[0]
+        probing_features, boundaries = self._probes(local_features)
+
+        best_distances = np.full((n_features, n_neighbors), np.inf, dtype=self.centroids.dtype)
+        best_indices = np.full((n_features, n_neighbors), -1, dtype=np.intp)
+
+        for cell, members in enumerate(self.cell_members):
+            rows = probing_features[boundaries[cell]:boundaries[cell + 1]]
+            if len(rows) == 0 or len(members) == 0:
+                continue
+
+            distances = squared_distances(
+                local_features[rows],
+                self.centroids[members],
+                self.centroid_norms[members]
+            )
+
+            candidates = np.concatenate([best_distances[rows], distances], axis=1)
+            candidate_indices = np.concatenate(
+                [best_indices[rows], np.broadcast_to(members, distances.shape)],
+                axis=1
+            )
+
+            best_distances[rows], selected = smallest_k(candidates, n_neighbors)
+            best_indices[rows] = np.take_along_axis(candidate_indices, selected, axis=1)
+
+        return best_distances, best_indices
+
+    def _assign_chunk(self, local_features):
+        """Function to assign one chunk of local features by
+        probing the closest cells, visiting each cell once
+        with all the local features routed to it.
+        """
+
+        local_features = np.asarray(local_features, dtype=self.centroids.dtype)
+        n_features = local_features.shape[0]
+        probing_features, boundaries = self._probes(local_features)
+
+        best_distances = np.full((n_features,), np.inf)
+        best_indices = np.zeros((n_features,), dtype=np.intp)
+
+        for cell, members in enumerate(self.cell_members):
+            rows = probing_features[boundaries[cell]:boundaries[cell + 1]]
+            if len(rows) == 0 or len(members) == 0:
+                continue
+
+            distances = squared_distances(
+                local_features[rows],
+                self.centroids[members],
+                self.centroid_norms[members]
+            )
+            closest = distances.argmin(axis=1)
+            closest_distances = distances[np.arange(len(rows)), closest]
+
+            improved = closest_distances < best_distances[rows]
+            best_distances[rows[improved]] = closest_distances[improved]
+            best_indices[rows[improved]] = members[closest[improved]]
+
+        return best_indices
+
+
+class HammingAssigner(object):
+    """
+    Class implementing exact nearest-centroid assignment
+    in Hamming space for packed binary descriptors. Both
+    assign and kneighbors compute the distances of every
+    chunk of descriptors with XOR and popcount on the packed
+    words (see hamming_distances), without unpacking bits.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+
+        self.centroids = None
+
+    def fit(self, centroids):
+        """Function to index a set of packed binary centroids.
+
+        Args:
+            centroids: uint8 centroid matrix of shape (K, B).
+
+        Returns:
+            The fitted assigner.
+        """
+
+        self.centroids = centroids
+
+        return self
+
+    def assign(self, local_features):
+        """Function to find the index of the closest
+        centroid in Hamming space for every descriptor.
+
+        Args:
+            local_features: uint8 matrix of shape (N, B).
+
+        Returns:
+            Integer array of shape (N,) with cluster assignments.
+        """
+
+        if self.centroids is None:
+            raise Exception('Please run fit method.')
+
+        n_features = local_features.shape[0]
+        assignments = np.empty((n_features,), dtype=np.intp)
+
+        for start in range(0, n_features, self.chunk_size):
+            stop = min(start + self.chunk_size, n_features)
+            assignments[start:stop] = hamming_distances(
+                local_features[start:stop],
+                self.centroids
+            ).argmin(axis=1)
+
+        return assignments
+
+    def kneighbors(self, local_features, n_neighbors):
+        """Function to find the n_neighbors closest
+        centroids in Hamming space of every descriptor.
+
+        Args:
+            local_features: uint8 matrix of shape (N, B).
+            n_neighbors: Number of centroids per descriptor.
+
+        Returns:
+            Tuple of (Hamming distances of shape (N,
+            n_neighbors), in increasing order, and centroid
+            indices of shape (N, n_neighbors)).
+        """
+
+        if self.centroids is None:
+            raise Exception('Please run fit method.')
+
+        n_features = local_features.shape[0]
+        n_neighbors = min(n_neighbors, self.centroids.shape[0])
+        distances = np.empty((n_features, n_neighbors), dtype=np.float64)
+        indices = np.empty((n_features, n_neighbors), dtype=np.intp)
+
+        for start in range(0, n_features, self.chunk_size):
+            stop = min(start + self.chunk_size, n_features)
+            distances[start:stop], indices[start:stop] = smallest_k(
+                hamming_distances(local_features[start:stop], self.centroids),
+                n_neighbors
+            )
+
+        return distances, indices
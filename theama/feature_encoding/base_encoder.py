@@ -0,0 +1,682 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- Scikit-Learn: https://github.com/scikit-learn/scikit-learn/blob/master/COPYING
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing the base class shared by the
+codebook-based feature encoders.
+"""
+
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+from .aggregation import concatenate_segments, segment_ids_from_offsets
+from .assignment import BruteForceAssigner, HammingAssigner, DEFAULT_CHUNK_SIZE
+from .binary import k_majority
+from .codebook_io import load_codebook, save_codebook
+from .normalization import EMPTY_POLICIES, normalize, parse_normalization
+from .parallel import encode_in_parallel
+from .quantization import QUANTIZED_DTYPES, quantize
+from .spatial_pyramid import DEFAULT_GRIDS, parse_grids, positions_to_array, pyramid_region_ids
+from .streaming import is_in_memory, iterate_chunks, rebatch, reservoir_sample
+from ..utils.parallel import effective_n_jobs
+
+DEFAULT_BATCH_SIZE = 1024
+
+METRICS = ('euclidean', 'hamming')
+
+ASSIGNMENTS = ('hard', 'soft', 'multiple')
+
+DTYPES = ('float32', 'float64')
+
+
+class BaseEncoder(object):
+    """
+    Base class for feature encoders built on a codebook
+    of visual words learned with K-Means. With the hamming
+    metric, local features are packed binary descriptors
+    (e.g. ORB or BRISK) and the codebook is learned with
+    k-majority clustering in Hamming space instead.
+
+    By default every local feature is assigned to its
+    nearest visual word. With assignment='multiple', it is
+    assigned with equal weights to its n_neighbors nearest
+    visual words, and with assignment='soft' (kernel
+    codebook), to its n_neighbors nearest visual words with
+    weights proportional to exp(-d^2 / (2 * sigma^2)),
+    summing to one. When sigma is None, it is set to half
+    the median distance between a visual word and its
+    closest other visual word. Soft assignment requires
+    the euclidean metric.
+
+    Feature vectors are normalised in place by the steps of
+    normalization, applied in order: 'intra' L2-normalises
+    the block of every visual word, 'power' takes the signed
+    square root and 'l2' L2-normalises the whole vector.
+    Steps are given as a sequence or joined by '+', such as
+    'intra+power+l2'. Vectors with a zero norm are left as
+    zeros. The feature vector of an image without local
+    features is zero, NaN or raises an exception when empty
+    is 'zeros', 'nan' or 'raise'.
+
+    The codebook, distance computations and feature vectors
+    use dtype, float32 halving memory traffic and storage
+    over float64. A codebook assigned directly is converted
+    to dtype on first use. Feature vectors can further be
+    stored as float16, or as int8 codes of the normalised
+    values scaled by 127 when the pipeline includes 'l2' or
+    'intra', with output_dtype. They are converted back with
+    theama.feature_encoding.quantization.dequantize.
+    """
+
+    # Constructor parameters stored alongside a saved codebook
+    _persisted_parameters = ('metric', 'assignment', 'n_neighbors', 'sigma',
+                             'normalization', 'empty', 'dtype', 'output_dtype')
+
+    # Number of intra-normalisation blocks per visual word
+    _blocks_per_word = 1
+
+    def __init__(self, codebook_size, chunk_size=DEFAULT_CHUNK_SIZE,
+                 n_jobs=1, backend='thread', assigner=None,
+                 metric='euclidean', assignment='hard', n_neighbors=5,
+                 sigma=None, normalization='l2', empty='zeros', dtype='float64',
+                 output_dtype=None):
+        if metric not in METRICS:
+            raise Exception('Metric must be one of: ' + ', '.join(METRICS) + '.')
+
+        if assignment not in ASSIGNMENTS:
+            raise Exception('Assignment must be one of: ' + ', '.join(ASSIGNMENTS) + '.')
+
+        if assignment == 'soft' and metric != 'euclidean':
+            raise Exception('Soft assignment requires the euclidean metric.')
+
+        if empty not in EMPTY_POLICIES:
+            raise Exception('Empty policy must be one of: ' + ', '.join(EMPTY_POLICIES) + '.')
+
+        dtype = np.dtype(dtype).name
+        if dtype not in DTYPES:
+            raise Exception('Data type must be one of: ' + ', '.join(DTYPES) + '.')
+
+        if output_dtype is not None:
+            output_dtype = np.dtype(output_dtype).name
+            if output_dtype not in QUANTIZED_DTYPES:
+                raise Exception('Output data type must be one of: ' + ', '.join(QUANTIZED_DTYPES) + '.')
+
+        normalization = parse_normalization(normalization)
+        if output_dtype == 'int8' and not {'l2', 'intra'} & set(normalization.split('+')):
+            raise Exception('int8 output requires l2 or intra normalization.')
+
+        if output_dtype == 'int8' and empty == 'nan':
+            raise Exception('int8 output does not support the nan empty policy.')
+
+        self.codebook_size = codebook_size
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.metric = metric
+        self.assignment = assignment
+        self.n_neighbors = n_neighbors
+        self.sigma = sigma
+        self.normalization = normalization
+        self.empty = empty
+        self.dtype = dtype
+        self.output_dtype = output_dtype
+
+        if assigner is None:
+            if metric == 'hamming':
+                assigner = HammingAssigner(chunk_size)
+            else:
+                assigner = BruteForceAssigner(chunk_size)
+        self.assigner = assigner
+
+        self.codebook = None
+        self._estimated_sigma = None
+
+    def learn_codebook(self, local_features, mini_batch_kmeans=True,
+                       max_samples=None, max_memory=None, batch_size=None,
+                       random_state=None):
+        """Function to learn the codebook by performing
+        K-Means clustering. The mini-batch K-Means algorithm
+        can be optionally chosen for speed improvement, but
+        at the cost of less accurate centroid estimates.
+
+        Local features that do not fit in memory can be
+        given as a memory-mapped array or as an iterable of
+        data matrices. They are then either subsampled in
+        one pass with reservoir sampling (when max_samples
+        or max_memory is given), or streamed through
+        mini-batch K-Means incrementally. With the hamming
+        metric, k-majority clustering is used and the
+        mini_batch_kmeans and batch_size options are ignored.
+
+        Args:
+            local_features: The data matrix to use to learn the
+                            codebook, a memory-mapped array, or
+                            an iterable of data matrices.
+            mini_batch_kmeans: Boolean flag indicating
+                               whether to use the
+                               mini-batch K-Means
+                               algorithm.
+            max_samples: Optional maximum number of local
+                         features to sample for clustering.
+            max_memory: Optional memory budget, in bytes, for
+                        the sampled local features.
+            batch_size: Mini-batch size used by mini-batch
+                        K-Means.
+            random_state: Optional seed for sampling and
+                          clustering.
+        """
+
+        if max_samples is not None or max_memory is not None:
+            local_features = reservoir_sample(
+                iterate_chunks(local_features),
+                max_samples,
+                max_memory,
+                random_state
+            )
+        elif not is_in_memory(local_features) and self.metric == 'hamming':
+            raise Exception('Hamming codebooks require in-memory data. Please set '
+                            'max_samples or max_memory.')
+        elif not is_in_memory(local_features):
+            if not mini_batch_kmeans:
+                raise Exception('K-Means requires in-memory data. Please use mini-batch '
+                                'K-Means or set max_samples or max_memory.')
+
+            self.codebook = self._learn_codebook_incrementally(
+                local_features,
+                batch_size,
+                random_state
+            )
+            return
+
+        if self.metric == 'hamming':
+            self.codebook = k_majority(
+                local_features,
+                self.codebook_size,
+                random_state=random_state
+            )
+        elif mini_batch_kmeans:
+            self.codebook = \
+                MiniBatchKMeans(
+                    n_clusters=self.codebook_size,
+                    batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                    random_state=random_state
+                ).fit(local_features).cluster_centers_.astype(self.dtype, copy=False)
+        else:
+            self.codebook = \
+                KMeans(
+                    n_clusters=self.codebook_size,
+                    random_state=random_state
+                ).fit(local_features).cluster_centers_.astype(self.dtype, copy=False)
+
+    def _learn_codebook_incrementally(self, local_features, batch_size, random_state):
+        """Function to learn the codebook with mini-batch
+        K-Means in a single pass over a stream of local
+        features, using partial_fit on fixed-size batches.
+
+        Args:
+            local_features: Memory-mapped array, or iterable of
+                            data matrices.
+            batch_size: Mini-batch size.
+            random_state: Optional seed for clustering.
+
+        Returns:
+            Codebook of shape (K, D).
+        """
+
+        # The first batch must contain at least one sample per cluster
+        batch_size = max(batch_size or DEFAULT_BATCH_SIZE, self.codebook_size)
+
+        kmeans = MiniBatchKMeans(
+            n_clusters=self.codebook_size,
+            batch_size=batch_size,
+            random_state=random_state
+        )
+
+        fitted = False
+        for batch in rebatch(iterate_chunks(local_features), batch_size):
+            if not fitted and len(batch) < self.codebook_size:
+                break
+
+            kmeans.partial_fit(batch)
+            fitted = True
+
+        if not fitted:
+            raise Exception('Not enough local features to learn the codebook.')
+
+        return kmeans.cluster_centers_.astype(self.dtype, copy=False)
+
+    def save(self, path):
+        """Function to save the learned codebook, along
+        with the encoder metadata, to a versioned binary
+        file that can later be memory-mapped.
+
+        Args:
+            path: Output file path.
+        """
+
+        if self.codebook is None:
+            raise Exception('Please run learn_codebook method.')
+
+        save_codebook(path, self.codebook, self._metadata())
+
+    @classmethod
+    def load(cls, path, mmap_mode='r', **kwargs):
+        """Function to create an encoder from a codebook
+        file written by save. By default the codebook is
+        memory-mapped read-only, so that worker processes
+        loading the same file share one copy of it.
+
+        Args:
+            path: Codebook file path.
+            mmap_mode: Memory-map mode passed to np.memmap, or
+                       None to read the codebook into memory.
+            **kwargs: Runtime options, such as n_jobs, passed to
+                      the encoder constructor.
+
+        Returns:
+            Encoder instance with the codebook loaded.
+        """
+
+        codebook, metadata = load_codebook(path, mmap_mode)
+
+        if metadata['encoder'] != cls.__name__:
+            raise Exception('Codebook file was saved by a ' + metadata['encoder'] + ' encoder.')
+
+        for parameter in cls._persisted_parameters:
+            if parameter in metadata:
+                kwargs.setdefault(parameter, metadata[parameter])
+
+        encoder = cls(metadata['codebook_size'], **kwargs)
+        encoder.codebook = codebook
+
+        return encoder
+
+    def _metadata(self):
+        """Function to describe the encoder configuration
+        that is stored alongside the codebook.
+
+        Returns:
+            JSON-serialisable dictionary.
+        """
+
+        metadata = {'encoder': type(self).__name__}
+        for parameter in self._persisted_parameters:
+            metadata[parameter] = getattr(self, parameter)
+
+        return metadata
+
+    def compute_feature_vector(self, local_features):
+        """Function to compute the feature vector for
+        the local features of a single image.
+
+        Args:
+            local_features: The data matrix to use to compute the
+                            feature vector.
+
+        Returns:
+            Feature vector.
+        """
+
+        return self.compute_feature_vectors([local_features])[0]
+
+    def compute_feature_vectors(self, local_features, offsets=None):
+        """Function to compute the feature vectors for
+        a batch of images at once. Cluster assignment is
+        computed in one pass over the concatenated local
+        features, and the results are then reduced per
+        image by segment. When n_jobs is not 1, the batch
+        is split into contiguous groups of images that are
+        encoded on a thread or process pool, and the output
+        is returned in input order.
+
+        Args:
+            local_features: Either a list of data matrices, one
+                            per image, or a single concatenated
+                            data matrix when offsets is given.
+            offsets: Optional integer array of length N + 1 such
+                     that the features of image i are the rows
+                     offsets[i]:offsets[i + 1] of local_features.
+
+        Returns:
+            Dense matrix of shape (N, feature_dimension) with
+            one feature vector per image.
+        """
+
+        if self.codebook is None:
+            raise Exception('Please run learn_codebook method.')
+
+        local_features, offsets = concatenate_segments(
+            local_features,
+            offsets,
+            self.codebook.shape[1],
+            self.codebook.dtype
+        )
+
+        if self.metric == 'hamming' and local_features.dtype != np.uint8:
+            raise Exception('Binary descriptors must be packed uint8 arrays.')
+
+        if self.metric == 'euclidean':
+            local_features = local_features.astype(self.dtype, copy=False)
+
+        self._fitted_assigner()
+
+        n_jobs = effective_n_jobs(self.n_jobs)
+        if n_jobs > 1 and len(offsets) > 2:
+            return encode_in_parallel(
+                self,
+                local_features,
+                offsets,
+                n_jobs,
+                self.backend
+            )
+
+        return self._encode_segments(local_features, offsets)
+
+    def compute_pyramid_feature_vector(self, local_features, positions, image_shape=None,
+                                       grids=DEFAULT_GRIDS):
+        """Function to compute the spatial pyramid feature
+        vector for the local features of a single image.
+
+        Args:
+            local_features: The data matrix to use to compute the
+                            feature vector.
+            positions: Positions of the local features, see
+                       compute_pyramid_feature_vectors.
+            image_shape: Optional (height, width) of the image.
+            grids: Sequence of (rows, columns) tuples, one per
+                   pyramid level.
+
+        Returns:
+            Feature vector.
+        """
+
+        return self.compute_pyramid_feature_vectors(
+            [local_features],
+            [positions],
+            image_shapes=image_shape,
+            grids=grids
+        )[0]
+
+    def compute_pyramid_feature_vectors(self, local_features, positions, offsets=None,
+                                        image_shapes=None, grids=DEFAULT_GRIDS):
+        """Function to compute spatial pyramid feature
+        vectors for a batch of images at once. Every image is
+        divided into a grid of regions at every pyramid level,
+        e.g. the whole image, 2 x 2 quadrants and 3
+        horizontal stripes, and local features are pooled
+        per region. Cluster assignment is computed once per
+        local feature, and all regions of all images are
+        reduced together as segments. The feature vector of
+        an image is the concatenation of its region vectors,
+        level by level, normalised as a whole.
+
+        Args:
+            local_features: Either a list of data matrices, one
+                            per image, or a single concatenated
+                            data matrix when offsets is given.
+            positions: Positions of the local features, in the
+                       same layout as local_features. Each is
+                       an array whose first two columns are x
+                       and y, such as the positions returned by
+                       MotionDescriptors, or a structured array
+                       with 'x' and 'y' fields, such as the
+                       output of keypoints_to_array.
+            offsets: Optional integer array of length N + 1 such
+                     that the features of image i are the rows
+                     offsets[i]:offsets[i + 1] of local_features.
+            image_shapes: Optional (height, width) of every
+                          image, of shape (N, 2), or a single
+                          shape shared by all images. When None,
+                          the bounding box of the positions of
+                          every image is divided instead.
+            grids: Sequence of (rows, columns) tuples, one per
+                   pyramid level.
+
+        Returns:
+            Matrix of shape (N, n_regions * feature_dimension)
+            with one feature vector per image.
+        """
+
+        if self.codebook is None:
+            raise Exception('Please run learn_codebook method.')
+
+        grids = parse_grids(grids)
+
+        local_features, offsets = concatenate_segments(
+            local_features,
+            offsets,
+            self.codebook.shape[1],
+            self.codebook.dtype
+        )
+
+        if isinstance(positions, (list, tuple)):
+            positions = np.concatenate(
+                [positions_to_array(points) for points in positions if len(points)] or [np.zeros((0, 2))]
+            )
+        else:
+            positions = positions_to_array(positions)
+
+        if len(positions) != len(local_features):
+            raise Exception('There must be one position per local feature.')
+
+        if image_shapes is not None:
+            image_shapes = np.broadcast_to(
+                np.asarray(image_shapes, dtype=np.float64)[..., :2],
+                (len(offsets) - 1, 2)
+            )
+
+        if self.metric == 'hamming' and local_features.dtype != np.uint8:
+            raise Exception('Binary descriptors must be packed uint8 arrays.')
+
+        if self.metric == 'euclidean':
+            local_features = local_features.astype(self.dtype, copy=False)
+
+        self._fitted_assigner()
+
+        n_jobs = effective_n_jobs(self.n_jobs)
+        if n_jobs > 1 and len(offsets) > 2:
+            return encode_in_parallel(
+                self,
+                local_features,
+                offsets,
+                n_jobs,
+                self.backend,
+                (positions, image_shapes, grids)
+            )
+
+        return self._encode_segments(local_features, offsets, (positions, image_shapes, grids))
+
+    def _encode_segments(self, local_features, offsets, pyramid=None):
+        """Function to encode a concatenated batch of
+        segments in the calling thread.
+
+        Args:
+            local_features: Concatenated data matrix of shape (N, D).
+            offsets: Integer array of length n_segments + 1.
+            pyramid: Optional tuple of (positions of shape
+                     (N, 2), image shapes of shape
+                     (n_segments, 2) or None, grids) to pool
+                     over spatial pyramid regions.
+
+        Returns:
+            Matrix of shape (n_segments, feature_dimension), or
+            (n_segments, n_regions * feature_dimension) with a
+            spatial pyramid.
+        """
+
+        empty = self._empty_segments(offsets)
+        assigner = self._fitted_assigner()
+
+        if self.assignment == 'hard':
+            assignments = assigner.assign(local_features)
+            weights = None
+        else:
+            distances, assignments = assigner.kneighbors(local_features, self.n_neighbors)
+            weights = self._assignment_weights(distances)
+
+            # Approximate assigners may find fewer neighbours
+            missing = assignments < 0
+            if missing.any():
+                assignments = np.where(missing, 0, assignments)
+                weights[missing] = 0
+
+        n_segments = len(offsets) - 1
+        segment_ids = segment_ids_from_offsets(offsets)
+
+        n_regions = 1
+        if pyramid is not None:
+            positions, image_shapes, grids = pyramid
+            segment_ids, n_regions = pyramid_region_ids(
+                positions,
+                segment_ids,
+                n_segments,
+                grids,
+                image_shapes
+            )
+
+        feature_vectors = self._aggregate(
+            local_features,
+            assignments,
+            segment_ids,
+            n_segments * n_regions,
+            weights
+        )
+
+        if n_regions > 1:
+            feature_vectors = feature_vectors.reshape(n_segments, -1)
+
+        return self._normalize(feature_vectors, empty, n_regions)
+
+    def _empty_segments(self, offsets):
+        """Function to find the segments without local
+        features, raising an exception if the empty policy
+        is 'raise'.
+
+        Args:
+            offsets: Integer array of length n_segments + 1.
+
+        Returns:
+            Boolean array of shape (n_segments,).
+        """
+
+        empty = np.diff(offsets) == 0
+        if self.empty == 'raise' and empty.any():
+            raise Exception('Cannot encode an image without local features.')
+
+        return empty
+
+    def _assignment_weights(self, distances):
+        """Function to compute the weights of multiple or
+        soft assignments from the distances to the nearest
+        visual words.
+
+        Args:
+            distances: Distances of shape (N, k), in increasing
+                       order, squared for the euclidean metric.
+
+        Returns:
+            Weights of shape (N, k).
+        """
+
+        if self.assignment == 'multiple':
+            return np.isfinite(distances).astype(distances.dtype)
+
+        # Shifting by the nearest distance keeps the exponentials in range
+        weights = distances - distances[:, :1]
+        weights *= -0.5 / self._kernel_sigma() ** 2
+        np.exp(weights, out=weights)
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        return weights
+
+    def _kernel_sigma(self):
+        """Function to return the soft assignment kernel
+        width, estimating it from the codebook when sigma
+        is None.
+
+        Returns:
+            Kernel width.
+        """
+
+        if self.sigma is not None:
+            return self.sigma
+
+        if self._estimated_sigma is None or self._estimated_sigma[0] is not self.codebook:
+            distances, _ = BruteForceAssigner(self.chunk_size).fit(self.codebook).kneighbors(
+                self.codebook, 2
+            )
+            sigma = 0.5 * np.sqrt(np.median(distances[:, -1]))
+            self._estimated_sigma = (self.codebook, max(sigma, np.finfo(np.float64).eps))
+
+        return self._estimated_sigma[1]
+
+    def _normalize(self, feature_vectors, empty, n_regions=1):
+        """Function to apply the normalisation pipeline in
+        place to a batch of feature vectors, and the empty
+        policy to the vectors of empty segments, and to
+        convert them to the output data type.
+
+        Args:
+            feature_vectors: C-contiguous matrix of shape
+                             (n_segments, feature_dimension).
+            empty: Boolean array of shape (n_segments,).
+            n_regions: Number of spatial pyramid regions
+                       concatenated in every feature vector.
+
+        Returns:
+            Normalised feature vectors.
+        """
+
+        normalize(
+            feature_vectors,
+            self.normalization,
+            self.codebook_size * self._blocks_per_word * n_regions
+        )
+
+        if self.empty == 'nan':
+            feature_vectors[empty] = np.nan
+
+        return quantize(feature_vectors, self.output_dtype)
+
+    def _fitted_assigner(self):
+        """Function to return the assigner, (re)indexing
+        the codebook first if it has changed since the
+        assigner was last fitted.
+
+        Returns:
+            Assigner fitted to the current codebook.
+        """
+
+        if self.metric == 'euclidean' and self.codebook.dtype != self.dtype:
+            self.codebook = self.codebook.astype(self.dtype)
+
+        if self.assigner.centroids is not self.codebook:
+            self.assigner.fit(self.codebook)
+
+        return self.assigner
+
+    def _aggregate(self, local_features, assignments, segment_ids, n_segments, weights=None):
+        """Function to pool assigned local features into one
+        unnormalised feature vector per segment. Must be
+        implemented by subclasses.
+
+        Args:
+            local_features: Concatenated data matrix of shape (N, D).
+            assignments: Cluster assignments of shape (N,), or
+                         (N, k) for multiple or soft assignment.
+            segment_ids: Segment index of shape (N,), or (N, L)
+                         for features pooled in L segments.
+            n_segments: Number of segments.
+            weights: Assignment weights of shape (N, k), or None
+                     for hard assignment.
+
+        Returns:
+            Matrix of shape (n_segments, feature_dimension).
+        """
+
+        raise NotImplementedError
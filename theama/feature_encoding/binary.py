@@ -0,0 +1,210 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+- SciPy: https://www.scipy.org/scipylib/license.html
+
+Module containing Hamming-space routines for packed binary
+descriptors, such as those produced by ORB and BRISK.
+Distances are computed with XOR and popcount directly on
+the packed words, a block of rows at a time into small
+reused buffers, so descriptors are never unpacked for the
+search. Codebooks are learned with k-majority clustering,
+whose bit votes are accumulated chunk by chunk.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Number of descriptors processed per distance computation
+BINARY_CHUNK_SIZE = 2048
+
+# Number of descriptors per block of the XOR and popcount
+# buffers, small enough for the buffers to stay in cache
+_BLOCK_ROWS = 32
+
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Shifts unpacking a byte most significant bit first, as np.unpackbits
+_BIT_SHIFTS = np.arange(7, -1, -1, dtype=np.uint8)
+
+
+def _packed_words(descriptors):
+    """Function to view packed binary descriptors as the
+    widest unsigned words that evenly divide the row.
+    """
+
+    descriptors = np.ascontiguousarray(descriptors, dtype=np.uint8)
+    n_bytes = descriptors.shape[1]
+
+    if hasattr(np, 'bitwise_count'):
+        for dtype in (np.uint64, np.uint32, np.uint16):
+            if n_bytes % np.dtype(dtype).itemsize == 0:
+                return descriptors.view(dtype)
+
+    return descriptors
+
+
+def _popcount(words, out):
+    """Function to count the set bits of every word into
+    the uint8 array out.
+    """
+
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words, out=out)
+
+    return np.take(_POPCOUNT_TABLE, words, out=out)
+
+
+def hamming_distances(descriptors, centroids):
+    """Function to compute the Hamming distance between
+    every packed binary descriptor and every packed binary
+    centroid, with XOR and popcount on the packed words.
+    Rows are processed in blocks of _BLOCK_ROWS, and the
+    distances of a block are accumulated one word at a time
+    in reused buffers, so that intermediates stay small
+    and in cache.
+
+    Args:
+        descriptors: uint8 matrix of shape (N, B).
+        centroids: uint8 matrix of shape (K, B).
+
+    Returns:
+        Integer distance matrix of shape (N, K).
+    """
+
+    descriptor_words = _packed_words(descriptors)
+    # Word-major centroids, so that every XOR reads a contiguous row
+    centroid_words = np.ascontiguousarray(_packed_words(centroids).T)
+    n_descriptors, n_words = descriptor_words.shape
+    n_centroids = centroid_words.shape[1]
+
+    distances = np.empty((n_descriptors, n_centroids), dtype=np.int32)
+    xor = np.empty((min(_BLOCK_ROWS, n_descriptors), n_centroids), dtype=descriptor_words.dtype)
+    counts = np.empty(xor.shape, dtype=np.uint8)
+
+    for start in range(0, n_descriptors, _BLOCK_ROWS):
+        stop = min(start + _BLOCK_ROWS, n_descriptors)
+        block = distances[start:stop]
+        block_xor = xor[:stop - start]
+        block_counts = counts[:stop - start]
+
+        block[...] = 0
+        for word in range(n_words):
+            np.bitwise_xor(
+                descriptor_words[start:stop, word, None],
+                centroid_words[word],
+                out=block_xor
+            )
+            block += _popcount(block_xor, block_counts)
+
+    return distances
+
+
+def nearest_binary_centroids(descriptors, centroids, chunk_size=BINARY_CHUNK_SIZE):
+    """Function to find the index of the closest centroid
+    in Hamming space for every packed binary descriptor,
+    from chunked XOR and popcount distances.
+
+    Args:
+        descriptors: uint8 matrix of shape (N, B).
+        centroids: uint8 matrix of shape (K, B).
+        chunk_size: Number of descriptors per distance
+                    computation.
+
+    Returns:
+        Integer array of shape (N,) with cluster assignments.
+    """
+
+    n_descriptors = descriptors.shape[0]
+    assignments = np.empty((n_descriptors,), dtype=np.intp)
+
+    for start in range(0, n_descriptors, chunk_size):
+        stop = min(start + chunk_size, n_descriptors)
+        assignments[start:stop] = hamming_distances(descriptors[start:stop], centroids).argmin(axis=1)
+
+    return assignments
+
+
+def _bit_counts(descriptors, assignments, n_clusters, chunk_size=BINARY_CHUNK_SIZE):
+    """Function to count, for every cluster, the number of
+    assigned descriptors with each bit set. Descriptors are
+    unpacked one chunk at a time into a reused uint8 buffer,
+    and counts are accumulated as integers.
+
+    Returns:
+        Integer array of shape (K, 8 * B), with bits in
+        np.packbits order.
+    """
+
+    n_descriptors, n_bytes = descriptors.shape
+    bit_counts = np.zeros((n_clusters, 8 * n_bytes), dtype=np.int64)
+    bits = np.empty((min(chunk_size, n_descriptors), n_bytes, 8), dtype=np.uint8)
+
+    for start in range(0, n_descriptors, chunk_size):
+        stop = min(start + chunk_size, n_descriptors)
+        chunk_bits = bits[:stop - start]
+        np.right_shift(descriptors[start:stop, :, None], _BIT_SHIFTS, out=chunk_bits)
+        np.bitwise_and(chunk_bits, 1, out=chunk_bits)
+
+        # Per-cluster sums as a one-hot sparse product
+        membership = csr_matrix(
+            (np.ones(stop - start, dtype=np.int32), (assignments[start:stop], np.arange(stop - start))),
+            shape=(n_clusters, stop - start)
+        )
+        bit_counts += membership.dot(chunk_bits.reshape(stop - start, -1))
+
+    return bit_counts
+
+
+def k_majority(descriptors, n_clusters, max_iter=20, random_state=None):
+    """Function to cluster packed binary descriptors with
+    the k-majority algorithm: descriptors are assigned to
+    their closest centroid in Hamming space, and every
+    centroid bit is set to the majority vote of the bits of
+    its assigned descriptors.
+
+    Args:
+        descriptors: uint8 matrix of shape (N, B).
+        n_clusters: Number of clusters K.
+        max_iter: Maximum number of iterations.
+        random_state: Seed or np.random.RandomState.
+
+    Returns:
+        Packed uint8 centroid matrix of shape (K, B).
+    """
+
+    descriptors = np.ascontiguousarray(descriptors)
+    if descriptors.dtype != np.uint8:
+        raise Exception('Binary descriptors must be packed uint8 arrays.')
+
+    n_descriptors = descriptors.shape[0]
+    if n_descriptors < n_clusters:
+        raise Exception('Not enough local features to learn the codebook.')
+
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+
+    centroids = descriptors[random_state.choice(n_descriptors, n_clusters, replace=False)].copy()
+    assignments = None
+
+    for _ in range(max_iter):
+        new_assignments = nearest_binary_centroids(descriptors, centroids)
+        if assignments is not None and np.array_equal(new_assignments, assignments):
+            break
+        assignments = new_assignments
+
+        bit_counts = _bit_counts(descriptors, assignments, n_clusters)
+        cluster_sizes = np.bincount(assignments, minlength=n_clusters)
+
+        centroids = np.packbits(bit_counts * 2 > cluster_sizes[:, None], axis=1)
+
+        # Re-seed empty clusters with random descriptors
+        empty = np.flatnonzero(cluster_sizes == 0)
+        if len(empty):
+            centroids[empty] = descriptors[random_state.choice(n_descriptors, len(empty), replace=False)]
+
+    return centroids
@@ -6,72 +6,98 @@ License: Apache 2.0
 Redistribution Licensing:
 - Scikit-Learn: https://github.com/scikit-learn/scikit-learn/blob/master/COPYING
 - NumPy: https://www.numpy.org/license.html#
+- SciPy: https://www.scipy.org/scipylib/license.html
 
 Module containing a Python implementation of the BOW
 (bag-of-words) feature encoding algorithm.
 """
 
 import numpy as np
-from sklearn.cluster import MiniBatchKMeans, KMeans
+from scipy.sparse import csr_matrix
 
+from .aggregation import broadcast_segments, cluster_counts
+from .base_encoder import BaseEncoder
+from .normalization import normalize_sparse
+from .quantization import quantize
 
-class BOW(object):
+
+class BOW(BaseEncoder):
     """
     Class for the implementation of the
-    BoW feature encoding algorithm.
+    BoW feature encoding algorithm. With sparse=True,
+    histograms are returned as rows of a SciPy CSR matrix,
+    which suits large vocabularies where every image only
+    uses a small fraction of the visual words. SciPy has
+    no float16 sparse support, so sparse histograms can be
+    stored as int8 but not as float16.
     """
 
-    def __init__(self, codebook_size):
-        self.codebook_size = codebook_size
+    def __init__(self, codebook_size, sparse=False, **kwargs):
+        super().__init__(codebook_size, **kwargs)
 
-        self.codebook = None
+        if sparse and self.empty == 'nan':
+            raise Exception('Sparse histograms do not support the nan empty policy.')
 
-    def learn_codebook(self, local_features, mini_batch_kmeans=True):
-        """Function to learn the codebook for BoW by
-        performing K-Means clustering. The mini-batch
-        K-Means algorithm can be optionally chosen for
-        speed improvement, but at the cost of less
-        accurate centroid estimates.
+        if sparse and self.output_dtype == 'float16':
+            raise Exception('Sparse histograms do not support float16 output.')
 
-        Args:
-            local_features: The data matrix to use to learn the
-                            codebook.
-            mini_batch_kmeans: Boolean flag indicating
-                               whether to use the
-                               mini-batch K-Means
-                               algorithm.
-        """
+        self.sparse = sparse
 
-        if mini_batch_kmeans:
-            self.codebook = \
-                MiniBatchKMeans(
-                    n_clusters=self.codebook_size
-                ).fit(local_features)
-        else:
-            self.codebook = \
-                KMeans(
-                    n_clusters=self.codebook_size
-                ).fit(local_features)
-
-    def compute_feature_vector(self, local_features):
-        """Function to compute the bag-of-words feature
-        vector for a set of local feature vectors.
+    def _aggregate(self, local_features, assignments, segment_ids, n_segments, weights=None):
+        """Function to build the bag-of-words histogram
+        of every segment with a single bincount, or as a
+        CSR matrix whose duplicate entries are summed.
+        With multiple or soft assignment, every local
+        feature votes for k visual words with its
+        assignment weights.
 
         Args:
-            local_features: The data matrix to use to compute the
-                            VLAD descriptor.
+            local_features: Concatenated data matrix of shape (N, D).
+            assignments: Cluster assignments of shape (N,), or
+                         (N, k) for multiple or soft assignment.
+            segment_ids: Segment index of shape (N,), or (N, L)
+                         for features pooled in L segments.
+            n_segments: Number of segments.
+            weights: Assignment weights of shape (N, k), or None.
 
         Returns:
-            BoW descriptor.
+            Histograms of shape (n_segments, K).
         """
 
-        if self.codebook is None:
-            raise Exception('Please run learn_codebook method.')
+        if self.sparse:
+            assignments, segment_ids, weights = broadcast_segments(assignments, segment_ids, weights)
+            return csr_matrix(
+                (
+                    np.ones(assignments.size, dtype=self.dtype) if weights is None else weights.ravel(),
+                    (segment_ids.ravel(), assignments.ravel())
+                ),
+                shape=(n_segments, self.codebook_size)
+            )
+
+        return cluster_counts(
+            assignments,
+            self.codebook_size,
+            segment_ids,
+            n_segments,
+            weights
+        ).astype(self.dtype)
+
+    def _normalize(self, feature_vectors, empty, n_regions=1):
+        """Function to normalise every histogram in place and
+        convert it to the output data type, operating on the
+        stored values only in sparse mode.
 
-        cluster_assignments = self.codebook.predict(local_features)
+        Args:
+            feature_vectors: Histograms of shape (n_segments, K).
+            empty: Boolean array of shape (n_segments,).
+            n_regions: Number of spatial pyramid regions
+                       concatenated in every histogram.
+
+        Returns:
+            Normalised histograms.
+        """
 
-        bow_descriptor = np.zeros((self.codebook_size,))
-        for cluster_assignment in cluster_assignments:
-            bow_descriptor[cluster_assignment] += 1.0
+        if not self.sparse:
+            return super()._normalize(feature_vectors, empty, n_regions)
 
-        return bow_descriptor / np.linalg.norm(bow_descriptor)
+        return quantize(normalize_sparse(feature_vectors.tocsr(), self.normalization), self.output_dtype)
@@ -0,0 +1,131 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module for reading and writing codebooks in a compact,
+versioned binary format that can be memory-mapped.
+
+File layout (all integers little-endian):
+- 8 bytes: magic string b'THEAMACB'
+- 4 bytes: uint32 format version
+- 4 bytes: uint32 length of the JSON metadata header
+- JSON metadata header, UTF-8 encoded
+- zero padding up to a multiple of 64 bytes
+- C-ordered codebook data
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'THEAMACB'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<8sII')
+
+
+def save_codebook(path, codebook, metadata):
+    """Function to write a codebook and its metadata to
+    disk.
+
+    Args:
+        path: Output file path.
+        codebook: Codebook matrix of shape (K, D).
+        metadata: JSON-serialisable dictionary describing
+                  the encoder the codebook belongs to.
+    """
+
+    codebook = np.ascontiguousarray(codebook)
+    dtype = codebook.dtype.newbyteorder('<')
+
+    header = dict(metadata)
+    header.update({
+        'codebook_size': int(codebook.shape[0]),
+        'dimension': int(codebook.shape[1]),
+        'dtype': dtype.str
+    })
+    header = json.dumps(header, sort_keys=True).encode('utf-8')
+
+    data_offset = _PREAMBLE.size + len(header)
+    padding = -data_offset % ALIGNMENT
+
+    with open(path, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(b'\0' * padding)
+        f.write(codebook.astype(dtype, copy=False).tobytes())
+
+
+def read_metadata(path):
+    """Function to read the metadata header of a codebook
+    file without loading the codebook itself.
+
+    Args:
+        path: Codebook file path.
+
+    Returns:
+        Tuple of (metadata dictionary, byte offset of the
+        codebook data).
+    """
+
+    with open(path, 'rb') as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            raise Exception('Not a theama codebook file.')
+
+        magic, version, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise Exception('Not a theama codebook file.')
+
+        if version > FORMAT_VERSION:
+            raise Exception('Unsupported codebook format version.')
+
+        metadata = json.loads(f.read(header_length).decode('utf-8'))
+
+    data_offset = _PREAMBLE.size + header_length
+    data_offset += -data_offset % ALIGNMENT
+
+    return metadata, data_offset
+
+
+def load_codebook(path, mmap_mode='r'):
+    """Function to load a codebook and its metadata from
+    disk. By default the codebook is memory-mapped
+    read-only, so that many processes loading the same
+    file share a single copy in the page cache.
+
+    Args:
+        path: Codebook file path.
+        mmap_mode: Memory-map mode passed to np.memmap, or
+                   None to read the codebook into memory.
+
+    Returns:
+        Tuple of (codebook, metadata dictionary).
+    """
+
+    metadata, data_offset = read_metadata(path)
+
+    dtype = np.dtype(metadata['dtype'])
+    shape = (metadata['codebook_size'], metadata['dimension'])
+
+    if mmap_mode is None:
+        with open(path, 'rb') as f:
+            f.seek(data_offset)
+            codebook = np.fromfile(f, dtype=dtype, count=shape[0] * shape[1])
+        codebook = codebook.reshape(shape)
+    else:
+        codebook = np.memmap(
+            path,
+            dtype=dtype,
+            mode=mmap_mode,
+            offset=data_offset,
+            shape=shape
+        )
+
+    return codebook, metadata
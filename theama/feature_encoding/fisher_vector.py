@@ -0,0 +1,250 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- Scikit-Learn: https://github.com/scikit-learn/scikit-learn/blob/master/COPYING
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing a Python implementation of the improved
+Fisher Vector encoding, as defined in the paper which can be
+found at:
+
+https://www.robots.ox.ac.uk/~vgg/rg/papers/peronnin_etal_ECCV10.pdf
+"""
+
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.mixture import GaussianMixture
+
+from .aggregation import segment_ids_from_offsets
+from .base_encoder import BaseEncoder, DEFAULT_BATCH_SIZE
+from .codebook_io import save_codebook
+from .gmm import gmm_statistics, streaming_em
+from .streaming import check_reiterable, is_in_memory, iterate_chunks, reservoir_sample
+
+
+class FV(BaseEncoder):
+    """
+    Class implementing the improved Fisher Vector encoding.
+    The codebook is a Gaussian mixture with diagonal
+    covariances: codebook holds the means, and weights and
+    variances the other mixture parameters. Feature vectors
+    are the gradients of the log-likelihood with respect to
+    the means and variances, of size 2 * K * D, followed by
+    signed square root (power) and L2 normalisation by
+    default. Intra-normalisation treats the mean and the
+    variance gradients of every component as separate blocks.
+    """
+
+    # The mean and variance gradients form separate blocks
+    _blocks_per_word = 2
+
+    def __init__(self, codebook_size, max_iter=100, tol=1e-3, reg_covar=1e-6, **kwargs):
+        kwargs.setdefault('normalization', 'power+l2')
+        super().__init__(codebook_size, **kwargs)
+
+        if self.metric != 'euclidean':
+            raise Exception('Fisher vectors require the euclidean metric.')
+
+        if self.assignment != 'hard':
+            raise Exception('Fisher vectors use the mixture posteriors, not visual word assignment.')
+
+        self.max_iter = max_iter
+        self.tol = tol
+        self.reg_covar = reg_covar
+
+        self.weights = None
+        self.variances = None
+
+    def learn_codebook(self, local_features, mini_batch_kmeans=True,
+                       max_samples=None, max_memory=None, batch_size=None,
+                       random_state=None):
+        """Function to learn the codebook by fitting a
+        Gaussian mixture with diagonal covariances, with EM
+        initialised by K-Means. The mini-batch K-Means
+        algorithm can be optionally chosen for the
+        initialisation.
+
+        Local features that do not fit in memory can be
+        given as a memory-mapped array or as a list of data
+        matrices. They are then either subsampled in one
+        pass with reservoir sampling (when max_samples or
+        max_memory is given), or streamed: mini-batch
+        K-Means gives the initial means in one pass, and
+        every EM iteration is one further pass over the
+        data.
+
+        Args:
+            local_features: The data matrix to use to learn the
+                            codebook, a memory-mapped array, or
+                            a list of data matrices.
+            mini_batch_kmeans: Boolean flag indicating
+                               whether to use the
+                               mini-batch K-Means
+                               algorithm for initialisation.
+            max_samples: Optional maximum number of local
+                         features to sample for fitting.
+            max_memory: Optional memory budget, in bytes, for
+                        the sampled local features.
+            batch_size: Mini-batch size used by mini-batch
+                        K-Means.
+            random_state: Optional seed for sampling and
+                          clustering.
+        """
+
+        if max_samples is not None or max_memory is not None:
+            local_features = reservoir_sample(
+                iterate_chunks(local_features),
+                max_samples,
+                max_memory,
+                random_state
+            )
+        elif not is_in_memory(local_features):
+            check_reiterable(local_features)
+
+            means = self._learn_codebook_incrementally(
+                local_features,
+                batch_size,
+                random_state
+            )
+            self._set_mixture(*streaming_em(
+                local_features,
+                means,
+                self.max_iter,
+                self.tol,
+                self.reg_covar,
+                self.chunk_size
+            ))
+            return
+
+        if mini_batch_kmeans:
+            kmeans = MiniBatchKMeans(
+                n_clusters=self.codebook_size,
+                batch_size=batch_size or DEFAULT_BATCH_SIZE,
+                random_state=random_state
+            )
+        else:
+            kmeans = KMeans(
+                n_clusters=self.codebook_size,
+                random_state=random_state
+            )
+
+        gmm = GaussianMixture(
+            n_components=self.codebook_size,
+            covariance_type='diag',
+            tol=self.tol,
+            reg_covar=self.reg_covar,
+            max_iter=self.max_iter,
+            means_init=kmeans.fit(local_features).cluster_centers_,
+            random_state=random_state
+        ).fit(local_features)
+
+        self._set_mixture(gmm.weights_, gmm.means_, gmm.covariances_)
+
+    def _set_mixture(self, weights, means, variances):
+        """Function to store the mixture parameters in the
+        data type of the encoder.
+        """
+
+        self.weights = weights.astype(self.dtype, copy=False)
+        self.codebook = means.astype(self.dtype, copy=False)
+        self.variances = variances.astype(self.dtype, copy=False)
+
+    def save(self, path):
+        """Function to save the mixture, along with the
+        encoder metadata, to a versioned binary file. Every
+        row of the stored matrix holds the mean, the
+        variances and the weight of one component.
+
+        Args:
+            path: Output file path.
+        """
+
+        if self.codebook is None:
+            raise Exception('Please run learn_codebook method.')
+
+        save_codebook(
+            path,
+            np.hstack([self.codebook, self.variances, self.weights[:, None]]),
+            self._metadata()
+        )
+
+    @classmethod
+    def load(cls, path, mmap_mode='r', **kwargs):
+        """Function to create an encoder from a file written
+        by save. By default the mixture is memory-mapped
+        read-only.
+
+        Args:
+            path: Codebook file path.
+            mmap_mode: Memory-map mode passed to np.memmap, or
+                       None to read the mixture into memory.
+            **kwargs: Runtime options, such as n_jobs, passed to
+                      the encoder constructor.
+
+        Returns:
+            Encoder instance with the mixture loaded.
+        """
+
+        encoder = super().load(path, mmap_mode, **kwargs)
+
+        parameters = encoder.codebook
+        dimension = (parameters.shape[1] - 1) // 2
+        encoder.codebook = parameters[:, :dimension]
+        encoder.variances = parameters[:, dimension:2 * dimension]
+        encoder.weights = parameters[:, -1]
+
+        return encoder
+
+    def _encode_segments(self, local_features, offsets, pyramid=None):
+        """Function to encode a concatenated batch of
+        segments in the calling thread. Posteriors are
+        computed chunk by chunk and reduced per segment into
+        the statistics the Fisher Vectors are built from.
+
+        Args:
+            local_features: Concatenated data matrix of shape (N, D).
+            offsets: Integer array of length n_segments + 1.
+            pyramid: Spatial pyramid inputs, not supported.
+
+        Returns:
+            Matrix of shape (n_segments, 2 * K * D).
+        """
+
+        if pyramid is not None:
+            raise Exception('Spatial pyramids are not supported by Fisher vectors.')
+
+        n_segments = len(offsets) - 1
+        empty = self._empty_segments(offsets)
+
+        means = self.codebook
+        weights = self.weights.astype(means.dtype, copy=False)
+        variances = self.variances.astype(means.dtype, copy=False)
+
+        zeroth, first, second, _ = gmm_statistics(
+            local_features,
+            weights,
+            means,
+            variances,
+            segment_ids_from_offsets(offsets),
+            n_segments,
+            self.chunk_size
+        )
+
+        zeroth = zeroth[..., None]
+        n_features = np.maximum(np.diff(offsets), 1).astype(means.dtype)[:, None, None]
+        scale = n_features * np.sqrt(weights)[:, None]
+
+        mean_gradients = (first - zeroth * means) / np.sqrt(variances) / scale
+        variance_gradients = \
+            ((second - 2 * means * first + means ** 2 * zeroth) / variances - zeroth) \
+            / (np.sqrt(means.dtype.type(2)) * scale)
+
+        feature_vectors = np.concatenate([
+            mean_gradients.reshape(n_segments, -1),
+            variance_gradients.reshape(n_segments, -1)
+        ], axis=1)
+
+        return self._normalize(feature_vectors, empty)
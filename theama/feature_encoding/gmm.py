@@ -0,0 +1,220 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+- SciPy: https://www.scipy.org/scipylib/license.html
+
+Module with the diagonal-covariance Gaussian mixture
+computations used by the Fisher Vector encoder: chunked
+posteriors, per-segment zeroth, first and second order
+statistics, and EM over a stream of local features.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from .assignment import DEFAULT_CHUNK_SIZE, nearest_centroids
+from .streaming import check_reiterable, iterate_chunks
+
+# Posteriors below this value are treated as zero, which
+# keeps the statistics sparse for peaked mixtures
+POSTERIOR_THRESHOLD = 1e-6
+
+
+def _gaussian_terms(weights, means, variances):
+    """Function to precompute the per-component terms of
+    the log joint densities.
+    """
+
+    precisions = 1.0 / variances
+    constants = np.log(weights) - 0.5 * (
+        means.shape[1] * np.log(2 * np.pi)
+        + np.log(variances).sum(axis=1)
+        + (means ** 2 * precisions).sum(axis=1)
+    )
+
+    return precisions, means * precisions, constants
+
+
+def _posteriors(local_features, terms):
+    """Function to compute the posteriors of a chunk of
+    local features with two matrix products.
+
+    Returns:
+        Tuple of (posteriors of shape (N, K), per-feature
+        log-likelihoods of shape (N,)).
+    """
+
+    precisions, scaled_means, constants = terms
+
+    log_joint = local_features @ scaled_means.T
+    log_joint -= 0.5 * ((local_features ** 2) @ precisions.T)
+    log_joint += constants
+
+    maximum = log_joint.max(axis=1, keepdims=True)
+    np.subtract(log_joint, maximum, out=log_joint)
+    np.exp(log_joint, out=log_joint)
+
+    total = log_joint.sum(axis=1, keepdims=True)
+    log_joint /= total
+
+    return log_joint, (np.log(total) + maximum).ravel()
+
+
+def gmm_statistics(local_features, weights, means, variances, segment_ids=None,
+                   n_segments=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Function to compute the soft-assignment statistics
+    of local features under a diagonal Gaussian mixture,
+    per segment. Posteriors are computed chunk by chunk,
+    so memory is bounded by chunk_size x K, and the moments
+    of every chunk are reduced per segment with one sparse
+    matrix product. Statistics are computed in the data
+    type of the means.
+
+    Args:
+        local_features: Data matrix of shape (N, D).
+        weights: Mixture weights of shape (K,).
+        means: Component means of shape (K, D).
+        variances: Diagonal variances of shape (K, D).
+        segment_ids: Optional sorted segment index of shape
+                     (N,). All features belong to one segment
+                     if None.
+        n_segments: Number of segments.
+        chunk_size: Number of local features per chunk.
+
+    Returns:
+        Tuple of (zeroth order statistics of shape
+        (n_segments, K), first order statistics of shape
+        (n_segments, K, D), second order statistics of shape
+        (n_segments, K, D), total log-likelihood).
+    """
+
+    n_clusters, dimension = means.shape
+    dtype = means.dtype
+    terms = [term.astype(dtype, copy=False) for term in _gaussian_terms(weights, means, variances)]
+
+    zeroth = np.zeros((n_segments, n_clusters), dtype=dtype)
+    first = np.zeros((n_segments, n_clusters, dimension), dtype=dtype)
+    second = np.zeros((n_segments, n_clusters, dimension), dtype=dtype)
+    log_likelihood = 0.0
+
+    for start in range(0, len(local_features), chunk_size):
+        chunk = np.asarray(local_features[start:start + chunk_size], dtype=dtype)
+        posteriors, log_likelihoods = _posteriors(chunk, terms)
+        log_likelihood += log_likelihoods.sum()
+
+        if segment_ids is None:
+            ids = np.zeros((len(chunk),), dtype=np.intp)
+        else:
+            ids = segment_ids[start:start + chunk_size]
+
+        # Segments are contiguous, so a chunk spans ids[0]..ids[-1]
+        first_segment = ids[0]
+        n_chunk_segments = ids[-1] - first_segment + 1
+
+        rows = (ids - first_segment)[:, None] * n_clusters + np.arange(n_clusters)
+        columns = np.broadcast_to(np.arange(len(chunk))[:, None], posteriors.shape)
+        kept = posteriors >= POSTERIOR_THRESHOLD
+
+        responsibilities = sparse.csr_matrix(
+            (posteriors[kept], (rows[kept], columns[kept])),
+            shape=(n_chunk_segments * n_clusters, len(chunk))
+        )
+
+        stop_segment = first_segment + n_chunk_segments
+        zeroth[first_segment:stop_segment] += \
+            np.asarray(responsibilities.sum(axis=1)).reshape(n_chunk_segments, n_clusters)
+
+        moments = responsibilities @ np.hstack([chunk, chunk ** 2])
+        moments = moments.reshape(n_chunk_segments, n_clusters, 2 * dimension)
+        first[first_segment:stop_segment] += moments[..., :dimension]
+        second[first_segment:stop_segment] += moments[..., dimension:]
+
+    return zeroth, first, second, log_likelihood
+
+
+def _maximization_step(zeroth, first, second, n_samples, reg_covar):
+    """Function to estimate the mixture parameters from
+    accumulated statistics.
+    """
+
+    zeroth = zeroth + 10 * np.finfo(np.float64).eps
+
+    weights = zeroth / n_samples
+    means = first / zeroth[:, None]
+    variances = second / zeroth[:, None] - means ** 2 + reg_covar
+
+    return weights / weights.sum(), means, np.maximum(variances, reg_covar)
+
+
+def streaming_em(local_features, means, max_iter=100, tol=1e-3, reg_covar=1e-6,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """Function to fit a diagonal Gaussian mixture with EM
+    over local features that do not fit in memory. Every
+    iteration is one pass over the data, accumulating the
+    statistics chunk by chunk. The mixture is initialised
+    from the given means with hard assignments, and EM
+    stops when the average log-likelihood improves by less
+    than tol.
+
+    Args:
+        local_features: Memory-mapped array, or re-iterable
+                        collection of data matrices.
+        means: Initial means of shape (K, D), e.g. from
+               mini-batch K-Means.
+        max_iter: Maximum number of EM iterations.
+        tol: Convergence threshold on the average
+             log-likelihood.
+        reg_covar: Non-negative regularisation added to the
+                   variances.
+        chunk_size: Number of local features per chunk.
+
+    Returns:
+        Tuple of (weights of shape (K,), means of shape
+        (K, D), variances of shape (K, D)).
+    """
+
+    check_reiterable(local_features)
+
+    n_clusters, dimension = means.shape
+
+    # Hard-assignment statistics give the initial mixture
+    zeroth = np.zeros((n_clusters,))
+    first = np.zeros((n_clusters, dimension))
+    second = np.zeros((n_clusters, dimension))
+    n_samples = 0
+    for chunk in iterate_chunks(local_features):
+        chunk = chunk.astype(np.float64, copy=False)
+        assignments = nearest_centroids(chunk, means, chunk_size)
+        zeroth += np.bincount(assignments, minlength=n_clusters)
+        np.add.at(first, assignments, chunk)
+        np.add.at(second, assignments, chunk ** 2)
+        n_samples += len(chunk)
+
+    weights, means, variances = _maximization_step(zeroth, first, second, n_samples, reg_covar)
+
+    previous = -np.inf
+    for _ in range(max_iter):
+        zeroth = np.zeros((n_clusters,))
+        first = np.zeros((n_clusters, dimension))
+        second = np.zeros((n_clusters, dimension))
+        log_likelihood = 0.0
+
+        for chunk in iterate_chunks(local_features):
+            statistics = gmm_statistics(chunk, weights, means, variances, chunk_size=chunk_size)
+            zeroth += statistics[0][0]
+            first += statistics[1][0]
+            second += statistics[2][0]
+            log_likelihood += statistics[3]
+
+        weights, means, variances = _maximization_step(zeroth, first, second, n_samples, reg_covar)
+
+        log_likelihood /= n_samples
+        if log_likelihood - previous < tol:
+            break
+        previous = log_likelihood
+
+    return weights, means, variances
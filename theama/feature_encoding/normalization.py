@@ -0,0 +1,156 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing the normalisation steps applied to batches
+of encoded feature vectors. All steps modify the batch matrix
+in place, and rows with a zero norm are left as zeros instead
+of being divided by zero.
+"""
+
+import numpy as np
+
+NORMALIZATIONS = ('intra', 'power', 'l2')
+
+EMPTY_POLICIES = ('zeros', 'nan', 'raise')
+
+# Rows processed at a time by steps that need scratch space
+_BLOCK_ROWS = 256
+
+
+def parse_normalization(normalization):
+    """Function to validate a normalisation pipeline given
+    either as a string of steps joined by '+', such as
+    'power+l2', or as a sequence of steps.
+
+    Args:
+        normalization: Pipeline description, or None for no
+                       normalisation.
+
+    Returns:
+        Canonical string of steps joined by '+'.
+    """
+
+    if normalization is None:
+        return ''
+
+    steps = normalization.split('+') if isinstance(normalization, str) else list(normalization)
+    steps = [step for step in steps if step]
+
+    for step in steps:
+        if step not in NORMALIZATIONS:
+            raise Exception('Normalization steps must be among: ' + ', '.join(NORMALIZATIONS) + '.')
+
+    return '+'.join(steps)
+
+
+def _divide_by_norms(vectors):
+    """Function to L2-normalise the vectors along the last
+    axis in place, leaving zero vectors unchanged.
+    """
+
+    norms = np.sqrt(np.einsum('...i,...i->...', vectors, vectors))
+    norms[norms == 0] = 1
+    vectors /= norms[..., None]
+
+
+def l2_normalize(feature_vectors):
+    """Function to L2-normalise every row in place.
+
+    Args:
+        feature_vectors: Matrix of shape (n_segments, feature_dimension).
+    """
+
+    _divide_by_norms(feature_vectors)
+
+
+def intra_normalize(feature_vectors, n_blocks):
+    """Function to L2-normalise in place every block of a
+    row, such as the residual sum of one visual word in a
+    VLAD vector (intra-normalisation).
+
+    Args:
+        feature_vectors: C-contiguous matrix of shape
+                         (n_segments, feature_dimension).
+        n_blocks: Number of equal blocks per row.
+    """
+
+    _divide_by_norms(feature_vectors.reshape(len(feature_vectors), n_blocks, -1))
+
+
+def power_normalize(feature_vectors):
+    """Function to apply the signed square root
+    sign(x) * sqrt(|x|) to every value in place. Rows are
+    processed in blocks, so scratch memory is bounded.
+
+    Args:
+        feature_vectors: Matrix of shape (n_segments, feature_dimension).
+    """
+
+    for start in range(0, len(feature_vectors), _BLOCK_ROWS):
+        rows = feature_vectors[start:start + _BLOCK_ROWS]
+        magnitudes = np.abs(rows)
+        np.sqrt(magnitudes, out=magnitudes)
+        np.copysign(magnitudes, rows, out=rows)
+
+
+def normalize(feature_vectors, normalization, n_blocks):
+    """Function to apply a normalisation pipeline in place
+    to a dense batch of feature vectors.
+
+    Args:
+        feature_vectors: C-contiguous matrix of shape
+                         (n_segments, feature_dimension).
+        normalization: Canonical pipeline string, see
+                       parse_normalization.
+        n_blocks: Number of blocks per row used by
+                  intra-normalisation.
+
+    Returns:
+        The normalised feature vectors.
+    """
+
+    for step in filter(None, normalization.split('+')):
+        if step == 'intra':
+            intra_normalize(feature_vectors, n_blocks)
+        elif step == 'power':
+            power_normalize(feature_vectors)
+        else:
+            l2_normalize(feature_vectors)
+
+    return feature_vectors
+
+
+def normalize_sparse(feature_vectors, normalization):
+    """Function to apply a normalisation pipeline in place
+    to the stored values of a CSR batch of histograms, whose
+    blocks are single values.
+
+    Args:
+        feature_vectors: CSR matrix of shape (n_segments, K).
+        normalization: Canonical pipeline string, see
+                       parse_normalization.
+
+    Returns:
+        The normalised feature vectors.
+    """
+
+    data = feature_vectors.data
+    row_lengths = np.diff(feature_vectors.indptr)
+
+    for step in filter(None, normalization.split('+')):
+        if step == 'intra':
+            np.sign(data, out=data)
+        elif step == 'power':
+            np.copysign(np.sqrt(np.abs(data)), data, out=data)
+        else:
+            rows = np.repeat(np.arange(len(row_lengths)), row_lengths)
+            norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=len(row_lengths)))
+            norms[norms == 0] = 1
+            data /= norms[rows]
+
+    return feature_vectors
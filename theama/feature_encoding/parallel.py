@@ -0,0 +1,149 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+- SciPy: https://www.scipy.org/scipylib/license.html
+
+Module containing helpers to spread batch encoding over a
+pool of threads or processes. Work is split into contiguous
+groups of images so that results can be stacked back in
+input order, which keeps the output deterministic.
+"""
+
+import copy
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from ..utils.parallel import SharedArray, attach_shared_array, check_backend
+
+# Per-process state populated by the process pool initialiser
+_worker_state = {}
+
+
+def split_segments(offsets, n_splits):
+    """Function to split a batch of segments into at most
+    n_splits contiguous groups holding roughly the same
+    number of local features each.
+
+    Args:
+        offsets: Integer array of length N + 1.
+        n_splits: Maximum number of groups.
+
+    Returns:
+        List of (first_segment, stop_segment) tuples.
+    """
+
+    n_segments = len(offsets) - 1
+    n_splits = max(min(n_splits, n_segments), 1)
+
+    # Balance on features, but never let a group be empty of segments
+    targets = np.linspace(0, offsets[-1], n_splits + 1)[1:-1]
+    boundaries = np.searchsorted(offsets, targets)
+    boundaries = np.clip(boundaries, 1, n_segments - 1)
+    boundaries = np.unique(np.concatenate([[0], boundaries, [n_segments]]))
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _init_worker(encoder, shm_name, shape, dtype):
+    """Function run once in every worker process to
+    attach the shared codebook to a private copy of the
+    encoder.
+    """
+
+    shm, encoder.codebook = attach_shared_array(shm_name, shape, dtype)
+
+    # The assigner keeps its index and only re-attaches the centroids
+    encoder.assigner.centroids = encoder.codebook
+
+    _worker_state['shm'] = shm
+    _worker_state['encoder'] = encoder
+
+
+def _encode_in_worker(task):
+    """Function run in a worker process to encode one
+    group of segments.
+    """
+
+    return _worker_state['encoder']._encode_segments(*task)
+
+
+def _split_pyramid(pyramid, first, stop, start_feature, stop_feature):
+    """Function to select the spatial pyramid inputs of a
+    contiguous group of segments.
+    """
+
+    if pyramid is None:
+        return None
+
+    positions, image_shapes, grids = pyramid
+    if image_shapes is not None:
+        image_shapes = image_shapes[first:stop]
+
+    return positions[start_feature:stop_feature], image_shapes, grids
+
+
+def encode_in_parallel(encoder, local_features, offsets, n_jobs, backend='thread', pyramid=None):
+    """Function to encode a batch of segments on a pool
+    of workers. Each worker receives a contiguous group of
+    segments and the per-group results are stacked in
+    input order.
+
+    Args:
+        encoder: Fitted encoder instance.
+        local_features: Concatenated data matrix of shape (N, D).
+        offsets: Integer array of length n_segments + 1.
+        n_jobs: Number of workers.
+        backend: Either 'thread' or 'process'.
+        pyramid: Optional spatial pyramid inputs, split
+                 along with the segments.
+
+    Returns:
+        Matrix of shape (n_segments, feature_dimension).
+    """
+
+    check_backend(backend)
+
+    tasks = []
+    for first, stop in split_segments(offsets, n_jobs):
+        start_feature, stop_feature = offsets[first], offsets[stop]
+        tasks.append((
+            local_features[start_feature:stop_feature],
+            offsets[first:stop + 1] - start_feature,
+            _split_pyramid(pyramid, first, stop, start_feature, stop_feature)
+        ))
+
+    if backend == 'thread':
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(lambda task: encoder._encode_segments(*task), tasks))
+    else:
+        worker_encoder = copy.copy(encoder)
+        worker_encoder.codebook = None
+        worker_encoder.n_jobs = 1
+        worker_encoder.assigner = copy.copy(encoder.assigner)
+        worker_encoder.assigner.centroids = None
+
+        # The cached kernel width holds a reference to the
+        # codebook, so only its value is passed to workers
+        if encoder.assignment == 'soft' and encoder.sigma is None:
+            worker_encoder.sigma = encoder._kernel_sigma()
+        worker_encoder._estimated_sigma = None
+
+        with SharedArray(encoder.codebook) as shared_codebook:
+            with ProcessPoolExecutor(
+                    max_workers=n_jobs,
+                    initializer=_init_worker,
+                    initargs=(worker_encoder, shared_codebook.name,
+                              shared_codebook.shape, shared_codebook.dtype)
+            ) as executor:
+                results = list(executor.map(_encode_in_worker, tasks))
+
+    if sparse.issparse(results[0]):
+        return sparse.vstack(results, format='csr')
+
+    return np.concatenate(results, axis=0)
@@ -0,0 +1,79 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+- SciPy: https://www.scipy.org/scipylib/license.html
+
+Module containing the reduced-precision storage formats of
+encoded feature vectors. int8 codes store values in
+[-1, 1], as produced by L2 or intra-normalisation, with a
+fixed scale so that codes of different batches can be
+compared directly.
+"""
+
+import numpy as np
+from scipy import sparse
+
+QUANTIZED_DTYPES = ('float16', 'int8')
+
+# Code of the value 1 in int8 feature vectors
+INT8_SCALE = 127
+
+
+def quantize(feature_vectors, output_dtype):
+    """Function to convert normalised feature vectors to a
+    storage format. For int8, values are scaled by
+    INT8_SCALE and rounded, reusing the input buffer.
+
+    Args:
+        feature_vectors: Dense matrix, or CSR matrix whose
+                         stored values are converted.
+        output_dtype: One of QUANTIZED_DTYPES, or None to
+                      return the feature vectors unchanged.
+
+    Returns:
+        Feature vectors in the output data type.
+    """
+
+    if output_dtype is None:
+        return feature_vectors
+
+    if sparse.issparse(feature_vectors):
+        feature_vectors.data = quantize(feature_vectors.data, output_dtype)
+        return feature_vectors
+
+    if output_dtype == 'float16':
+        return feature_vectors.astype(np.float16)
+
+    feature_vectors *= INT8_SCALE
+    np.rint(feature_vectors, out=feature_vectors)
+
+    return feature_vectors.astype(np.int8)
+
+
+def dequantize(feature_vectors, dtype=np.float32):
+    """Function to convert stored feature vectors back to
+    floating point values.
+
+    Args:
+        feature_vectors: Dense or CSR matrix returned by
+                         quantize.
+        dtype: Floating point data type of the result.
+
+    Returns:
+        Feature vectors with values in the original range.
+    """
+
+    if sparse.issparse(feature_vectors):
+        feature_vectors = feature_vectors.copy()
+        feature_vectors.data = dequantize(feature_vectors.data, dtype)
+        return feature_vectors
+
+    values = feature_vectors.astype(dtype)
+    if feature_vectors.dtype == np.int8:
+        values /= INT8_SCALE
+
+    return values
@@ -0,0 +1,126 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing the spatial pyramid helpers used to pool
+local features over grids of image regions, given the
+positions of the local features.
+"""
+
+import numpy as np
+
+# Whole image, 2 x 2 quadrants and 3 horizontal stripes
+DEFAULT_GRIDS = ((1, 1), (2, 2), (3, 1))
+
+
+def parse_grids(grids):
+    """Function to validate the grids of a spatial pyramid.
+
+    Args:
+        grids: Sequence of (rows, columns) tuples, one per
+               pyramid level, e.g. (3, 1) for three
+               horizontal stripes.
+
+    Returns:
+        Tuple of (rows, columns) tuples.
+    """
+
+    grids = tuple(tuple(int(size) for size in grid) for grid in grids)
+
+    if not grids or any(len(grid) != 2 or min(grid) < 1 for grid in grids):
+        raise Exception('Grids must be a non-empty sequence of positive (rows, columns) pairs.')
+
+    return grids
+
+
+def positions_to_array(positions):
+    """Function to convert local feature positions to a
+    matrix of (x, y) coordinates.
+
+    Args:
+        positions: Array of shape (N, >= 2) whose first two
+                   columns are x and y, such as the positions
+                   returned by MotionDescriptors, or a
+                   structured array with 'x' and 'y' fields,
+                   such as the output of keypoints_to_array.
+
+    Returns:
+        float64 matrix of shape (N, 2).
+    """
+
+    positions = np.asarray(positions)
+
+    if positions.dtype.names is not None:
+        return np.stack([positions['x'], positions['y']], axis=1).astype(np.float64)
+
+    if positions.ndim != 2 or positions.shape[1] < 2:
+        raise Exception('Positions must be of shape (N, 2) or have x and y fields.')
+
+    return positions[:, :2].astype(np.float64)
+
+
+def _image_extents(positions, segment_ids, n_segments, image_shapes):
+    """Function to compute the origin and size, in x and
+    y, of every image. Without image shapes, the bounding
+    box of the positions of every image is used.
+    """
+
+    if image_shapes is not None:
+        image_shapes = np.asarray(image_shapes, dtype=np.float64)
+        sizes = np.broadcast_to(image_shapes[..., 1::-1], (n_segments, 2))
+
+        return np.zeros((n_segments, 2)), sizes
+
+    origins = np.full((n_segments, 2), np.inf)
+    ends = np.full((n_segments, 2), -np.inf)
+    np.minimum.at(origins, segment_ids, positions)
+    np.maximum.at(ends, segment_ids, positions)
+
+    return origins, ends - origins
+
+
+def pyramid_region_ids(positions, segment_ids, n_segments, grids, image_shapes=None):
+    """Function to find, for every local feature, the
+    region it falls in at every level of a spatial pyramid.
+    Regions are numbered per image, level by level and in
+    row-major order within a level.
+
+    Args:
+        positions: Matrix of (x, y) coordinates of shape (N, 2).
+        segment_ids: Image index of shape (N,).
+        n_segments: Number of images.
+        grids: Tuple of (rows, columns) tuples, see parse_grids.
+        image_shapes: Optional (height, width) of every image,
+                      of shape (n_segments, 2), or a single
+                      shape shared by all images. When None,
+                      the bounding box of the positions of
+                      every image is divided instead.
+
+    Returns:
+        Tuple of (region index of shape (N, L) in the range
+        [0, n_segments * n_regions), n_regions), where L is
+        the number of levels and n_regions the number of
+        regions per image.
+    """
+
+    origins, sizes = _image_extents(positions, segment_ids, n_segments, image_shapes)
+
+    # Fractional position in [0, 1] of every feature within its image
+    sizes = np.where(sizes > 0, sizes, 1)
+    fractions = (positions - origins[segment_ids]) / sizes[segment_ids]
+
+    n_regions = sum(rows * columns for rows, columns in grids)
+    region_ids = np.empty((len(positions), len(grids)), dtype=np.intp)
+
+    first_region = 0
+    for level, (rows, columns) in enumerate(grids):
+        column = np.clip((fractions[:, 0] * columns).astype(np.intp), 0, columns - 1)
+        row = np.clip((fractions[:, 1] * rows).astype(np.intp), 0, rows - 1)
+        region_ids[:, level] = segment_ids * n_regions + first_region + row * columns + column
+        first_region += rows * columns
+
+    return region_ids, n_regions
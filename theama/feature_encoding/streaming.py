@@ -0,0 +1,169 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing helpers to consume local features as
+a stream of chunks, so that codebooks can be learned from
+data that does not fit in memory.
+"""
+
+import numpy as np
+
+DEFAULT_STREAM_CHUNK_SIZE = 65536
+
+
+def is_in_memory(local_features):
+    """Function to check whether local features are an
+    in-memory array, as opposed to an iterator of chunks or
+    a memory-mapped array.
+
+    Args:
+        local_features: Data matrix, memory-mapped array, or
+                        iterable of data matrices.
+
+    Returns:
+        Boolean flag.
+    """
+
+    return isinstance(local_features, np.ndarray) and \
+        not isinstance(local_features, np.memmap)
+
+
+def check_reiterable(local_features):
+    """Function to check that local features can be read
+    in several passes, which rules out one-shot iterators
+    such as generators.
+
+    Args:
+        local_features: Data matrix, memory-mapped array, or
+                        iterable of data matrices.
+    """
+
+    if iter(local_features) is local_features:
+        raise Exception('Multi-pass training needs data that can be read several '
+                        'times, such as a memory-mapped array or a list of arrays.')
+
+
+def iterate_chunks(local_features, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+    """Function to iterate over local features in chunks
+    of rows. Arrays (including memory-mapped arrays) are
+    sliced, while any other iterable is assumed to already
+    yield data matrices.
+
+    Args:
+        local_features: Data matrix, memory-mapped array, or
+                        iterable of data matrices.
+        chunk_size: Number of rows per chunk when slicing
+                    an array.
+
+    Yields:
+        Data matrices with at least one row.
+    """
+
+    if isinstance(local_features, np.ndarray):
+        for start in range(0, local_features.shape[0], chunk_size):
+            yield np.asarray(local_features[start:start + chunk_size])
+        return
+
+    for chunk in local_features:
+        if chunk is None or len(chunk) == 0:
+            continue
+        yield np.asarray(chunk)
+
+
+def rebatch(chunks, batch_size):
+    """Function to regroup a stream of chunks into batches
+    of exactly batch_size rows, except possibly the last.
+
+    Args:
+        chunks: Iterable of data matrices.
+        batch_size: Number of rows per batch.
+
+    Yields:
+        Data matrices of batch_size rows.
+    """
+
+    pending = []
+    n_pending = 0
+
+    for chunk in chunks:
+        pending.append(chunk)
+        n_pending += len(chunk)
+
+        if n_pending < batch_size:
+            continue
+
+        merged = np.concatenate(pending)
+        n_full = (len(merged) // batch_size) * batch_size
+        for start in range(0, n_full, batch_size):
+            yield merged[start:start + batch_size]
+
+        pending = [merged[n_full:]]
+        n_pending = len(pending[0])
+
+    if n_pending:
+        yield np.concatenate(pending)
+
+
+def reservoir_sample(chunks, n_samples, max_memory=None, random_state=None):
+    """Function to draw a uniform random sample of rows from
+    a stream of chunks in a single pass (reservoir
+    sampling), without holding more than the sample in
+    memory.
+
+    Args:
+        chunks: Iterable of data matrices.
+        n_samples: Maximum number of rows to keep, or None.
+        max_memory: Maximum size of the sample in bytes, or
+                    None. The sample size is the smaller of
+                    the two limits.
+        random_state: Seed or np.random.RandomState.
+
+    Returns:
+        Data matrix with at most n_samples rows.
+    """
+
+    if n_samples is None and max_memory is None:
+        raise Exception('Please provide n_samples or max_memory.')
+
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+
+    reservoir = None
+    n_filled = 0
+    n_seen = 0
+
+    for chunk in chunks:
+        if reservoir is None:
+            capacity = np.inf if n_samples is None else n_samples
+            if max_memory is not None:
+                row_bytes = chunk.shape[1] * chunk.dtype.itemsize
+                capacity = min(capacity, max_memory // row_bytes)
+            if capacity < 1:
+                raise Exception('Memory budget is smaller than a single local feature.')
+            reservoir = np.empty((int(capacity), chunk.shape[1]), dtype=chunk.dtype)
+
+        # Fill the reservoir first
+        n_fill = min(len(chunk), len(reservoir) - n_filled)
+        reservoir[n_filled:n_filled + n_fill] = chunk[:n_fill]
+        n_filled += n_fill
+        n_seen += n_fill
+        chunk = chunk[n_fill:]
+
+        if len(chunk) == 0:
+            continue
+
+        # Row t (0-based) replaces a random slot with probability capacity / (t + 1)
+        slots = random_state.randint(0, n_seen + np.arange(1, len(chunk) + 1))
+        keep = slots < len(reservoir)
+        reservoir[slots[keep]] = chunk[keep]
+        n_seen += len(chunk)
+
+    if reservoir is None:
+        raise Exception('No local features were provided.')
+
+    return reservoir[:n_filled]
@@ -0,0 +1,136 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the nearest-centroid assignment routines.
+"""
+
+import unittest
+
+import numpy as np
+
+from theama.feature_encoding import VLAD, BruteForceAssigner, HierarchicalKMeansAssigner, HammingAssigner
+from theama.feature_encoding.assignment import nearest_centroids, smallest_k
+from theama.feature_encoding.binary import hamming_distances
+
+
+class AssignmentTests(unittest.TestCase):
+    """
+    Class for assignment unit tests.
+    """
+
+    def setUp(self):
+        self.centroids = np.random.random((16, 8))
+        self.local_features = np.random.random((250, 8))
+
+    def test_nearest_centroids_matches_brute_force(self):
+        """Function to test that the chunked assignment
+        agrees with an explicit brute-force search.
+        Asserts that all assignments are equal.
+        """
+
+        expected = np.linalg.norm(
+            self.local_features[:, None, :] - self.centroids[None, :, :],
+            axis=2
+        ).argmin(axis=1)
+
+        assignments = nearest_centroids(
+            self.local_features,
+            self.centroids,
+            chunk_size=64
+        )
+
+        np.testing.assert_array_equal(assignments, expected)
+
+    def test_nearest_centroids_empty_input(self):
+        """Function to test that an empty data matrix
+        yields an empty assignment array.
+        """
+
+        assignments = nearest_centroids(np.zeros((0, 8)), self.centroids)
+
+        self.assertEqual(assignments.shape, (0,))
+
+    def test_hierarchical_assigner_exhaustive_probing_is_exact(self):
+        """Function to test that the hierarchical assigner
+        is exact when every cell is probed.
+        """
+
+        exact = BruteForceAssigner().fit(self.centroids)
+        approximate = HierarchicalKMeansAssigner(n_cells=4, n_probes=4).fit(self.centroids)
+
+        np.testing.assert_array_equal(
+            approximate.assign(self.local_features),
+            exact.assign(self.local_features)
+        )
+
+    def test_kneighbors_matches_full_sort(self):
+        """Function to test that the partial-sort top-k search
+        of every assigner returns the same neighbours, in the
+        same order, as a full sort of the distances.
+        """
+
+        distances = ((self.local_features[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=2)
+        expected = np.argsort(distances, axis=1)[:, :5]
+
+        for assigner in (BruteForceAssigner(chunk_size=64),
+                         HierarchicalKMeansAssigner(n_cells=4, n_probes=4, chunk_size=64)):
+            neighbor_distances, neighbors = assigner.fit(self.centroids).kneighbors(self.local_features, 5)
+
+            np.testing.assert_array_equal(neighbors, expected)
+            np.testing.assert_allclose(
+                neighbor_distances,
+                np.take_along_axis(distances, expected, axis=1)
+            )
+
+        rng = np.random.RandomState(0)
+        descriptors = rng.randint(0, 256, (100, 32)).astype('uint8')
+        centroids = rng.randint(0, 256, (16, 32)).astype('uint8')
+
+        hamming_assigner = HammingAssigner(chunk_size=32).fit(centroids)
+        hamming, _ = hamming_assigner.kneighbors(descriptors, 3)
+        np.testing.assert_array_equal(hamming, smallest_k(hamming_distances(descriptors, centroids), 3)[0])
+        np.testing.assert_array_equal(hamming[:, 0], hamming_distances(descriptors, centroids).min(axis=1))
+
+        # Integer distances tie, so compare distances rather than indices
+        assigned = hamming_assigner.assign(descriptors)
+        np.testing.assert_array_equal(
+            hamming_distances(descriptors, centroids)[np.arange(len(descriptors)), assigned],
+            hamming[:, 0]
+        )
+
+    def test_hierarchical_assigner_recall(self):
+        """Function to test that the hierarchical assigner
+        recovers most exact assignments with partial
+        probing on clustered data.
+        """
+
+        rng = np.random.RandomState(0)
+        centroids = rng.random_sample((256, 16))
+        local_features = centroids[rng.randint(0, 256, 1000)] + \
+            0.01 * rng.standard_normal((1000, 16))
+
+        exact = BruteForceAssigner().fit(centroids).assign(local_features)
+        approximate = HierarchicalKMeansAssigner(n_probes=4).fit(centroids).assign(local_features)
+
+        self.assertGreater(np.mean(exact == approximate), 0.9)
+
+    def test_encoder_uses_assigner(self):
+        """Function to test that an encoder configured with
+        an approximate assigner produces valid features.
+        """
+
+        vlad = VLAD(16, assigner=HierarchicalKMeansAssigner(n_probes=16))
+        vlad.codebook = self.centroids
+
+        exact = VLAD(16)
+        exact.codebook = self.centroids
+
+        np.testing.assert_allclose(
+            vlad.compute_feature_vector(self.local_features),
+            exact.compute_feature_vector(self.local_features)
+        )
@@ -0,0 +1,105 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for Hamming-space encoding of binary descriptors.
+"""
+
+import unittest
+
+import numpy as np
+
+from theama.feature_encoding import BOW, VLAD
+from theama.feature_encoding.binary import hamming_distances, k_majority, nearest_binary_centroids
+
+
+class BinaryDescriptorTests(unittest.TestCase):
+    """
+    Class for binary descriptor unit tests.
+    """
+
+    def setUp(self):
+        self.codebook_size = 8
+        self.B = 32
+        rng = np.random.RandomState(0)
+        self.dummy_descriptors = rng.randint(0, 256, (300, self.B)).astype('uint8')
+
+    def test_hamming_distances_match_unpacked_bits(self):
+        """Function to test that XOR/popcount distances
+        match counting differing unpacked bits.
+        """
+
+        a = self.dummy_descriptors[:10]
+        b = self.dummy_descriptors[10:15]
+
+        expected = (np.unpackbits(a, axis=1)[:, None, :] !=
+                    np.unpackbits(b, axis=1)[None, :, :]).sum(axis=2)
+
+        np.testing.assert_array_equal(hamming_distances(a, b), expected)
+
+    def test_nearest_binary_centroids_matches_hamming(self):
+        """Function to test that the matrix-product search
+        returns the centroid with the smallest Hamming
+        distance.
+        """
+
+        centroids = self.dummy_descriptors[:self.codebook_size]
+
+        np.testing.assert_array_equal(
+            nearest_binary_centroids(self.dummy_descriptors, centroids, chunk_size=64),
+            hamming_distances(self.dummy_descriptors, centroids).argmin(axis=1)
+        )
+
+    def test_k_majority_recovers_clusters(self):
+        """Function to test that k-majority recovers
+        well-separated binary cluster centres.
+        """
+
+        rng = np.random.RandomState(1)
+        centres = rng.randint(0, 256, (4, self.B)).astype('uint8')
+        bits = np.unpackbits(centres[rng.randint(0, 4, 400)], axis=1)
+        noise = rng.random_sample(bits.shape) < 0.05
+        descriptors = np.packbits(bits ^ noise, axis=1)
+
+        centroids = k_majority(descriptors, 4, random_state=0)
+
+        self.assertEqual(centroids.dtype, np.uint8)
+        self.assertEqual(hamming_distances(centres, centroids).min(axis=1).max(), 0)
+
+    def test_binary_bow_and_vlad(self):
+        """Function to test that BoW and VLAD encode binary
+        descriptors with the hamming metric, keeping a
+        packed uint8 codebook.
+        """
+
+        bow = BOW(self.codebook_size, metric='hamming')
+        bow.learn_codebook(self.dummy_descriptors)
+        self.assertEqual(bow.codebook.dtype, np.uint8)
+        self.assertEqual(
+            bow.compute_feature_vector(self.dummy_descriptors).shape,
+            (self.codebook_size,)
+        )
+
+        vlad = VLAD(self.codebook_size, metric='hamming')
+        vlad.codebook = bow.codebook
+        self.assertEqual(
+            vlad.compute_feature_vector(self.dummy_descriptors).shape,
+            (self.codebook_size * self.B * 8,)
+        )
+
+    def test_binary_requires_uint8(self):
+        """Function to test that the hamming metric rejects
+        descriptors that are not packed uint8 arrays.
+        """
+
+        bow = BOW(self.codebook_size, metric='hamming')
+        bow.learn_codebook(self.dummy_descriptors)
+
+        with self.assertRaises(Exception) as context:
+            bow.compute_feature_vector(self.dummy_descriptors.astype('float64'))
+
+        self.assertTrue('packed uint8' in str(context.exception))
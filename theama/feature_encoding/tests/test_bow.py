@@ -68,3 +68,132 @@ class BoWTests(unittest.TestCase):
             bow_descriptor_dimension,
             self.codebook_size
         )
+
+    def test_compute_bow_batch_matches_single(self):
+        """Function to test that batch BoW computation from
+        a list of data matrices, and from a concatenated
+        data matrix with offsets, matches per-image
+        computation. Asserts that all descriptors are equal.
+        """
+
+        self.bow.learn_codebook(self.dummy_descriptors)
+        batch = [self.dummy_descriptors[:30], self.dummy_descriptors[30:]]
+
+        expected = np.array([self.bow.compute_feature_vector(x) for x in batch])
+        from_list = self.bow.compute_feature_vectors(batch)
+        from_offsets = self.bow.compute_feature_vectors(
+            self.dummy_descriptors,
+            offsets=[0, 30, 100]
+        )
+
+        self.assertEqual(from_list.shape, (2, self.codebook_size))
+        np.testing.assert_allclose(from_list, expected)
+        np.testing.assert_allclose(from_offsets, expected)
+
+    def test_compute_sparse_bow_matches_dense(self):
+        """Function to test that sparse BoW histograms are
+        CSR matrices equal to the dense histograms.
+        """
+
+        self.bow.learn_codebook(self.dummy_descriptors)
+        batch = [self.dummy_descriptors[:30], self.dummy_descriptors[30:]]
+
+        sparse_bow = BOW(self.codebook_size, sparse=True)
+        sparse_bow.codebook = self.bow.codebook
+
+        sparse_descriptors = sparse_bow.compute_feature_vectors(batch)
+        sparse_descriptor = sparse_bow.compute_feature_vector(self.dummy_descriptors)
+
+        self.assertEqual(sparse_descriptors.format, 'csr')
+        self.assertEqual(sparse_descriptor.shape, (1, self.codebook_size))
+        np.testing.assert_allclose(
+            sparse_descriptors.toarray(),
+            self.bow.compute_feature_vectors(batch)
+        )
+
+    def test_sparse_normalization_matches_dense(self):
+        """Function to test that the power+l2 normalisation
+        of sparse histograms, including an empty image,
+        matches the dense histograms.
+        """
+
+        self.bow.learn_codebook(self.dummy_descriptors)
+        offsets = [0, 30, 30, 100]
+
+        dense_bow = BOW(self.codebook_size, normalization='power+l2')
+        dense_bow.codebook = self.bow.codebook
+        sparse_bow = BOW(self.codebook_size, sparse=True, normalization='power+l2')
+        sparse_bow.codebook = self.bow.codebook
+
+        dense = dense_bow.compute_feature_vectors(self.dummy_descriptors, offsets=offsets)
+        sparse = sparse_bow.compute_feature_vectors(self.dummy_descriptors, offsets=offsets)
+
+        self.assertFalse(dense[1].any())
+        np.testing.assert_allclose(sparse.toarray(), dense)
+
+
+class BoWAssignmentTests(unittest.TestCase):
+    """
+    Class for BoW multiple and soft assignment unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.codebook = rng.random_sample((16, 8))
+        self.local_features = rng.random_sample((200, 8))
+
+    def test_single_neighbor_matches_hard_assignment(self):
+        """Function to test that multiple assignment to one
+        neighbour equals hard assignment.
+        """
+
+        hard = BOW(16)
+        multiple = BOW(16, assignment='multiple', n_neighbors=1)
+        hard.codebook = multiple.codebook = self.codebook
+
+        np.testing.assert_allclose(
+            multiple.compute_feature_vector(self.local_features),
+            hard.compute_feature_vector(self.local_features)
+        )
+
+    def test_soft_assignment_matches_reference(self):
+        """Function to test kernel codebook soft assignment,
+        dense and sparse, against a per-feature reference.
+        """
+
+        bow = BOW(16, assignment='soft', n_neighbors=3, sigma=0.2)
+        bow.codebook = self.codebook
+
+        reference = np.zeros((16,))
+        for local_feature in self.local_features:
+            distances = ((self.codebook - local_feature) ** 2).sum(axis=1)
+            nearest = np.argsort(distances)[:3]
+            weights = np.exp(-distances[nearest] / (2 * 0.2 ** 2))
+            reference[nearest] += weights / weights.sum()
+        reference /= np.linalg.norm(reference)
+
+        np.testing.assert_allclose(bow.compute_feature_vector(self.local_features), reference)
+
+        sparse_bow = BOW(16, sparse=True, assignment='soft', n_neighbors=3, sigma=0.2)
+        sparse_bow.codebook = self.codebook
+
+        np.testing.assert_allclose(
+            sparse_bow.compute_feature_vector(self.local_features).toarray().ravel(),
+            reference
+        )
+
+    def test_invalid_assignment(self):
+        """Function to test that unknown assignment modes,
+        and soft assignment in Hamming space, raise an
+        exception.
+        """
+
+        with self.assertRaises(Exception) as context:
+            BOW(16, assignment='fuzzy')
+
+        self.assertTrue('Assignment must be one of' in str(context.exception))
+
+        with self.assertRaises(Exception) as context:
+            BOW(16, assignment='soft', metric='hamming')
+
+        self.assertTrue('requires the euclidean metric' in str(context.exception))
@@ -0,0 +1,132 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for codebook persistence.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from theama.feature_encoding import BOW, VLAD
+from theama.feature_encoding.codebook_io import read_metadata
+
+
+class CodebookIOTests(unittest.TestCase):
+    """
+    Class for codebook persistence unit tests.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'codebook.bin')
+        self.dummy_descriptors = np.random.random((100, 16))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_and_load_round_trip(self):
+        """Function to test that a saved codebook is loaded
+        back, memory-mapped, with identical values and
+        that the loaded encoder produces the same features.
+        """
+
+        vlad = VLAD(8)
+        vlad.learn_codebook(self.dummy_descriptors)
+        vlad.save(self.path)
+
+        loaded = VLAD.load(self.path)
+
+        self.assertIsInstance(loaded.codebook, np.memmap)
+        np.testing.assert_array_equal(loaded.codebook, vlad.codebook)
+        np.testing.assert_allclose(
+            loaded.compute_feature_vector(self.dummy_descriptors),
+            vlad.compute_feature_vector(self.dummy_descriptors)
+        )
+
+    def test_assignment_mode_is_restored(self):
+        """Function to test that the assignment options are
+        stored with the codebook and restored on load.
+        """
+
+        vlad = VLAD(8, assignment='soft', n_neighbors=3, sigma=0.5)
+        vlad.learn_codebook(self.dummy_descriptors)
+        vlad.save(self.path)
+
+        loaded = VLAD.load(self.path)
+
+        self.assertEqual((loaded.assignment, loaded.n_neighbors, loaded.sigma), ('soft', 3, 0.5))
+        np.testing.assert_allclose(
+            loaded.compute_feature_vector(self.dummy_descriptors),
+            vlad.compute_feature_vector(self.dummy_descriptors)
+        )
+
+    def test_metadata_is_written(self):
+        """Function to test that the codebook metadata is
+        stored in the file header and the data is aligned.
+        """
+
+        bow = BOW(8)
+        bow.learn_codebook(self.dummy_descriptors)
+        bow.save(self.path)
+
+        metadata, data_offset = read_metadata(self.path)
+
+        self.assertEqual(metadata['encoder'], 'BOW')
+        self.assertEqual(metadata['codebook_size'], 8)
+        self.assertEqual(metadata['dimension'], 16)
+        self.assertEqual(data_offset % 64, 0)
+
+    def test_normalization_is_restored(self):
+        """Function to test that the normalisation pipeline
+        and empty policy are stored with the codebook and
+        restored on load.
+        """
+
+        vlad = VLAD(8, normalization=['intra', 'l2'], empty='nan')
+        vlad.learn_codebook(self.dummy_descriptors)
+        vlad.save(self.path)
+
+        metadata, _ = read_metadata(self.path)
+        loaded = VLAD.load(self.path)
+
+        self.assertEqual(metadata['normalization'], 'intra+l2')
+        self.assertEqual((loaded.normalization, loaded.empty), ('intra+l2', 'nan'))
+
+    def test_precision_is_restored(self):
+        """Function to test that the data type and output
+        data type are stored with the codebook, and that a
+        float32 codebook is memory-mapped as float32.
+        """
+
+        bow = BOW(8, dtype='float32', output_dtype='float16')
+        bow.learn_codebook(self.dummy_descriptors)
+        bow.save(self.path)
+
+        loaded = BOW.load(self.path)
+
+        self.assertEqual((loaded.dtype, loaded.output_dtype), ('float32', 'float16'))
+        self.assertEqual(loaded.codebook.dtype, np.float32)
+        self.assertEqual(loaded.compute_feature_vector(self.dummy_descriptors).dtype, np.float16)
+
+    def test_load_wrong_encoder_type(self):
+        """Function to test that loading a codebook with the
+        wrong encoder class raises an exception.
+        """
+
+        bow = BOW(8)
+        bow.learn_codebook(self.dummy_descriptors)
+        bow.save(self.path)
+
+        with self.assertRaises(Exception) as context:
+            VLAD.load(self.path)
+
+        self.assertTrue('saved by a BOW encoder' in str(context.exception))
@@ -0,0 +1,170 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the Fisher Vector implementation.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from theama.feature_encoding import FV
+
+
+class FVTests(unittest.TestCase):
+    """
+    Class for Fisher Vector unit tests.
+    """
+
+    def setUp(self):
+        self.K = 4
+        self.D = 8
+        rng = np.random.RandomState(0)
+        centers = rng.randn(self.K, self.D) * 5
+        self.dummy_descriptors = np.concatenate([
+            center + rng.randn(100, self.D) for center in centers
+        ])
+        rng.shuffle(self.dummy_descriptors)
+        self.fv = FV(self.K)
+
+    def test_compute_fv_without_codebook_creation(self):
+        """Function to test successful error raising when
+        compute_feature_vector is called before learning
+        the mixture.
+        """
+
+        with self.assertRaises(Exception) as context:
+            self.fv.compute_feature_vector(self.dummy_descriptors)
+
+        self.assertTrue('Please run learn_codebook method.' in str(context.exception))
+
+    def test_compute_fv_matches_reference(self):
+        """Function to test that the chunked Fisher Vector
+        computation matches a direct implementation of the
+        gradient formulas.
+        """
+
+        self.fv.learn_codebook(self.dummy_descriptors, random_state=0)
+        self.fv.chunk_size = 64
+
+        x = self.dummy_descriptors[:50]
+        weights, means, variances = self.fv.weights, self.fv.codebook, self.fv.variances
+
+        log_densities = -0.5 * (
+            np.log(2 * np.pi * variances).sum(axis=1)
+            + (((x[:, None] - means) ** 2) / variances).sum(axis=2)
+        ) + np.log(weights)
+        posteriors = np.exp(log_densities - log_densities.max(axis=1, keepdims=True))
+        posteriors /= posteriors.sum(axis=1, keepdims=True)
+
+        normalized = (x[:, None] - means) / np.sqrt(variances)
+        mean_gradients = (posteriors[..., None] * normalized).sum(axis=0) \
+            / (len(x) * np.sqrt(weights)[:, None])
+        variance_gradients = (posteriors[..., None] * (normalized ** 2 - 1)).sum(axis=0) \
+            / (len(x) * np.sqrt(2 * weights)[:, None])
+
+        reference = np.concatenate([mean_gradients.ravel(), variance_gradients.ravel()])
+        reference = np.sign(reference) * np.sqrt(np.abs(reference))
+        reference /= np.linalg.norm(reference)
+
+        fisher_vector = self.fv.compute_feature_vector(x)
+
+        self.assertEqual(fisher_vector.shape, (2 * self.K * self.D,))
+        np.testing.assert_allclose(fisher_vector, reference, atol=1e-6)
+
+    def test_compute_fv_batch_matches_single(self):
+        """Function to test that batch encoding with offsets
+        matches per-image encoding, including segments that
+        span posterior chunks.
+        """
+
+        self.fv.learn_codebook(self.dummy_descriptors, random_state=0)
+        self.fv.chunk_size = 32
+
+        offsets = [0, 10, 100, 101, 400]
+        expected = np.array([
+            self.fv.compute_feature_vector(self.dummy_descriptors[start:stop])
+            for start, stop in zip(offsets[:-1], offsets[1:])
+        ])
+
+        np.testing.assert_allclose(
+            self.fv.compute_feature_vectors(self.dummy_descriptors, offsets=offsets),
+            expected,
+            atol=1e-10
+        )
+
+    def test_process_backend_matches_serial(self):
+        """Function to test that encoding on a process pool
+        with a shared-memory mixture gives the same result as
+        serial encoding.
+        """
+
+        self.fv.learn_codebook(self.dummy_descriptors, random_state=0)
+        batch = np.array_split(self.dummy_descriptors, 5)
+
+        parallel = FV(self.K, n_jobs=2, backend='process')
+        parallel.weights, parallel.codebook, parallel.variances = \
+            self.fv.weights, self.fv.codebook, self.fv.variances
+
+        np.testing.assert_allclose(
+            parallel.compute_feature_vectors(batch),
+            self.fv.compute_feature_vectors(batch),
+            atol=1e-12
+        )
+
+    def test_streamed_mixture_matches_in_memory(self):
+        """Function to test that EM streamed over a list of
+        chunks finds the same components as in-memory
+        fitting.
+        """
+
+        self.fv.learn_codebook(self.dummy_descriptors, random_state=0)
+
+        streamed = FV(self.K)
+        streamed.learn_codebook(np.array_split(self.dummy_descriptors, 7), random_state=0)
+
+        order = [np.linalg.norm(self.fv.codebook - mean, axis=1).argmin()
+                 for mean in streamed.codebook]
+
+        self.assertEqual(sorted(order), list(range(self.K)))
+        np.testing.assert_allclose(streamed.codebook, self.fv.codebook[order], atol=1e-2)
+        np.testing.assert_allclose(streamed.weights, self.fv.weights[order], atol=1e-2)
+
+    def test_streaming_requires_reiterable_data(self):
+        """Function to test that a one-shot generator cannot
+        be streamed through EM.
+        """
+
+        with self.assertRaises(Exception) as context:
+            self.fv.learn_codebook(chunk for chunk in np.array_split(self.dummy_descriptors, 4))
+
+        self.assertTrue('read several' in str(context.exception))
+
+    def test_save_and_load(self):
+        """Function to test that a saved mixture loads back
+        memory-mapped and gives the same encoding.
+        """
+
+        self.fv.learn_codebook(self.dummy_descriptors, random_state=0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'fv.cb')
+            self.fv.save(path)
+            loaded = FV.load(path)
+
+            np.testing.assert_allclose(
+                loaded.compute_feature_vector(self.dummy_descriptors),
+                self.fv.compute_feature_vector(self.dummy_descriptors)
+            )
+            del loaded
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for parallel batch encoding.
+"""
+
+import unittest
+
+import numpy as np
+
+from theama.feature_encoding import BOW, VLAD
+from theama.feature_encoding.parallel import split_segments
+
+
+class ParallelEncodingTests(unittest.TestCase):
+    """
+    Class for parallel encoding unit tests.
+    """
+
+    def setUp(self):
+        self.codebook_size = 16
+        self.dummy_descriptors = np.random.random((400, 32))
+        self.batch = np.array_split(self.dummy_descriptors, 9)
+        self.codebook = np.random.random((self.codebook_size, 32))
+
+    def test_split_segments_covers_all_segments(self):
+        """Function to test that the segment split is
+        contiguous and covers every segment exactly once.
+        """
+
+        offsets = np.array([0, 10, 10, 50, 51, 90, 100])
+
+        groups = split_segments(offsets, 4)
+
+        self.assertEqual(groups[0][0], 0)
+        self.assertEqual(groups[-1][1], len(offsets) - 1)
+        for (_, stop), (first, _) in zip(groups[:-1], groups[1:]):
+            self.assertEqual(stop, first)
+
+    def test_thread_backend_matches_serial(self):
+        """Function to test that encoding on a thread pool
+        gives the same result, in the same order, as serial
+        encoding.
+        """
+
+        for encoder_class in (BOW, VLAD):
+            serial = encoder_class(self.codebook_size)
+            parallel = encoder_class(self.codebook_size, n_jobs=3)
+            serial.codebook = parallel.codebook = self.codebook
+
+            np.testing.assert_allclose(
+                parallel.compute_feature_vectors(self.batch),
+                serial.compute_feature_vectors(self.batch)
+            )
+
+    def test_process_backend_matches_serial(self):
+        """Function to test that encoding on a process pool
+        with a shared-memory codebook gives the same result,
+        in the same order, as serial encoding.
+        """
+
+        serial = VLAD(self.codebook_size)
+        parallel = VLAD(self.codebook_size, n_jobs=2, backend='process')
+        serial.codebook = parallel.codebook = self.codebook
+
+        np.testing.assert_allclose(
+            parallel.compute_feature_vectors(self.batch),
+            serial.compute_feature_vectors(self.batch)
+        )
+
+    def test_process_backend_soft_assignment(self):
+        """Function to test that soft assignment with an
+        estimated kernel width gives the same result on a
+        process pool as serially, after the width has been
+        cached by a serial call.
+        """
+
+        serial = VLAD(self.codebook_size, assignment='soft', n_neighbors=3)
+        parallel = VLAD(self.codebook_size, assignment='soft', n_neighbors=3, n_jobs=2, backend='process')
+        serial.codebook = parallel.codebook = self.codebook
+
+        parallel.compute_feature_vector(self.dummy_descriptors)
+
+        np.testing.assert_allclose(
+            parallel.compute_feature_vectors(self.batch),
+            serial.compute_feature_vectors(self.batch)
+        )
+        self.assertIsNone(parallel.sigma)
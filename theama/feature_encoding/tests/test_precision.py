@@ -0,0 +1,168 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the reduced-precision compute
+paths and quantised outputs of the feature encoders.
+"""
+
+import unittest
+
+import numpy as np
+
+from theama.feature_encoding import BOW, FV, VLAD
+from theama.feature_encoding.quantization import INT8_SCALE, dequantize
+
+
+class PrecisionTests(unittest.TestCase):
+    """
+    Class for reduced-precision unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.K = 16
+        self.D = 32
+        self.local_features = rng.random_sample((400, self.D))
+        self.offsets = [0, 150, 150, 400]
+        self.codebook = rng.random_sample((self.K, self.D))
+
+    def tearDown(self):
+        pass
+
+    def _encode(self, encoder_class, dtype, **kwargs):
+        """Function to encode the batch with a given data
+        type and a shared codebook.
+        """
+
+        encoder = encoder_class(self.K, dtype=dtype, **kwargs)
+        encoder.codebook = self.codebook
+
+        return encoder.compute_feature_vectors(self.local_features, offsets=self.offsets)
+
+    def test_float32_matches_float64(self):
+        """Function to test that float32 VLAD and BoW, with
+        hard and soft assignment, are float32 throughout and
+        agree with float64 within tolerance.
+        """
+
+        for encoder_class in (VLAD, BOW):
+            for kwargs in ({}, {'assignment': 'soft', 'n_neighbors': 3},
+                           {'normalization': 'intra+power+l2'}):
+                single = self._encode(encoder_class, 'float32', **kwargs)
+                double = self._encode(encoder_class, 'float64', **kwargs)
+
+                self.assertEqual(single.dtype, np.float32)
+                self.assertEqual(double.dtype, np.float64)
+                np.testing.assert_allclose(single, double, atol=1e-5)
+
+    def test_float32_intra_normalization_keeps_small_blocks(self):
+        """Function to test that a small residual block next
+        to a large cluster survives float32 intra-normalisation,
+        giving both visual words equal weight as in float64.
+        """
+
+        rng = np.random.RandomState(0)
+        codebook = np.array([[100.0, 100.0], [-100.0, -100.0]])
+        local_features = np.concatenate([
+            codebook[0] + rng.uniform(0, 10, (1000, 2)),
+            codebook[1:] + [0.4, 0.4]
+        ])
+
+        results = []
+        for dtype in ('float32', 'float64'):
+            vlad = VLAD(2, dtype=dtype, normalization='intra+l2')
+            vlad.codebook = codebook
+            results.append(vlad.compute_feature_vector(local_features))
+
+        np.testing.assert_allclose(np.linalg.norm(results[0].reshape(2, 2), axis=1), [0.5 ** 0.5] * 2, atol=1e-5)
+        np.testing.assert_allclose(results[0], results[1], atol=1e-5)
+
+    def test_float32_fisher_vectors_match_float64(self):
+        """Function to test that float32 Fisher vectors agree
+        with float64 Fisher vectors of the same mixture.
+        """
+
+        fv = FV(4)
+        fv.learn_codebook(self.local_features, random_state=0)
+
+        single = FV(4, dtype='float32')
+        single.codebook, single.weights, single.variances = fv.codebook, fv.weights, fv.variances
+
+        expected = fv.compute_feature_vectors(self.local_features, offsets=self.offsets)
+        result = single.compute_feature_vectors(self.local_features, offsets=self.offsets)
+
+        self.assertEqual(single.codebook.dtype, np.float32)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, expected, atol=1e-4)
+
+    def test_learned_codebook_dtype(self):
+        """Function to test that learned codebooks are stored
+        in the data type of the encoder.
+        """
+
+        vlad = VLAD(self.K, dtype=np.float32)
+        vlad.learn_codebook(self.local_features, random_state=0)
+
+        self.assertEqual(vlad.dtype, 'float32')
+        self.assertEqual(vlad.codebook.dtype, np.float32)
+
+    def test_quantized_outputs(self):
+        """Function to test that int8 and float16 outputs,
+        dense and sparse, dequantise to the float32 feature
+        vectors within their resolution.
+        """
+
+        expected = self._encode(VLAD, 'float32')
+
+        codes = self._encode(VLAD, 'float32', output_dtype='int8')
+        halves = self._encode(VLAD, 'float32', output_dtype='float16')
+
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertEqual(halves.dtype, np.float16)
+        np.testing.assert_allclose(dequantize(codes), expected, atol=0.5 / INT8_SCALE + 1e-6)
+        np.testing.assert_allclose(dequantize(halves), expected, atol=1e-3)
+
+        sparse_bow = BOW(self.K, sparse=True, dtype='float32', output_dtype='int8')
+        sparse_bow.codebook = self.codebook
+        sparse_codes = sparse_bow.compute_feature_vectors(self.local_features, offsets=self.offsets)
+
+        self.assertEqual(sparse_codes.dtype, np.int8)
+        np.testing.assert_allclose(
+            dequantize(sparse_codes).toarray(),
+            self._encode(BOW, 'float32'),
+            atol=0.5 / INT8_SCALE + 1e-6
+        )
+
+        with self.assertRaises(Exception) as context:
+            BOW(self.K, sparse=True, output_dtype='float16')
+
+        self.assertTrue('do not support float16 output' in str(context.exception))
+
+    def test_invalid_precision_options(self):
+        """Function to test that unsupported data types and
+        int8 output without bounded values raise exceptions.
+        """
+
+        with self.assertRaises(Exception) as context:
+            VLAD(self.K, dtype='int32')
+
+        self.assertTrue('Data type must be one of' in str(context.exception))
+
+        with self.assertRaises(Exception) as context:
+            VLAD(self.K, output_dtype='uint8')
+
+        self.assertTrue('Output data type must be one of' in str(context.exception))
+
+        with self.assertRaises(Exception) as context:
+            VLAD(self.K, normalization='power', output_dtype='int8')
+
+        self.assertTrue('requires l2 or intra normalization' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
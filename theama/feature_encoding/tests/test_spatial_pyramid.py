@@ -0,0 +1,200 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for spatial pyramid pooling in the
+feature encoders.
+"""
+
+import unittest
+
+import numpy as np
+
+from theama.feature.interest_point.utils import KEYPOINT_DTYPE
+from theama.feature_encoding import BOW, FV, VLAD
+from theama.feature_encoding.spatial_pyramid import parse_grids, pyramid_region_ids
+
+
+class SpatialPyramidTests(unittest.TestCase):
+    """
+    Class for spatial pyramid unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.K = 8
+        self.D = 16
+        self.image_shape = (60, 90)
+        self.local_features = rng.random_sample((200, self.D))
+        self.positions = rng.random_sample((200, 2)) * [90, 60]
+        self.offsets = [0, 80, 80, 200]
+        self.codebook = rng.random_sample((self.K, self.D))
+
+    def tearDown(self):
+        pass
+
+    def _reference(self, encoder, grids):
+        """Function to compute pyramid vectors by encoding
+        the local features of every region separately with
+        an unnormalised copy of the encoder.
+        """
+
+        region_encoder = type(encoder)(
+            self.K,
+            assignment=encoder.assignment,
+            n_neighbors=encoder.n_neighbors,
+            sigma=encoder.sigma,
+            normalization=None
+        )
+        region_encoder.codebook = self.codebook
+
+        height, width = self.image_shape
+        feature_vectors = []
+        for start, stop in zip(self.offsets[:-1], self.offsets[1:]):
+            features = self.local_features[start:stop]
+            x, y = self.positions[start:stop].T
+
+            regions = []
+            for rows, columns in grids:
+                for row in range(rows):
+                    for column in range(columns):
+                        inside = (np.floor(y * rows / height) == row) & \
+                                 (np.floor(x * columns / width) == column)
+                        regions.append(region_encoder.compute_feature_vector(features[inside]))
+
+            vector = np.concatenate(regions)
+            norm = np.linalg.norm(vector)
+            feature_vectors.append(vector / norm if norm else vector)
+
+        return np.array(feature_vectors)
+
+    def test_vlad_pyramid_matches_per_region_encoding(self):
+        """Function to test that the single-pass VLAD
+        pyramid matches encoding every region separately,
+        and that empty images give zero vectors.
+        """
+
+        vlad = VLAD(self.K)
+        vlad.codebook = self.codebook
+        grids = ((1, 1), (2, 2), (3, 1))
+
+        feature_vectors = vlad.compute_pyramid_feature_vectors(
+            self.local_features,
+            self.positions,
+            offsets=self.offsets,
+            image_shapes=self.image_shape,
+            grids=grids
+        )
+
+        self.assertEqual(feature_vectors.shape, (3, 8 * self.K * self.D))
+        self.assertFalse(feature_vectors[1].any())
+        np.testing.assert_allclose(feature_vectors, self._reference(vlad, grids), atol=1e-10)
+
+    def test_soft_bow_pyramid_matches_per_region_encoding(self):
+        """Function to test the BoW pyramid with soft
+        assignment, dense and sparse, against encoding
+        every region separately.
+        """
+
+        bow = BOW(self.K, assignment='soft', n_neighbors=3, sigma=0.3)
+        bow.codebook = self.codebook
+        sparse_bow = BOW(self.K, sparse=True, assignment='soft', n_neighbors=3, sigma=0.3)
+        sparse_bow.codebook = self.codebook
+        grids = ((1, 1), (2, 3))
+
+        reference = self._reference(bow, grids)
+        batch = [self.local_features[:80], None, self.local_features[80:]]
+        positions = [self.positions[:80], np.zeros((0, 2)), self.positions[80:]]
+
+        np.testing.assert_allclose(
+            bow.compute_pyramid_feature_vectors(batch, positions, image_shapes=self.image_shape, grids=grids),
+            reference,
+            atol=1e-10
+        )
+        np.testing.assert_allclose(
+            sparse_bow.compute_pyramid_feature_vectors(
+                batch, positions, image_shapes=self.image_shape, grids=grids
+            ).toarray(),
+            reference,
+            atol=1e-10
+        )
+
+    def test_keypoint_positions_and_parallel_encoding(self):
+        """Function to test that positions given as a
+        structured keypoint array are accepted, and that
+        threaded encoding matches serial encoding.
+        """
+
+        keypoints = np.zeros((len(self.positions),), dtype=KEYPOINT_DTYPE)
+        keypoints['x'], keypoints['y'] = self.positions.T
+
+        vlad = VLAD(self.K)
+        vlad.codebook = self.codebook
+        threaded = VLAD(self.K, n_jobs=2)
+        threaded.codebook = self.codebook
+
+        expected = vlad.compute_pyramid_feature_vectors(self.local_features, self.positions, self.offsets)
+
+        np.testing.assert_allclose(
+            threaded.compute_pyramid_feature_vectors(self.local_features, keypoints, self.offsets),
+            expected,
+            atol=1e-10
+        )
+        np.testing.assert_allclose(
+            vlad.compute_pyramid_feature_vector(self.local_features[80:], keypoints[80:]),
+            expected[2],
+            atol=1e-10
+        )
+
+    def test_region_ids_use_bounding_box_without_shape(self):
+        """Function to test that regions divide the bounding
+        box of the positions when no image shape is given.
+        """
+
+        positions = np.array([[10.0, 20.0], [30.0, 20.0], [10.0, 40.0], [30.0, 40.0]])
+
+        region_ids, n_regions = pyramid_region_ids(
+            positions,
+            np.zeros((4,), dtype=np.intp),
+            1,
+            ((1, 1), (2, 2))
+        )
+
+        self.assertEqual(n_regions, 5)
+        np.testing.assert_array_equal(region_ids, [[0, 1], [0, 2], [0, 3], [0, 4]])
+
+    def test_invalid_inputs(self):
+        """Function to test that invalid grids, mismatched
+        positions and Fisher vectors raise exceptions.
+        """
+
+        with self.assertRaises(Exception) as context:
+            parse_grids(((2, 0),))
+
+        self.assertTrue('Grids must be' in str(context.exception))
+
+        vlad = VLAD(self.K)
+        vlad.codebook = self.codebook
+
+        with self.assertRaises(Exception) as context:
+            vlad.compute_pyramid_feature_vector(self.local_features, self.positions[:10])
+
+        self.assertTrue('one position per local feature' in str(context.exception))
+
+        fv = FV(self.K)
+        fv.codebook = self.codebook
+        fv.weights = np.full((self.K,), 1.0 / self.K)
+        fv.variances = np.ones((self.K, self.D))
+
+        with self.assertRaises(Exception) as context:
+            fv.compute_pyramid_feature_vector(self.local_features, self.positions)
+
+        self.assertTrue('not supported by Fisher vectors' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for streaming codebook learning.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from theama.feature_encoding import BOW, VLAD
+from theama.feature_encoding.streaming import rebatch, reservoir_sample
+
+
+class StreamingTests(unittest.TestCase):
+    """
+    Class for streaming codebook learning unit tests.
+    """
+
+    def setUp(self):
+        self.codebook_size = 8
+        self.D = 16
+        self.dummy_descriptors = np.random.random((3000, self.D))
+
+    def chunks(self):
+        return (chunk for chunk in np.array_split(self.dummy_descriptors, 7))
+
+    def test_rebatch_sizes(self):
+        """Function to test that chunks are regrouped into
+        batches of the requested size without losing rows.
+        """
+
+        batches = list(rebatch(self.chunks(), 1000))
+
+        self.assertEqual([len(batch) for batch in batches], [1000, 1000, 1000])
+        np.testing.assert_array_equal(np.concatenate(batches), self.dummy_descriptors)
+
+    def test_reservoir_sample_respects_limits(self):
+        """Function to test that reservoir sampling keeps at
+        most the requested number of rows, and respects the
+        memory budget.
+        """
+
+        sample = reservoir_sample(self.chunks(), 500, random_state=0)
+        self.assertEqual(sample.shape, (500, self.D))
+
+        sample = reservoir_sample(self.chunks(), None, max_memory=100 * self.D * 8)
+        self.assertEqual(sample.shape, (100, self.D))
+
+    def test_learn_codebook_from_iterator(self):
+        """Function to test that a codebook can be learned
+        incrementally from an iterator of chunks.
+        """
+
+        vlad = VLAD(self.codebook_size)
+        vlad.learn_codebook(self.chunks(), batch_size=256)
+
+        self.assertEqual(vlad.codebook.shape, (self.codebook_size, self.D))
+
+    def test_learn_codebook_from_iterator_with_sampling(self):
+        """Function to test that a codebook can be learned
+        from a reservoir sample of an iterator of chunks,
+        including with full K-Means.
+        """
+
+        bow = BOW(self.codebook_size)
+        bow.learn_codebook(self.chunks(), mini_batch_kmeans=False, max_samples=400)
+
+        self.assertEqual(bow.codebook.shape, (self.codebook_size, self.D))
+
+    def test_learn_codebook_from_memmap(self):
+        """Function to test that a codebook can be learned
+        from a memory-mapped data matrix.
+        """
+
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'descriptors.npy')
+            np.save(path, self.dummy_descriptors)
+
+            bow = BOW(self.codebook_size)
+            bow.learn_codebook(np.load(path, mmap_mode='r'))
+
+            self.assertEqual(bow.codebook.shape, (self.codebook_size, self.D))
+        finally:
+            shutil.rmtree(directory)
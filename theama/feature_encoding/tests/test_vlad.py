@@ -63,4 +63,153 @@ class VLADTests(unittest.TestCase):
         vlad_descriptor = self.vlad.compute_feature_vector(self.dummy_descriptors)
         vlad_descriptor_dimension = len(vlad_descriptor)
 
-        self.assertEqual(vlad_descriptor_dimension, self.D * self.K)
\ No newline at end of file
+        self.assertEqual(vlad_descriptor_dimension, self.D * self.K)
+
+    def test_compute_vlad_matches_reference(self):
+        """Function to test that the vectorised VLAD
+        computation matches a straightforward per-feature
+        reference implementation. Asserts that the two
+        descriptors are numerically equal.
+        """
+
+        self.vlad.learn_codebook(self.dummy_descriptors)
+        codebook = self.vlad.codebook
+
+        reference = np.zeros_like(codebook)
+        for local_feature in self.dummy_descriptors:
+            index = np.linalg.norm(codebook - local_feature, axis=1).argmin()
+            reference[index] += local_feature - codebook[index]
+        reference = reference.ravel() / np.linalg.norm(reference)
+
+        vlad_descriptor = self.vlad.compute_feature_vector(self.dummy_descriptors)
+
+        np.testing.assert_allclose(vlad_descriptor, reference, atol=1e-10)
+
+    def test_compute_vlad_batch_matches_single(self):
+        """Function to test that batch VLAD computation from
+        a list of data matrices, and from a concatenated
+        data matrix with offsets, matches per-image
+        computation. Asserts that all descriptors are equal.
+        """
+
+        self.vlad.learn_codebook(self.dummy_descriptors)
+        batch = [self.dummy_descriptors[:30], self.dummy_descriptors[30:]]
+
+        expected = np.array([self.vlad.compute_feature_vector(x) for x in batch])
+        from_list = self.vlad.compute_feature_vectors(batch)
+        from_offsets = self.vlad.compute_feature_vectors(
+            self.dummy_descriptors,
+            offsets=[0, 30, 100]
+        )
+
+        self.assertEqual(from_list.shape, (2, self.D * self.K))
+        np.testing.assert_allclose(from_list, expected, atol=1e-10)
+        np.testing.assert_allclose(from_offsets, expected, atol=1e-10)
+
+    def test_soft_vlad_matches_reference(self):
+        """Function to test that soft-assignment VLAD, with
+        the kernel width estimated from the codebook, matches
+        a per-feature reference of weighted residuals.
+        """
+
+        self.vlad.learn_codebook(self.dummy_descriptors)
+        codebook = self.vlad.codebook
+
+        soft = VLAD(self.K, assignment='soft', n_neighbors=4)
+        soft.codebook = codebook
+
+        codebook_distances = ((codebook[:, None] - codebook[None]) ** 2).sum(axis=2)
+        np.fill_diagonal(codebook_distances, np.inf)
+        sigma = 0.5 * np.sqrt(np.median(codebook_distances.min(axis=1)))
+
+        reference = np.zeros_like(codebook)
+        for local_feature in self.dummy_descriptors:
+            distances = ((codebook - local_feature) ** 2).sum(axis=1)
+            nearest = np.argsort(distances)[:4]
+            weights = np.exp(-(distances[nearest] - distances[nearest[0]]) / (2 * sigma ** 2))
+            weights /= weights.sum()
+            reference[nearest] += weights[:, None] * (local_feature - codebook[nearest])
+        reference = reference.ravel() / np.linalg.norm(reference)
+
+        np.testing.assert_allclose(
+            soft.compute_feature_vector(self.dummy_descriptors),
+            reference,
+            atol=1e-10
+        )
+
+    def test_intra_power_l2_matches_reference(self):
+        """Function to test that the intra+power+l2
+        normalisation pipeline matches a reference that
+        normalises every visual word block, takes the signed
+        square root, and L2-normalises the result. The
+        descriptors are held out from codebook learning, so
+        none coincides with its visual word.
+        """
+
+        self.vlad.learn_codebook(self.dummy_descriptors)
+        codebook = self.vlad.codebook
+        local_features = np.random.random((100, self.D))
+
+        normalized = VLAD(self.K, normalization='intra+power+l2')
+        normalized.codebook = codebook
+
+        reference = np.zeros_like(codebook)
+        for local_feature in local_features:
+            index = np.linalg.norm(codebook - local_feature, axis=1).argmin()
+            reference[index] += local_feature - codebook[index]
+        norms = np.linalg.norm(reference, axis=1, keepdims=True)
+        reference /= np.where(norms == 0, 1, norms)
+        reference = np.sign(reference) * np.sqrt(np.abs(reference))
+        reference = reference.ravel() / np.linalg.norm(reference)
+
+        np.testing.assert_allclose(
+            normalized.compute_feature_vector(local_features),
+            reference,
+            atol=1e-10
+        )
+
+    def test_empty_image_policies(self):
+        """Function to test that an image without local
+        features gives a zero vector by default, a NaN
+        vector with the nan policy, and an exception with
+        the raise policy, without affecting other images.
+        """
+
+        self.vlad.learn_codebook(self.dummy_descriptors)
+        offsets = [0, 50, 50, 100]
+
+        feature_vectors = self.vlad.compute_feature_vectors(self.dummy_descriptors, offsets=offsets)
+
+        self.assertFalse(np.isnan(feature_vectors).any())
+        self.assertFalse(feature_vectors[1].any())
+        np.testing.assert_allclose(np.linalg.norm(feature_vectors[[0, 2]], axis=1), 1)
+
+        nan_vlad = VLAD(self.K, empty='nan')
+        nan_vlad.codebook = self.vlad.codebook
+        feature_vectors = nan_vlad.compute_feature_vectors(self.dummy_descriptors, offsets=offsets)
+
+        self.assertTrue(np.isnan(feature_vectors[1]).all())
+        self.assertFalse(np.isnan(feature_vectors[[0, 2]]).any())
+
+        raise_vlad = VLAD(self.K, empty='raise')
+        raise_vlad.codebook = self.vlad.codebook
+
+        with self.assertRaises(Exception) as context:
+            raise_vlad.compute_feature_vectors(self.dummy_descriptors, offsets=offsets)
+
+        self.assertTrue('without local features' in str(context.exception))
+
+    def test_invalid_normalization(self):
+        """Function to test that unknown normalisation steps
+        and empty policies raise an exception.
+        """
+
+        with self.assertRaises(Exception) as context:
+            VLAD(self.K, normalization='power+l1')
+
+        self.assertTrue('Normalization steps' in str(context.exception))
+
+        with self.assertRaises(Exception) as context:
+            VLAD(self.K, empty='skip')
+
+        self.assertTrue('Empty policy' in str(context.exception))
@@ -1,7 +1,11 @@
 from .farneback import Farneback
 from .klt import LucasKanade
+from .tracker import KLTTracker
+from .motion_descriptors import MotionDescriptors
 
 __all__ = [
     'Farneback',
-    'LucasKanade'
+    'LucasKanade',
+    'KLTTracker',
+    'MotionDescriptors'
 ]
@@ -14,14 +14,161 @@ algorithm to compute optical flow.
 import numpy as np
 import cv2
 
+from .parallel import farneback_in_parallel
+from .utils import first_frame, iterate_gray_frames
+from ..utils.parallel import effective_n_jobs
+
+# Flow fields first allocated for a stream of unknown length
+_INITIAL_FLOWS = 64
+
 
 class Farneback(object):
     """
     Class for the implementation of the
-    Farneback optical flow algorithm.
+    Farneback optical flow algorithm. The flow parameters
+    are passed to cv2.calcOpticalFlowFarneback, while n_jobs
+    and backend control parallel computation over videos
+    given as arrays.
+
+    To reduce computation and storage, flow can be computed
+    on a region of interest (roi, given as x, y, width,
+    height) and on frames downscaled by scale, and the
+    resulting fields can be average-pooled over square cells
+    of cell_size pixels and stored with a smaller dtype,
+    such as float16. Flow vectors are always expressed in
+    pixels of the original resolution.
     """
 
-    def perform_optical_flow(self, video):
+    def __init__(self, pyr_scale=0.5, levels=3, winsize=15, iterations=3,
+                 poly_n=5, poly_sigma=1.2, flags=0, n_jobs=1, backend='thread',
+                 scale=1.0, roi=None, cell_size=None, dtype=np.float32):
+        self.pyr_scale = pyr_scale
+        self.levels = levels
+        self.winsize = winsize
+        self.iterations = iterations
+        self.poly_n = poly_n
+        self.poly_sigma = poly_sigma
+        self.flags = flags
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.scale = scale
+        self.roi = roi
+        self.cell_size = cell_size
+        self.dtype = np.dtype(dtype)
+
+    def output_shape(self, frame_shape):
+        """Function to compute the shape of the flow fields
+        returned for frames of a given shape.
+
+        Args:
+            frame_shape: Tuple (H, W) of the input frames.
+
+        Returns:
+            Tuple (H', W', 2).
+        """
+
+        height, width = frame_shape[:2]
+        if self.roi is not None:
+            height, width = self.roi[3], self.roi[2]
+
+        height, width = self._scaled_size(height, width)
+
+        if self.cell_size is not None:
+            height, width = height // self.cell_size, width // self.cell_size
+
+        return height, width, 2
+
+    def _scaled_size(self, height, width):
+        """Function to compute the size of a frame after
+        downscaling.
+        """
+
+        if self.scale == 1.0:
+            return height, width
+
+        return max(int(round(height * self.scale)), 1), max(int(round(width * self.scale)), 1)
+
+    def _preprocess(self, frame):
+        """Function to crop a grayscale frame to the region
+        of interest and downscale it.
+        """
+
+        if self.roi is not None:
+            x, y, width, height = self.roi
+            frame = frame[y:y + height, x:x + width]
+
+        if self.scale != 1.0:
+            height, width = self._scaled_size(*frame.shape[:2])
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+        return frame
+
+    def _postprocess(self, flow):
+        """Function to rescale flow vectors to the original
+        resolution, pool them over cells, and cast them to
+        the output dtype.
+        """
+
+        if self.scale != 1.0:
+            flow /= self.scale
+
+        if self.cell_size is not None:
+            cell = self.cell_size
+            rows, columns = flow.shape[0] // cell, flow.shape[1] // cell
+            flow = flow[:rows * cell, :columns * cell] \
+                .reshape(rows, cell, columns, cell, 2) \
+                .mean(axis=(1, 3))
+
+        return flow.astype(self.dtype, copy=False)
+
+    def compute_flow(self, previous_frame, current_frame):
+        """Function to compute the dense optical flow
+        between two grayscale frames.
+
+        Args:
+            previous_frame: Grayscale uint8 frame.
+            current_frame: Grayscale uint8 frame.
+
+        Returns:
+            Flow field of shape (H, W, 2) and type float32.
+        """
+
+        return cv2.calcOpticalFlowFarneback(
+            previous_frame,
+            current_frame,
+            None,
+            self.pyr_scale,
+            self.levels,
+            self.winsize,
+            self.iterations,
+            self.poly_n,
+            self.poly_sigma,
+            self.flags
+        )
+
+    def stream_optical_flow(self, video):
+        """Function to compute optical flow lazily, yielding
+        one flow field per pair of successive frames as soon
+        as it is available. Only two frames are held in
+        memory at a time.
+
+        Args:
+            video: Video as a numpy array, or any iterable of
+                   frames, such as a streaming reader from
+                   theama.utils.streaming.
+
+        Yields:
+            Flow fields of shape output_shape((H, W)).
+        """
+
+        frames = (self._preprocess(frame) for frame in iterate_gray_frames(video))
+        previous_frame = first_frame(frames)
+
+        for current_frame in frames:
+            yield self._postprocess(self.compute_flow(previous_frame, current_frame))
+            previous_frame = current_frame
+
+    def perform_optical_flow(self, video, out=None):
         """Function to compute optical flow by using
         the Farneback algorithm. This is an example of dense optical flow
         which computes the optical flow for all points in a given frame.
@@ -30,23 +177,87 @@ class Farneback(object):
         the original video since optical flow is computed between two
         successive frames.
 
+        When n_jobs is not 1 and the video is an array, the frame
+        pairs are split into contiguous chunks, overlapping by one
+        frame, that are computed on a thread or process pool. The
+        result is identical to the serial computation.
+
         Args:
-            video: is the video fed in as a numpy array.
-        """
-        if not isinstance(video, np.ndarray):
-            raise Exception("Not a numpy array")
-        if len(video.shape) < 3 or len(video.shape) > 4:
-            raise Exception("Not a video numpy file")
-
-        video = video.astype('uint8')
-        frames, _, _, _ = video.shape
-        previous_frame = cv2.cvtColor(video[0], cv2.COLOR_BGR2GRAY)
-        flows = []
-        for i in range(1, frames):
-            current_frame = cv2.cvtColor(video[i], cv2.COLOR_BGR2GRAY)
-            flow = cv2.calcOpticalFlowFarneback(previous_frame, current_frame,
-                                                0.5, 3, 15, 3, 5, 1.2, 0)
-            flows.append(flow)
-            previous_frame = current_frame
+            video: is the video fed in as a numpy array, or any
+                   iterable of frames, such as a streaming reader
+                   from theama.utils.streaming.
+            out: Optional preallocated, or memory-mapped, array of
+                 shape (T - 1,) + output_shape((H, W)) to write the
+                 flow fields into.
+
+        Returns:
+            Array of flow fields of shape (T - 1,) + output_shape((H, W)).
+        """
+
+        if isinstance(video, np.ndarray):
+            if len(video.shape) < 3 or len(video.shape) > 4:
+                raise Exception("Not a video numpy file")
+            if len(video) == 0:
+                raise Exception("Video must have at least one frame")
+
+            n_flows = len(video) - 1
+            if out is None:
+                out = np.empty((n_flows,) + self.output_shape(video.shape[1:3]), dtype=self.dtype)
+            elif len(out) < n_flows:
+                raise Exception("Output array is too short for the video")
+            elif len(out) > n_flows:
+                out = out[:n_flows]
+
+            n_jobs = effective_n_jobs(self.n_jobs)
+            if n_jobs > 1 and n_flows > 1:
+                farneback_in_parallel(self, video, out, n_jobs, self.backend)
+                return out
+
+        flows = self.stream_optical_flow(video)
+
+        if out is None:
+            return self._collect_flows(flows, len(video) - 1 if hasattr(video, '__len__') else None)
+
+        n_flows = 0
+        for i, flow in enumerate(flows):
+            if i >= len(out):
+                raise Exception("Output array is too short for the video")
+            out[i] = flow
+            n_flows = i + 1
+
+        return out[:n_flows]
+
+    def _collect_flows(self, flows, n_flows=None):
+        """Function to gather streamed flow fields into a
+        single array, allocated from the shape of the first
+        flow field. When the number of flow fields is not
+        known, the array is grown by doubling and trimmed at
+        the end, with in-place reallocation, so the flow
+        stack is not held twice.
+
+        Args:
+            flows: Iterable of flow fields.
+            n_flows: Expected number of flow fields, if known.
+
+        Returns:
+            Array of the stacked flow fields.
+        """
+
+        out = None
+        count = 0
+        for flow in flows:
+            if out is None:
+                out = np.empty((max(n_flows or _INITIAL_FLOWS, 1),) + flow.shape, dtype=self.dtype)
+            elif count == len(out):
+                out.resize((2 * count,) + flow.shape, refcheck=False)
+
+            out[count] = flow
+            count += 1
+
+        if out is None:
+            return np.empty((0,), dtype=self.dtype)
+
+        if count < len(out):
+            out.resize((count,) + out.shape[1:], refcheck=False)
 
-        return np.array(flows)
+        return out
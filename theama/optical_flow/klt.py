@@ -18,6 +18,8 @@ to detect features.
 import numpy as np
 import cv2
 
+from .utils import first_frame, iterate_gray_frames, track_points
+
 
 class LucasKanade(object):
     """
@@ -25,28 +27,33 @@ class LucasKanade(object):
     Lucas-Kanade optical flow algorithm.
     """
 
-    def __init__(self, feature_params=None, lk_params=None):
+    def __init__(self, feature_params=None, lk_params=None, forward_backward_threshold=None):
         self.feature_params = feature_params
         self.lk_params = lk_params
+        self.forward_backward_threshold = forward_backward_threshold
 
     def perform_optical_flow(self, video, recompute_lost_points=True):
         """Function to compute optical flow by using
         the Lucas-Kanade algorithm. This is an example of sparse optical flow
         which computes the optical flow for selected points in a given frame.
 
-        Returns the set of points tracked throughout the video
+        Returns the set of points tracked throughout the video, as an
+        object array with one array of points per frame. See
+        KLTTracker for an incremental tracker with track identities.
+        When forward_backward_threshold is set, points whose
+        forward-backward tracking error exceeds it, in pixels, are
+        discarded.
 
         Args:
-            video: is the video fed in as a numpy array.
+            video: is the video fed in as a numpy array, or any
+                   iterable of frames, such as a streaming reader
+                   from theama.utils.streaming.
             recompute_lost_points: If 'True', once tracked points are lost
             new features are computed to be tracked. If 'False' only original
             points are tracked and returned. Default is 'True'.
         """
 
-        if not isinstance(video, np.ndarray):
-            raise Exception("Not a numpy array")
-        if len(video.shape) < 3 or len(video.shape) > 4:
-            raise Exception("Not a video numpy file")
+        frames = iterate_gray_frames(video)
 
         # params for ShiTomasi corner detection
         if self.feature_params is None:
@@ -62,46 +69,36 @@ class LucasKanade(object):
                                   criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT,
                                             10, 0.03))
 
-        video = video.astype('uint8')
-        frames, _, _, _ = video.shape
-        old_gray = cv2.cvtColor(video[0], cv2.COLOR_BGR2GRAY)
+        old_gray = first_frame(frames)
         init_points = cv2.goodFeaturesToTrack(old_gray, mask=None, **self.feature_params)
 
         points = []
-        for i in range(1, frames):
-            frame_gray = cv2.cvtColor(video[i], cv2.COLOR_BGR2GRAY)
-
-            # calculate optical flow
-            new_points, st, err = cv2.calcOpticalFlowPyrLK(old_gray,
-                                                           frame_gray,
-                                                           init_points,
-                                                           None,
-                                                           **self.lk_params)
-            try:
-                # Select good points
-                good_points_only = new_points[st == 1]
-
-            except TypeError:
-                if recompute_lost_points:
-                    init_points = cv2.goodFeaturesToTrack(old_gray,
-                                                          mask=None,
-                                                          **self.feature_params)
-                    new_points, st, err = cv2.calcOpticalFlowPyrLK(old_gray,
-                                                                   frame_gray,
-                                                                   init_points,
-                                                                   None,
-                                                                   **self.lk_params)
-
-                    good_points_only = new_points[st == 1]
-
-                else:
+        for frame_gray in frames:
+            if init_points is None or not len(init_points):
+                if not recompute_lost_points:
                     break
 
-            good_points_only = np.array(good_points_only)
+                init_points = cv2.goodFeaturesToTrack(old_gray,
+                                                      mask=None,
+                                                      **self.feature_params)
+                if init_points is None:
+                    init_points = np.zeros((0, 1, 2), dtype=np.float32)
+
+            # calculate optical flow and select good points
+            new_points, tracked = track_points(old_gray,
+                                               frame_gray,
+                                               init_points,
+                                               self.lk_params,
+                                               self.forward_backward_threshold)
+            good_points_only = new_points[tracked].reshape(-1, 2)
             points.append(good_points_only)
 
             # Now update the previous frame and previous points
-            old_gray = frame_gray.copy()
+            old_gray = frame_gray
             init_points = good_points_only.reshape(-1, 1, 2)
 
-        return np.array(points)
+        # Per-frame point sets differ in size, so build an object array explicitly
+        tracked_points = np.empty((len(points),), dtype=object)
+        tracked_points[:] = points
+
+        return tracked_points
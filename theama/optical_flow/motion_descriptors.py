@@ -0,0 +1,343 @@
+"""
+Author: Ziyad Jappie
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- OpenCV: https://opencv.org/license/
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing dense motion descriptors, histograms of
+optical flow (HOF) and motion boundary histograms (MBH),
+computed over spatio-temporal cells of the Farneback flow
+stream.
+"""
+
+from collections import deque
+
+import numpy as np
+import cv2
+
+from .farneback import Farneback
+
+DESCRIPTOR_TYPES = ('hof', 'mbh')
+
+
+def orientation_histograms(dx, dy, cell_index, n_cells, n_bins, min_magnitude=None):
+    """Function to compute magnitude-weighted orientation
+    histograms of a vector field over cells. Each vector
+    votes for the two nearest of n_bins orientation bins,
+    with linear interpolation. When min_magnitude is given,
+    vectors not longer than it vote, with weight one, for
+    an extra zero bin instead.
+
+    Args:
+        dx: float32 array of shape (H, W) of x components.
+        dy: float32 array of shape (H, W) of y components.
+        cell_index: Integer array of shape (H * W,) giving
+                    the cell of every pixel.
+        n_cells: Number of cells.
+        n_bins: Number of orientation bins.
+        min_magnitude: Optional threshold for the zero bin.
+
+    Returns:
+        Array of shape (n_cells, n_bins), or (n_cells,
+        n_bins + 1) with a zero bin.
+    """
+
+    magnitude, angle = cv2.cartToPolar(dx, dy)
+    magnitude = magnitude.ravel()
+
+    position = angle.ravel() * (n_bins / (2 * np.pi))
+    lower = np.floor(position)
+    fraction = position - lower
+    lower = lower.astype(np.intp) % n_bins
+    upper = (lower + 1) % n_bins
+
+    n_total = n_bins if min_magnitude is None else n_bins + 1
+    base = cell_index * n_total
+
+    if min_magnitude is not None:
+        still = magnitude <= min_magnitude
+        magnitude = np.where(still, 0, magnitude)
+
+    histograms = np.bincount(
+        np.concatenate([base + lower, base + upper]),
+        weights=np.concatenate([magnitude * (1 - fraction), magnitude * fraction]),
+        minlength=n_cells * n_total
+    ).reshape(n_cells, n_total)
+
+    if min_magnitude is not None:
+        histograms[:, n_bins] = np.bincount(cell_index[still], minlength=n_cells)
+
+    return histograms
+
+
+class MotionDescriptors(object):
+    """
+    Class for the extraction of dense HOF and MBH motion
+    descriptors from a video, for action recognition.
+
+    Flow fields are computed one pair of frames at a time
+    by flow, a Farneback instance, and turned into
+    orientation histograms over square cells of cell_size
+    pixels. Histograms are summed over temporal cells of
+    temporal_cell_length flow fields, and a descriptor is
+    formed for every block of block_cells x block_cells
+    spatial cells and temporal_cells temporal cells, with
+    blocks sliding by one cell in space and in time. Cell
+    histograms are computed once and shared by all the
+    blocks that contain them.
+
+    HOF has n_bins orientation bins plus a zero bin for
+    flow not longer than min_flow pixels. MBH is made of
+    MBHx and MBHy, the orientation histograms of the
+    gradients of the x and y flow components. Each
+    histogram type in a descriptor is L2 normalised
+    separately. The descriptors can be passed directly to
+    the feature encoders.
+    """
+
+    def __init__(self, descriptors=DESCRIPTOR_TYPES, cell_size=8, block_cells=2,
+                 temporal_cell_length=5, temporal_cells=3, n_bins=8, min_flow=0.4,
+                 flow=None):
+        if isinstance(descriptors, str):
+            descriptors = (descriptors,)
+
+        for descriptor in descriptors:
+            if descriptor not in DESCRIPTOR_TYPES:
+                raise Exception('Descriptor must be one of {}.'.format(', '.join(DESCRIPTOR_TYPES)))
+
+        self.descriptors = tuple(descriptors)
+        self.cell_size = cell_size
+        self.block_cells = block_cells
+        self.temporal_cell_length = temporal_cell_length
+        self.temporal_cells = temporal_cells
+        self.n_bins = n_bins
+        self.min_flow = min_flow
+        self.flow = Farneback() if flow is None else flow
+
+        self._cell_indices = {}
+
+    @property
+    def channel_sizes(self):
+        """List of the number of bins of every histogram type
+        in a descriptor, in order.
+        """
+
+        sizes = []
+        for descriptor in self.descriptors:
+            if descriptor == 'hof':
+                sizes.append(self.n_bins + 1)
+            else:
+                sizes.extend([self.n_bins, self.n_bins])
+
+        return sizes
+
+    @property
+    def descriptor_size(self):
+        """Length of a descriptor."""
+
+        return sum(self.channel_sizes) * self.block_cells ** 2 * self.temporal_cells
+
+    def _cell_index(self, rows, columns):
+        """Function to map every pixel of a cropped flow
+        field to its cell, cached per field size.
+        """
+
+        key = (rows, columns)
+        if key not in self._cell_indices:
+            y = np.arange(rows * self.cell_size) // self.cell_size
+            x = np.arange(columns * self.cell_size) // self.cell_size
+            self._cell_indices[key] = (y[:, None] * columns + x[None, :]).ravel()
+
+        return self._cell_indices[key]
+
+    def cell_histograms(self, flow):
+        """Function to compute the histograms of a single
+        flow field over its spatial cells.
+
+        Args:
+            flow: Flow field of shape (H, W, 2).
+
+        Returns:
+            Array of shape (H // cell_size, W // cell_size,
+            sum(channel_sizes)).
+        """
+
+        rows, columns = flow.shape[0] // self.cell_size, flow.shape[1] // self.cell_size
+        flow = flow[:rows * self.cell_size, :columns * self.cell_size]
+        flow_x, flow_y = cv2.split(flow.astype(np.float32, copy=False))
+
+        cell_index = self._cell_index(rows, columns)
+        n_cells = rows * columns
+
+        histograms = []
+        for descriptor in self.descriptors:
+            if descriptor == 'hof':
+                histograms.append(orientation_histograms(
+                    flow_x, flow_y, cell_index, n_cells, self.n_bins, self.min_flow
+                ))
+            else:
+                for component in (flow_x, flow_y):
+                    histograms.append(orientation_histograms(
+                        cv2.Sobel(component, cv2.CV_32F, 1, 0, ksize=1),
+                        cv2.Sobel(component, cv2.CV_32F, 0, 1, ksize=1),
+                        cell_index, n_cells, self.n_bins
+                    ))
+
+        return np.concatenate(histograms, axis=1).reshape(rows, columns, -1)
+
+    def _blocks(self, temporal_cells):
+        """Function to assemble and normalise the
+        descriptors of all blocks from a sequence of
+        temporal cell histograms.
+        """
+
+        stack = np.stack(temporal_cells)
+        windows = np.lib.stride_tricks.sliding_window_view(
+            stack, (self.block_cells, self.block_cells), axis=(1, 2)
+        )
+        # (T, R, C, F, b, b) -> (R, C, T, b, b, F)
+        windows = windows.transpose(1, 2, 0, 4, 5, 3)
+        n_rows, n_columns = windows.shape[:2]
+
+        parts = []
+        start = 0
+        for size in self.channel_sizes:
+            part = windows[..., start:start + size].reshape(n_rows * n_columns, -1)
+            norms = np.linalg.norm(part, axis=1, keepdims=True)
+            parts.append(part / np.maximum(norms, np.finfo(np.float64).eps))
+            start += size
+
+        return np.concatenate(parts, axis=1).astype(np.float32), n_rows, n_columns
+
+    def _positions(self, n_rows, n_columns, first_flow):
+        """Function to compute the (x, y, t) centres of the
+        blocks, in pixels and frames of the input video.
+        """
+
+        pixels = self.cell_size * (getattr(self.flow, 'cell_size', None) or 1) \
+            / getattr(self.flow, 'scale', 1.0)
+        offset_x, offset_y = (getattr(self.flow, 'roi', None) or (0, 0))[:2]
+
+        y, x = np.mgrid[:n_rows, :n_columns]
+        positions = np.empty((n_rows * n_columns, 3), dtype=np.float32)
+        positions[:, 0] = (x.ravel() + self.block_cells / 2) * pixels + offset_x
+        positions[:, 1] = (y.ravel() + self.block_cells / 2) * pixels + offset_y
+        positions[:, 2] = first_flow + self.temporal_cells * self.temporal_cell_length / 2
+
+        return positions
+
+    def stream_descriptors(self, video):
+        """Function to compute descriptors lazily, yielding
+        the descriptors of all blocks ending at a temporal
+        cell as soon as that cell is complete. Only the
+        histograms of temporal_cells temporal cells are held
+        in memory.
+
+        Args:
+            video: Video as a numpy array, or any iterable of
+                   frames, such as a streaming reader from
+                   theama.utils.streaming.
+
+        Yields:
+            Tuples of (descriptors of shape (N,
+            descriptor_size), positions of shape (N, 3)
+            holding the x, y and t centres of the blocks).
+        """
+
+        cells = deque(maxlen=self.temporal_cells)
+        accumulated = None
+        n_accumulated = 0
+        n_cells = 0
+
+        for flow in self.flow.stream_optical_flow(video):
+            histograms = self.cell_histograms(flow)
+            if accumulated is None:
+                accumulated = histograms
+            else:
+                accumulated += histograms
+            n_accumulated += 1
+
+            if n_accumulated < self.temporal_cell_length:
+                continue
+
+            cells.append(accumulated)
+            accumulated = None
+            n_accumulated = 0
+            n_cells += 1
+
+            if len(cells) == self.temporal_cells:
+                descriptors, n_rows, n_columns = self._blocks(cells)
+                first_flow = (n_cells - self.temporal_cells) * self.temporal_cell_length
+                yield descriptors, self._positions(n_rows, n_columns, first_flow)
+
+    def compute_descriptors(self, video, return_positions=False):
+        """Function to compute all the motion descriptors of
+        a video.
+
+        Args:
+            video: Video as a numpy array, or any iterable of
+                   frames.
+            return_positions: If 'True', also return the x, y
+                              and t centres of the blocks.
+
+        Returns:
+            Array of shape (N, descriptor_size), and the
+            positions of shape (N, 3) if requested. N is zero
+            for videos too short for a single block.
+        """
+
+        descriptors = []
+        positions = []
+        for block_descriptors, block_positions in self.stream_descriptors(video):
+            descriptors.append(block_descriptors)
+            positions.append(block_positions)
+
+        if descriptors:
+            descriptors = np.concatenate(descriptors)
+            positions = np.concatenate(positions)
+        else:
+            descriptors = np.zeros((0, self.descriptor_size), dtype=np.float32)
+            positions = np.zeros((0, 3), dtype=np.float32)
+
+        if return_positions:
+            return descriptors, positions
+
+        return descriptors
+
+    def compute_batch(self, videos, return_positions=False):
+        """Function to compute the motion descriptors of
+        several videos, in the concatenated form accepted by
+        the compute_feature_vectors method of the encoders.
+
+        Args:
+            videos: Iterable of videos.
+            return_positions: If 'True', also return the x, y
+                              and t centres of the blocks.
+
+        Returns:
+            Tuple of (descriptors of shape (N,
+            descriptor_size), offsets of shape (n_videos + 1,)
+            delimiting the descriptors of every video), with
+            the positions of shape (N, 3) appended if
+            requested.
+        """
+
+        results = [self.compute_descriptors(video, return_positions=True) for video in videos]
+
+        offsets = np.zeros((len(results) + 1,), dtype=np.int64)
+        offsets[1:] = np.cumsum([len(descriptors) for descriptors, _ in results])
+
+        if results:
+            descriptors = np.concatenate([descriptors for descriptors, _ in results])
+            positions = np.concatenate([positions for _, positions in results])
+        else:
+            descriptors = np.zeros((0, self.descriptor_size), dtype=np.float32)
+            positions = np.zeros((0, 3), dtype=np.float32)
+
+        if return_positions:
+            return descriptors, offsets, positions
+
+        return descriptors, offsets
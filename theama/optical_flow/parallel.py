@@ -0,0 +1,156 @@
+"""
+Author: Ziyad Jappie
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing helpers to compute dense optical flow
+over long videos on a pool of threads or processes. The
+frame pairs are split into contiguous chunks, each chunk
+reading one extra frame at its boundary, so that every
+flow field is computed exactly as in the serial path.
+
+Process workers read the video from, and write the flow
+fields to, shared memory or memory-mapped files, so that
+frames and flow fields are never pickled.
+"""
+
+import mmap
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from ..utils.parallel import SharedArray, attach_shared_array, check_backend
+
+
+def split_pairs(n_pairs, n_chunks):
+    """Function to split frame pair indices into
+    contiguous chunks of near-equal size.
+
+    Args:
+        n_pairs: Number of successive frame pairs.
+        n_chunks: Maximum number of chunks.
+
+    Returns:
+        List of (start, stop) pair index ranges.
+    """
+
+    boundaries = np.unique(np.linspace(0, n_pairs, max(min(n_chunks, n_pairs), 1) + 1).astype(int))
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _compute_chunk(farneback, video, out, start, stop):
+    """Function to compute the flow fields of pairs
+    start to stop, reading frames start to stop inclusive.
+    """
+
+    flows = farneback.stream_optical_flow(video[start:stop + 1])
+
+    for i, flow in enumerate(flows):
+        out[start + i] = flow
+
+
+def _is_file_memmap(array):
+    """Function to check whether an array is a complete
+    memory-mapped file, which workers can open themselves.
+    """
+
+    return isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap)
+
+
+def _describe(array, stack, mode):
+    """Function to describe how a worker can map an array,
+    copying it to shared memory unless it is already a
+    memory-mapped file, which workers open with the given
+    mode.
+
+    Returns:
+        Tuple of (description, SharedArray or None).
+    """
+
+    if _is_file_memmap(array):
+        return ('memmap', array.filename, array.dtype, array.shape, array.offset, mode), None
+
+    shared = stack.enter_context(SharedArray(array))
+
+    return ('shm', shared.name, array.dtype, array.shape), shared
+
+
+def _attach(description):
+    """Function to map an array described by _describe.
+
+    Returns:
+        Tuple of (handle to keep alive, array).
+    """
+
+    if description[0] == 'memmap':
+        _, filename, dtype, shape, offset, mode = description
+        array = np.memmap(filename, dtype=dtype, mode=mode, shape=shape, offset=offset)
+        return array, array
+
+    _, name, dtype, shape = description
+
+    return attach_shared_array(name, shape, dtype)
+
+
+def _compute_chunk_in_worker(task):
+    """Function run in a worker process to compute one
+    chunk of flow fields.
+    """
+
+    farneback, video_description, out_description, start, stop = task
+
+    video_handle, video = _attach(video_description)
+    out_handle, out = _attach(out_description)
+
+    try:
+        _compute_chunk(farneback, video, out, start, stop)
+    finally:
+        del video, out
+        for handle in (video_handle, out_handle):
+            if hasattr(handle, 'flush') and handle.mode != 'r':
+                handle.flush()
+            if hasattr(handle, 'close'):
+                handle.close()
+
+
+def farneback_in_parallel(farneback, video, out, n_jobs, backend='thread'):
+    """Function to compute the flow fields of a video on
+    a pool of workers, writing them into out.
+
+    Args:
+        farneback: Farneback instance with the flow parameters.
+        video: Video array of shape (T, H, W) or (T, H, W, C).
+        out: Output array of shape (T - 1, H, W, 2).
+        n_jobs: Number of workers.
+        backend: Either 'thread' or 'process'.
+    """
+
+    check_backend(backend)
+
+    chunks = split_pairs(len(video) - 1, n_jobs)
+
+    if backend == 'thread':
+        # OpenCV releases the GIL while computing flow
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(lambda chunk: _compute_chunk(farneback, video, out, *chunk), chunks))
+        return
+
+    with ExitStack() as stack:
+        video_description, _ = _describe(video, stack, 'r')
+        out_description, shared_out = _describe(out, stack, 'r+')
+
+        tasks = [
+            (farneback, video_description, out_description, start, stop)
+            for start, stop in chunks
+        ]
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(_compute_chunk_in_worker, tasks))
+
+        if shared_out is not None:
+            out[...] = shared_out.view()
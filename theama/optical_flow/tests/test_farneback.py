@@ -0,0 +1,133 @@
+"""
+Author: Ziyad Jappie
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the Farneback implementation.
+"""
+
+import unittest
+
+import numpy as np
+
+from theama.optical_flow import Farneback, farneback
+
+
+class FarnebackTests(unittest.TestCase):
+    """
+    Class for Farneback unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        texture = rng.randint(0, 256, (40, 56)).astype('uint8')
+        # Texture translating one pixel to the right per frame
+        self.video = np.stack([
+            np.repeat(np.roll(texture, shift, axis=1)[..., None], 3, axis=2)
+            for shift in range(4)
+        ])
+        self.farneback = Farneback()
+
+    def test_optical_flow_shape(self):
+        """Function to test that one flow field is returned
+        per pair of successive frames.
+        """
+
+        flows = self.farneback.perform_optical_flow(self.video)
+
+        self.assertEqual(flows.shape, (3, 40, 56, 2))
+
+    def test_optical_flow_from_iterator(self):
+        """Function to test that a generator of frames gives
+        the same result as a video array.
+        """
+
+        flows = self.farneback.perform_optical_flow(frame for frame in self.video)
+
+        np.testing.assert_array_equal(flows, self.farneback.perform_optical_flow(self.video))
+
+    def test_optical_flow_from_growing_stream(self):
+        """Function to test that flow fields from a stream
+        longer than the initial allocation, and from a list
+        of frames of known length, are gathered in order.
+        """
+
+        expected = self.farneback.perform_optical_flow(self.video)
+
+        initial_flows = farneback._INITIAL_FLOWS
+        farneback._INITIAL_FLOWS = 1
+        try:
+            flows = self.farneback.perform_optical_flow(frame for frame in self.video)
+        finally:
+            farneback._INITIAL_FLOWS = initial_flows
+
+        np.testing.assert_array_equal(flows, expected)
+        np.testing.assert_array_equal(self.farneback.perform_optical_flow(list(self.video)), expected)
+
+    def test_optical_flow_invalid_video(self):
+        """Function to test that an array that is not a video
+        raises an exception.
+        """
+
+        with self.assertRaises(Exception) as context:
+            self.farneback.perform_optical_flow(np.zeros((4, 4)))
+
+        self.assertTrue('Not a video numpy file' in str(context.exception))
+
+    def test_stream_optical_flow(self):
+        """Function to test that streamed flow fields match
+        the batch result, and that they can be written into
+        a preallocated output array.
+        """
+
+        flows = self.farneback.perform_optical_flow(self.video)
+        streamed = list(self.farneback.stream_optical_flow(iter(self.video)))
+
+        out = np.zeros((3, 40, 56, 2), dtype=np.float32)
+        result = self.farneback.perform_optical_flow(iter(self.video), out=out)
+
+        np.testing.assert_array_equal(np.array(streamed), flows)
+        np.testing.assert_array_equal(out, flows)
+        self.assertTrue(result.base is out or result is out)
+
+    def test_configurable_parameters(self):
+        """Function to test that the Farneback parameters
+        are used, recovering the known translation.
+        """
+
+        farneback = Farneback(levels=1, winsize=9, iterations=5)
+        flows = farneback.perform_optical_flow(self.video)
+
+        self.assertAlmostEqual(float(np.median(flows[..., 0])), 1.0, places=1)
+
+    def test_parallel_matches_serial(self):
+        """Function to test that chunked parallel computation,
+        on threads and on processes, is identical to the
+        serial computation.
+        """
+
+        video = np.concatenate([self.video] * 3)
+        expected = self.farneback.perform_optical_flow(video)
+
+        for backend in ('thread', 'process'):
+            farneback = Farneback(n_jobs=3, backend=backend)
+            np.testing.assert_array_equal(farneback.perform_optical_flow(video), expected)
+
+    def test_reduced_resolution_roi_and_pooling(self):
+        """Function to test that downscaling, region of
+        interest, cell pooling and float16 output give flow
+        fields of the expected shape and type.
+        """
+
+        farneback = Farneback(scale=0.5, roi=(8, 0, 48, 40), cell_size=4, dtype=np.float16)
+
+        flows = farneback.perform_optical_flow(self.video)
+        streamed = np.array(list(farneback.stream_optical_flow(iter(self.video))))
+
+        self.assertEqual(flows.shape, (3, 5, 6, 2))
+        self.assertEqual(flows.dtype, np.float16)
+        self.assertEqual(farneback.output_shape((40, 56)), (5, 6, 2))
+        np.testing.assert_array_equal(flows, streamed)
@@ -0,0 +1,116 @@
+"""
+Author: Ziyad Jappie
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the HOF and MBH motion descriptors.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from theama.feature_encoding import VLAD
+from theama.optical_flow import MotionDescriptors
+from theama.optical_flow.motion_descriptors import orientation_histograms
+
+
+class MotionDescriptorTests(unittest.TestCase):
+    """
+    Class for motion descriptor unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        texture = cv2.GaussianBlur(rng.randint(0, 256, (48, 64)).astype('uint8'), (5, 5), 0)
+        # Texture translating one pixel to the right per frame
+        self.video = np.stack([np.roll(texture, shift, axis=1) for shift in range(8)])
+        self.extractor = MotionDescriptors(cell_size=8, block_cells=2,
+                                           temporal_cell_length=2, temporal_cells=2)
+
+    def test_orientation_histograms_match_loop(self):
+        """Function to test the vectorised orientation
+        histograms against a per-pixel loop.
+        """
+
+        rng = np.random.RandomState(1)
+        dx = rng.randn(4, 6).astype(np.float32)
+        dy = rng.randn(4, 6).astype(np.float32)
+        cell_index = (np.arange(4)[:, None] // 2 * 3 + np.arange(6)[None, :] // 2).ravel()
+
+        histograms = orientation_histograms(dx, dy, cell_index, 6, 8, min_magnitude=0.5)
+
+        expected = np.zeros((6, 9))
+        for i, (x, y) in enumerate(zip(dx.ravel(), dy.ravel())):
+            magnitude = np.hypot(x, y)
+            if magnitude <= 0.5:
+                expected[cell_index[i], 8] += 1
+                continue
+            position = (np.arctan2(y, x) % (2 * np.pi)) * 8 / (2 * np.pi)
+            lower = int(np.floor(position))
+            expected[cell_index[i], lower % 8] += magnitude * (1 - (position - lower))
+            expected[cell_index[i], (lower + 1) % 8] += magnitude * (position - lower)
+
+        np.testing.assert_allclose(histograms, expected, atol=1e-3)
+
+    def test_descriptor_shape_and_normalisation(self):
+        """Function to test the number and size of the
+        descriptors, and that every histogram type is unit
+        normalised.
+        """
+
+        descriptors, positions = self.extractor.compute_descriptors(self.video, return_positions=True)
+
+        # 7 flows give 3 temporal cells, so 2 blocks in time of
+        # 5 x 7 spatial blocks each
+        self.assertEqual(descriptors.shape, (2 * 5 * 7, self.extractor.descriptor_size))
+        self.assertEqual(positions.shape, (70, 3))
+        self.assertEqual(self.extractor.descriptor_size, (9 + 8 + 8) * 4 * 2)
+
+        hof = descriptors[:, :9 * 8]
+        np.testing.assert_allclose(np.linalg.norm(hof, axis=1), 1, rtol=1e-5)
+
+    def test_hof_captures_motion_direction(self):
+        """Function to test that rightward motion falls in the
+        first orientation bin of HOF.
+        """
+
+        extractor = MotionDescriptors(descriptors='hof', cell_size=8, block_cells=1,
+                                      temporal_cell_length=2, temporal_cells=1)
+        descriptors = extractor.compute_descriptors(self.video)
+
+        bins = descriptors.reshape(len(descriptors), 9).argmax(axis=1)
+        self.assertGreater(np.mean(bins == 0), 0.8)
+
+    def test_batch_plugs_into_encoder(self):
+        """Function to test that batch descriptors and offsets
+        can be encoded into one vector per video.
+        """
+
+        descriptors, offsets = self.extractor.compute_batch([self.video, self.video[:3]])
+
+        self.assertEqual(offsets.tolist(), [0, 70, 70])
+
+        vlad = VLAD(4)
+        vlad.learn_codebook(descriptors)
+        vectors = vlad.compute_feature_vectors(descriptors, offsets=offsets)
+
+        self.assertEqual(vectors.shape, (2, 4 * self.extractor.descriptor_size))
+
+    def test_invalid_descriptor(self):
+        """Function to test that an unknown descriptor type
+        raises an exception.
+        """
+
+        with self.assertRaises(Exception) as context:
+            MotionDescriptors(descriptors='hog')
+
+        self.assertTrue('Descriptor must be one of' in str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
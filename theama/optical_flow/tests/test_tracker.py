@@ -0,0 +1,116 @@
+"""
+Author: Ziyad Jappie
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the incremental KLT tracker.
+"""
+
+import unittest
+
+import cv2
+import numpy as np
+
+from theama.optical_flow import KLTTracker
+from theama.optical_flow.tracker import STATUS_DETECTED, STATUS_TRACKED
+from theama.optical_flow.utils import track_points
+
+
+class KLTTrackerTests(unittest.TestCase):
+    """
+    Class for KLT tracker unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        texture = cv2.GaussianBlur(rng.randint(0, 256, (80, 100)).astype('uint8'), (5, 5), 0)
+        # Texture translating one pixel to the right per frame
+        self.frames = [np.roll(texture, shift, axis=1) for shift in range(6)]
+
+    def test_tracks_follow_translation(self):
+        """Function to test that tracked points move with the
+        known translation and keep their identity.
+        """
+
+        tracker = KLTTracker(redetect_interval=100)
+
+        first_ids, first_points = tracker.update(self.frames[0])
+        for frame in self.frames[1:]:
+            ids, points = tracker.update(frame)
+
+        common, first_index, last_index = np.intersect1d(first_ids, ids, return_indices=True)
+
+        self.assertGreater(len(common), 0)
+        displacement = points[last_index] - first_points[first_index]
+        np.testing.assert_allclose(np.median(displacement, axis=0), [5, 0], atol=0.5)
+
+    def test_exported_tracks(self):
+        """Function to test that exported observations are
+        contiguous, sorted, and flag detections.
+        """
+
+        tracker = KLTTracker(redetect_interval=2)
+        for frame in self.frames:
+            tracker.update(frame)
+
+        tracks = tracker.tracks()
+
+        self.assertTrue(tracks.flags['C_CONTIGUOUS'])
+        self.assertTrue(np.all(np.diff(tracks['track_id']) >= 0))
+        first_rows = np.concatenate([[True], np.diff(tracks['track_id']) > 0])
+        self.assertTrue(np.all(tracks['status'][first_rows] == STATUS_DETECTED))
+        self.assertTrue(np.all(tracks['status'][~first_rows] == STATUS_TRACKED))
+
+    def test_capacity_bounds_memory(self):
+        """Function to test that only the most recent
+        observations are kept once the capacity is reached.
+        """
+
+        tracker = KLTTracker(capacity=50)
+        for frame in self.frames:
+            tracker.update(frame)
+
+        tracks = tracker.tracks()
+
+        self.assertEqual(len(tracks), 50)
+        self.assertEqual(tracks['frame'].max(), len(self.frames) - 1)
+
+    def test_forward_backward_filter(self):
+        """Function to test that the forward-backward check keeps
+        consistent tracks and rejects points tracked into an
+        unrelated frame.
+        """
+
+        noise = np.random.RandomState(1).randint(0, 256, (80, 100)).astype('uint8')
+        points = cv2.goodFeaturesToTrack(self.frames[0], 50, 0.01, 5)
+        lk_params = dict(winSize=(15, 15), maxLevel=2)
+
+        _, consistent = track_points(self.frames[0], self.frames[1], points, lk_params, 1.0)
+        _, unfiltered = track_points(self.frames[0], noise, points, lk_params)
+        _, filtered = track_points(self.frames[0], noise, points, lk_params, 1.0)
+
+        self.assertGreater(consistent.mean(), 0.9)
+        self.assertLess(filtered.sum(), unfiltered.sum())
+
+        surviving = []
+        for threshold in (None, 1.0):
+            tracker = KLTTracker(redetect_interval=100, forward_backward_threshold=threshold)
+            tracker.update(self.frames[0])
+            ids, _ = tracker.update(noise)
+            surviving.append(len(ids))
+
+        self.assertLess(surviving[1], surviving[0])
+
+    def test_invalid_redetect_interval(self):
+        """Function to test that a redetect interval that is
+        not a positive integer raises an exception.
+        """
+
+        for redetect_interval in (0, -1, 2.5):
+            with self.assertRaises(Exception) as context:
+                KLTTracker(redetect_interval=redetect_interval)
+
+            self.assertTrue('Redetect interval must be a positive integer' in str(context.exception))
@@ -0,0 +1,200 @@
+"""
+Author: Ziyad Jappie
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- OpenCV: https://opencv.org/license/
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing an incremental Lucas-Kanade point
+tracker for live streams. Observations are kept in a
+preallocated ring buffer, so memory use stays constant
+however long the stream is.
+"""
+
+import numpy as np
+import cv2
+
+from .utils import iterate_gray_frames, track_points
+
+TRACK_DTYPE = np.dtype([
+    ('track_id', np.int64),
+    ('frame', np.int64),
+    ('x', np.float32),
+    ('y', np.float32),
+    ('status', np.uint8)
+])
+
+# Observation status values
+STATUS_DETECTED = 0
+STATUS_TRACKED = 1
+
+DEFAULT_FEATURE_PARAMS = dict(maxCorners=100,
+                              qualityLevel=0.3,
+                              minDistance=7,
+                              blockSize=7)
+
+DEFAULT_LK_PARAMS = dict(winSize=(15, 15),
+                         maxLevel=2,
+                         criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT,
+                                   10, 0.03))
+
+
+class KLTTracker(object):
+    """
+    Class implementing an incremental Lucas-Kanade tracker.
+    Every call to update tracks the active points into the
+    new frame, and every redetect_interval frames new
+    Shi-Tomasi corners are detected in regions that are not
+    already covered by a track, using a mask of radius
+    mask_radius around the active points.
+
+    Every observation is recorded as a row (track_id,
+    frame, x, y, status) in a ring buffer of capacity rows,
+    where status is STATUS_DETECTED for the first
+    observation of a track and STATUS_TRACKED afterwards.
+
+    When forward_backward_threshold is set, points whose
+    forward-backward tracking error exceeds it, in pixels,
+    are dropped, which removes unreliable tracks.
+    """
+
+    def __init__(self, feature_params=None, lk_params=None, redetect_interval=5,
+                 mask_radius=None, capacity=100000, forward_backward_threshold=None):
+        if not isinstance(redetect_interval, (int, np.integer)) or redetect_interval < 1:
+            raise Exception("Redetect interval must be a positive integer")
+
+        self.feature_params = dict(DEFAULT_FEATURE_PARAMS, **(feature_params or {}))
+        self.lk_params = dict(DEFAULT_LK_PARAMS, **(lk_params or {}))
+        self.redetect_interval = redetect_interval
+        self.mask_radius = mask_radius
+        self.capacity = capacity
+        self.forward_backward_threshold = forward_backward_threshold
+
+        self.observations = np.zeros((capacity,), dtype=TRACK_DTYPE)
+        self.n_observations = 0
+
+        self.reset()
+
+    def reset(self):
+        """Function to clear the tracker state and all
+        recorded observations.
+        """
+
+        self.frame_index = -1
+        self.previous_frame = None
+        self.active_ids = np.zeros((0,), dtype=np.int64)
+        self.active_points = np.zeros((0, 1, 2), dtype=np.float32)
+        self.next_track_id = 0
+        self.n_observations = 0
+
+    def update(self, frame):
+        """Function to process the next frame of the stream.
+
+        Args:
+            frame: Grayscale or BGR frame.
+
+        Returns:
+            Tuple of (track ids, points) for the tracks active
+            in this frame, where points has shape (N, 2).
+        """
+
+        frame = next(iterate_gray_frames([frame]))
+        self.frame_index += 1
+
+        if self.previous_frame is not None and len(self.active_points):
+            new_points, tracked = track_points(
+                self.previous_frame,
+                frame,
+                self.active_points,
+                self.lk_params,
+                self.forward_backward_threshold
+            )
+            self.active_ids = self.active_ids[tracked]
+            self.active_points = new_points[tracked]
+            self._record(self.active_ids, self.active_points, STATUS_TRACKED)
+
+        if self.frame_index % self.redetect_interval == 0 or not len(self.active_points):
+            self._detect(frame)
+
+        self.previous_frame = frame
+
+        return self.active_ids, self.active_points.reshape(-1, 2)
+
+    def tracks(self):
+        """Function to export the recorded observations as a
+        contiguous structured array sorted by track id and
+        frame. Once more than capacity observations have
+        been recorded, only the most recent ones are kept.
+
+        Returns:
+            Structured array with fields track_id, frame, x, y
+            and status.
+        """
+
+        if self.n_observations <= self.capacity:
+            observations = self.observations[:self.n_observations]
+        else:
+            start = self.n_observations % self.capacity
+            observations = np.concatenate([self.observations[start:], self.observations[:start]])
+
+        order = np.lexsort((observations['frame'], observations['track_id']))
+
+        return np.ascontiguousarray(observations[order])
+
+    def _detect(self, frame):
+        """Function to start new tracks at corners that are
+        away from the active points.
+        """
+
+        max_corners = self.feature_params['maxCorners']
+        if max_corners > 0 and len(self.active_points) >= max_corners:
+            return
+
+        mask = None
+        if len(self.active_points):
+            radius = self.mask_radius or self.feature_params['minDistance']
+            mask = np.full(frame.shape, 255, dtype=np.uint8)
+            for x, y in self.active_points.reshape(-1, 2):
+                cv2.circle(mask, (int(round(x)), int(round(y))), int(radius), 0, -1)
+
+        feature_params = dict(self.feature_params)
+        if max_corners > 0:
+            feature_params['maxCorners'] = max_corners - len(self.active_points)
+
+        corners = cv2.goodFeaturesToTrack(frame, mask=mask, **feature_params)
+        if corners is None:
+            return
+
+        corners = corners.astype(np.float32).reshape(-1, 1, 2)
+        new_ids = np.arange(self.next_track_id, self.next_track_id + len(corners))
+        self.next_track_id += len(corners)
+
+        self.active_ids = np.concatenate([self.active_ids, new_ids])
+        self.active_points = np.concatenate([self.active_points, corners])
+        self._record(new_ids, corners, STATUS_DETECTED)
+
+    def _record(self, track_ids, points, status):
+        """Function to append observations to the ring
+        buffer, overwriting the oldest ones when full.
+        """
+
+        n_rows = len(track_ids)
+        if n_rows == 0:
+            return
+
+        points = points.reshape(-1, 2)
+        if n_rows > self.capacity:
+            track_ids, points = track_ids[-self.capacity:], points[-self.capacity:]
+            self.n_observations += n_rows - self.capacity
+            n_rows = self.capacity
+
+        rows = (self.n_observations + np.arange(n_rows)) % self.capacity
+        self.observations['track_id'][rows] = track_ids
+        self.observations['frame'][rows] = self.frame_index
+        self.observations['x'][rows] = points[:, 0]
+        self.observations['y'][rows] = points[:, 1]
+        self.observations['status'][rows] = status
+
+        self.n_observations += n_rows
@@ -0,0 +1,119 @@
+"""
+Author: Ziyad Jappie
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- OpenCV: https://opencv.org/license/
+- NumPy: https://www.numpy.org/license.html#
+
+Module with helpers shared by the optical flow algorithms.
+"""
+
+import numpy as np
+import cv2
+
+
+def iterate_gray_frames(video):
+    """Function to iterate over the frames of a video as
+    grayscale uint8 images. The video can be a NumPy array
+    of shape (T, H, W) or (T, H, W, C), or any iterable of
+    frames, such as theama.utils.streaming.read_video, in
+    which case frames are converted one at a time.
+
+    Args:
+        video: Video array, or iterable of frames.
+
+    Yields:
+        Grayscale uint8 frames of shape (H, W).
+    """
+
+    if isinstance(video, np.ndarray):
+        if len(video.shape) < 3 or len(video.shape) > 4:
+            raise Exception("Not a video numpy file")
+    elif not hasattr(video, '__iter__'):
+        raise Exception("Not a numpy array or iterable of frames")
+
+    for frame in video:
+        frame = np.asarray(frame).astype('uint8', copy=False)
+
+        if frame.ndim == 3 and frame.shape[-1] == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        elif frame.ndim == 3 and frame.shape[-1] == 1:
+            frame = frame[..., 0]
+        elif frame.ndim != 2:
+            raise Exception("Frames must be grayscale or have 3 channels")
+
+        yield frame
+
+
+def first_frame(frames):
+    """Function to take the first frame of a frame
+    iterator.
+
+    Args:
+        frames: Iterator of frames.
+
+    Returns:
+        The first frame.
+    """
+
+    try:
+        return next(frames)
+    except StopIteration:
+        raise Exception("Video must have at least one frame")
+
+
+def track_points(previous_frame, current_frame, points, lk_params,
+                 forward_backward_threshold=None):
+    """Function to track points between two grayscale
+    frames with pyramidal Lucas-Kanade, optionally keeping
+    only points that pass a forward-backward consistency
+    check: tracking a point forwards and then backwards
+    must bring it back within forward_backward_threshold
+    pixels of where it started. The backward pass is
+    initialised at the starting points, which is where a
+    consistent track ends, so it converges quickly.
+
+    Args:
+        previous_frame: Grayscale uint8 frame.
+        current_frame: Grayscale uint8 frame.
+        points: float32 array of shape (N, 1, 2).
+        lk_params: Keyword arguments for cv2.calcOpticalFlowPyrLK.
+        forward_backward_threshold: Optional maximum
+                                    forward-backward error in
+                                    pixels.
+
+    Returns:
+        Tuple of (new points of shape (N, 1, 2), boolean
+        array of shape (N,) flagging successfully tracked
+        points).
+    """
+
+    if not len(points):
+        return points, np.zeros((0,), dtype=bool)
+
+    new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+        previous_frame,
+        current_frame,
+        points,
+        None,
+        **lk_params
+    )
+    tracked = status.ravel() == 1
+
+    if forward_backward_threshold is not None:
+        backward_params = dict(lk_params)
+        backward_params['flags'] = backward_params.get('flags', 0) | cv2.OPTFLOW_USE_INITIAL_FLOW
+
+        backward_points, backward_status, _ = cv2.calcOpticalFlowPyrLK(
+            current_frame,
+            previous_frame,
+            new_points,
+            points.copy(),
+            **backward_params
+        )
+        error = np.linalg.norm((backward_points - points).reshape(-1, 2), axis=1)
+        tracked &= (backward_status.ravel() == 1) & (error < forward_backward_threshold)
+
+    return new_points, tracked
@@ -0,0 +1,7 @@
+from .inverted_index import InvertedIndex
+from .product_quantization import ProductQuantizer
+
+__all__ = [
+    'InvertedIndex',
+    'ProductQuantizer'
+]
@@ -0,0 +1,336 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+- SciPy: https://www.scipy.org/scipylib/license.html
+
+Module containing an inverted-file index over bag-of-words
+histograms, with TF-IDF weighting and cosine similarity
+search. A query only touches the posting lists of the
+visual words it contains.
+"""
+
+import numpy as np
+from scipy import sparse
+
+_EMPTY_SLOTS = np.zeros((0,), dtype=np.int64)
+_EMPTY_WEIGHTS = np.zeros((0,), dtype=np.float64)
+
+
+def _term_frequencies(histogram):
+    """Function to extract the visual words present in a
+    histogram and their term frequencies.
+
+    Args:
+        histogram: Dense 1-D histogram, or a 1 x V sparse row.
+
+    Returns:
+        Tuple of (word indices, term frequencies).
+    """
+
+    if sparse.issparse(histogram):
+        histogram = sparse.csr_matrix(histogram)
+        words = histogram.indices.astype(np.int64)
+        counts = histogram.data.astype(np.float64)
+    else:
+        histogram = np.asarray(histogram, dtype=np.float64).ravel()
+        words = np.flatnonzero(histogram)
+        counts = histogram[words]
+
+    keep = counts > 0
+    words, counts = words[keep], counts[keep]
+
+    total = counts.sum()
+    if total > 0:
+        counts = counts / total
+
+    return words, counts
+
+
+class InvertedIndex(object):
+    """
+    Class implementing an inverted-file index keyed by
+    visual word. Every posting list stores the documents
+    containing the word and their term frequencies, and
+    search ranks documents by the cosine similarity of
+    their TF-IDF weighted histograms.
+
+    Documents can be added and removed incrementally.
+    Additions are buffered and merged into the posting
+    lists on the next query, and removals are filtered out
+    lazily and compacted once they accumulate.
+    """
+
+    def __init__(self, vocabulary_size):
+        self.vocabulary_size = vocabulary_size
+
+        self.document_frequencies = np.zeros((vocabulary_size,), dtype=np.int64)
+
+        self._posting_slots = [_EMPTY_SLOTS] * vocabulary_size
+        self._posting_weights = [_EMPTY_WEIGHTS] * vocabulary_size
+
+        self._slot_ids = []
+        self._slot_words = []
+        self._id_to_slot = {}
+        self._pending = []
+        self._n_removed = 0
+
+        self._idf = None
+        self._norms = None
+        self._alive = None
+
+    def __len__(self):
+        return len(self._id_to_slot)
+
+    def __contains__(self, document_id):
+        return document_id in self._id_to_slot
+
+    def add(self, document_id, histogram):
+        """Function to add a document to the index.
+
+        Args:
+            document_id: Unique integer or string identifier.
+            histogram: Bag-of-words histogram of the document,
+                       dense or as a 1 x V sparse row.
+        """
+
+        if document_id in self._id_to_slot:
+            raise Exception('Document is already in the index.')
+
+        words, term_frequencies = _term_frequencies(histogram)
+
+        slot = len(self._slot_ids)
+        self._slot_ids.append(document_id)
+        self._slot_words.append(words)
+        self._id_to_slot[document_id] = slot
+        self._pending.append((slot, words, term_frequencies))
+
+        self.document_frequencies[words] += 1
+        self._idf = None
+
+    def add_many(self, document_ids, histograms):
+        """Function to add a batch of documents to the index.
+
+        Args:
+            document_ids: Sequence of unique identifiers.
+            histograms: Matrix of shape (N, V), dense or sparse,
+                        for example the output of
+                        BOW.compute_feature_vectors.
+        """
+
+        if sparse.issparse(histograms):
+            histograms = sparse.csr_matrix(histograms)
+
+        for row, document_id in enumerate(document_ids):
+            self.add(document_id, histograms[row])
+
+    def remove(self, document_id):
+        """Function to remove a document from the index.
+
+        Args:
+            document_id: Identifier of a previously added document.
+        """
+
+        if document_id not in self._id_to_slot:
+            raise Exception('Document is not in the index.')
+
+        slot = self._id_to_slot.pop(document_id)
+        self.document_frequencies[self._slot_words[slot]] -= 1
+        self._slot_words[slot] = None
+        self._n_removed += 1
+        self._idf = None
+
+    def query(self, histogram, top_k=10):
+        """Function to find the documents most similar to a
+        query histogram by TF-IDF cosine similarity.
+
+        Args:
+            histogram: Bag-of-words histogram of the query,
+                       dense or as a 1 x V sparse row.
+            top_k: Number of results to return.
+
+        Returns:
+            List of (document_id, score) tuples, best first.
+        """
+
+        self._refresh()
+
+        words, term_frequencies = _term_frequencies(histogram)
+        query_weights = term_frequencies * self._idf[words]
+
+        query_norm = np.linalg.norm(query_weights)
+        if query_norm == 0:
+            return []
+
+        slots = []
+        contributions = []
+        for word, weight in zip(words, query_weights):
+            if weight == 0:
+                continue
+            slots.append(self._posting_slots[word])
+            contributions.append(self._posting_weights[word] * (weight * self._idf[word]))
+
+        if not slots:
+            return []
+
+        slots = np.concatenate(slots)
+        contributions = np.concatenate(contributions)
+
+        touched, inverse = np.unique(slots, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions)
+
+        alive = self._alive[touched]
+        touched, scores = touched[alive], scores[alive]
+        scores /= self._norms[touched] * query_norm
+
+        top_k = min(top_k, len(scores))
+        if top_k == 0:
+            return []
+
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+
+        return [(self._slot_ids[touched[i]], float(scores[i])) for i in best]
+
+    def save(self, path):
+        """Function to save the index in a compact
+        compressed NumPy archive. Document identifiers must
+        be integers or strings.
+
+        Args:
+            path: Output file path.
+        """
+
+        self._refresh()
+        self._compact()
+
+        lengths = [len(slots) for slots in self._posting_slots]
+        indptr = np.zeros((self.vocabulary_size + 1,), dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        np.savez_compressed(
+            path,
+            vocabulary_size=np.array(self.vocabulary_size),
+            document_ids=np.array(self._slot_ids),
+            indptr=indptr,
+            slots=np.concatenate(self._posting_slots) if indptr[-1] else _EMPTY_SLOTS,
+            weights=np.concatenate(self._posting_weights) if indptr[-1] else _EMPTY_WEIGHTS
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Function to load an index written by save.
+
+        Args:
+            path: Index file path.
+
+        Returns:
+            InvertedIndex instance.
+        """
+
+        with np.load(path, allow_pickle=False) as archive:
+            index = cls(int(archive['vocabulary_size']))
+            document_ids = archive['document_ids'].tolist()
+            indptr = archive['indptr']
+            slots = archive['slots']
+            weights = archive['weights']
+
+        lengths = np.diff(indptr)
+        index._posting_slots = np.split(slots, indptr[1:-1])
+        index._posting_weights = np.split(weights, indptr[1:-1])
+        index.document_frequencies = lengths.astype(np.int64)
+
+        # Recover the words of every document from the posting lists
+        words = np.repeat(np.arange(index.vocabulary_size), lengths)
+        order = np.argsort(slots, kind='stable')
+        boundaries = np.searchsorted(slots[order], np.arange(len(document_ids) + 1))
+
+        index._slot_ids = document_ids
+        index._slot_words = np.split(words[order], boundaries[1:-1])
+        index._id_to_slot = {document_id: slot for slot, document_id in enumerate(document_ids)}
+
+        return index
+
+    def _refresh(self):
+        """Function to merge pending additions into the
+        posting lists, compact removed documents when they
+        make up a large fraction of the index, and update
+        the IDF weights and document norms.
+        """
+
+        if self._pending:
+            slots = np.concatenate([
+                np.full(len(words), slot, dtype=np.int64)
+                for slot, words, _ in self._pending
+            ])
+            words = np.concatenate([words for _, words, _ in self._pending])
+            weights = np.concatenate([tf for _, _, tf in self._pending])
+            self._pending = []
+
+            order = np.argsort(words, kind='stable')
+            words, slots, weights = words[order], slots[order], weights[order]
+            unique_words, starts = np.unique(words, return_index=True)
+            stops = np.append(starts[1:], len(words))
+
+            for word, start, stop in zip(unique_words, starts, stops):
+                self._posting_slots[word] = np.concatenate([self._posting_slots[word], slots[start:stop]])
+                self._posting_weights[word] = np.concatenate([self._posting_weights[word], weights[start:stop]])
+
+            self._norms = None
+
+        if self._n_removed and self._n_removed * 2 > len(self._slot_ids):
+            self._compact()
+
+        if self._idf is None:
+            n_documents = max(len(self), 1)
+            with np.errstate(divide='ignore'):
+                self._idf = np.where(
+                    self.document_frequencies > 0,
+                    np.log(n_documents / np.maximum(self.document_frequencies, 1)),
+                    0.0
+                )
+            self._norms = None
+
+        if self._norms is None:
+            lengths = [len(slots) for slots in self._posting_slots]
+            if sum(lengths):
+                all_slots = np.concatenate(self._posting_slots)
+                all_weights = np.concatenate(self._posting_weights) * \
+                    np.repeat(self._idf, lengths)
+            else:
+                all_slots, all_weights = _EMPTY_SLOTS, _EMPTY_WEIGHTS
+
+            self._norms = np.sqrt(np.bincount(
+                all_slots,
+                weights=all_weights ** 2,
+                minlength=len(self._slot_ids)
+            ))
+            self._alive = np.array([words is not None for words in self._slot_words], dtype=bool)
+
+    def _compact(self):
+        """Function to drop removed documents from the
+        posting lists and renumber the remaining slots
+        contiguously.
+        """
+
+        if not self._n_removed:
+            return
+
+        alive = np.array([words is not None for words in self._slot_words], dtype=bool)
+        new_slots = np.cumsum(alive) - 1
+
+        for word in range(self.vocabulary_size):
+            slots = self._posting_slots[word]
+            if len(slots):
+                keep = alive[slots]
+                self._posting_slots[word] = new_slots[slots[keep]]
+                self._posting_weights[word] = self._posting_weights[word][keep]
+
+        self._slot_ids = [document_id for document_id, keep in zip(self._slot_ids, alive) if keep]
+        self._slot_words = [words for words in self._slot_words if words is not None]
+        self._id_to_slot = {document_id: slot for slot, document_id in enumerate(self._slot_ids)}
+        self._n_removed = 0
+        self._norms = None
@@ -0,0 +1,215 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- Scikit-Learn: https://github.com/scikit-learn/scikit-learn/blob/master/COPYING
+- NumPy: https://www.numpy.org/license.html#
+
+Module containing a product quantisation codec for compact
+storage of global descriptors such as VLAD, with optional
+PCA whitening and dimensionality reduction, and top-k
+search by asymmetric distance computation (ADC), as
+described in:
+
+https://hal.inria.fr/inria-00514462/document
+"""
+
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA
+
+from ..feature_encoding.assignment import nearest_centroids
+
+
+class ProductQuantizer(object):
+    """
+    Class implementing product quantisation. Vectors are
+    optionally projected with PCA, split into
+    n_subquantizers contiguous sub-vectors, and every
+    sub-vector is replaced by the index of its closest
+    centroid in a per-subspace codebook, so that a vector
+    is stored in n_subquantizers bytes.
+    """
+
+    def __init__(self, n_subquantizers=8, n_centroids=256, n_components=None,
+                 whiten=False, mini_batch_kmeans=True, random_state=None):
+        if n_centroids > 65536:
+            raise Exception('At most 65536 centroids per subquantizer are supported.')
+
+        self.n_subquantizers = n_subquantizers
+        self.n_centroids = n_centroids
+        self.n_components = n_components
+        self.whiten = whiten
+        self.mini_batch_kmeans = mini_batch_kmeans
+        self.random_state = random_state
+
+        self.pca = None
+        self.codebooks = None
+
+    @property
+    def code_dtype(self):
+        return np.uint8 if self.n_centroids <= 256 else np.uint16
+
+    def fit(self, vectors):
+        """Function to learn the PCA projection, if any, and
+        the sub-quantizer codebooks.
+
+        Args:
+            vectors: Training matrix of shape (N, D).
+
+        Returns:
+            The fitted quantizer.
+        """
+
+        vectors = np.asarray(vectors, dtype=np.float64)
+
+        if self.n_components is not None or self.whiten:
+            self.pca = PCA(
+                n_components=self.n_components,
+                whiten=self.whiten,
+                random_state=self.random_state
+            ).fit(vectors)
+            vectors = self.pca.transform(vectors)
+
+        dimension = vectors.shape[1]
+        if dimension % self.n_subquantizers != 0:
+            raise Exception('Dimensionality must be divisible by the number of subquantizers.')
+
+        if vectors.shape[0] < self.n_centroids:
+            raise Exception('Not enough vectors to learn the codebooks.')
+
+        codebooks = []
+        for subvectors in self._split(vectors):
+            if self.mini_batch_kmeans:
+                kmeans = MiniBatchKMeans(n_clusters=self.n_centroids, random_state=self.random_state)
+            else:
+                kmeans = KMeans(n_clusters=self.n_centroids, n_init=1, random_state=self.random_state)
+            codebooks.append(kmeans.fit(subvectors).cluster_centers_)
+
+        self.codebooks = np.array(codebooks)
+
+        return self
+
+    def transform(self, vectors):
+        """Function to apply the learned PCA projection.
+
+        Args:
+            vectors: Matrix of shape (N, D).
+
+        Returns:
+            Projected matrix of shape (N, n_components).
+        """
+
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+
+        if self.pca is not None:
+            vectors = self.pca.transform(vectors)
+
+        return vectors
+
+    def encode(self, vectors):
+        """Function to compress vectors into PQ codes.
+
+        Args:
+            vectors: Matrix of shape (N, D).
+
+        Returns:
+            Code matrix of shape (N, n_subquantizers).
+        """
+
+        self._check_fitted()
+
+        vectors = self.transform(vectors)
+
+        codes = np.empty((vectors.shape[0], self.n_subquantizers), dtype=self.code_dtype)
+        for m, subvectors in enumerate(self._split(vectors)):
+            codes[:, m] = nearest_centroids(subvectors, self.codebooks[m])
+
+        return codes
+
+    def decode(self, codes):
+        """Function to reconstruct approximate vectors, in
+        the projected space, from PQ codes.
+
+        Args:
+            codes: Code matrix of shape (N, n_subquantizers).
+
+        Returns:
+            Matrix of shape (N, n_components).
+        """
+
+        self._check_fitted()
+
+        return np.hstack([
+            self.codebooks[m][codes[:, m]]
+            for m in range(self.n_subquantizers)
+        ])
+
+    def distance_tables(self, query):
+        """Function to compute the ADC lookup tables for a
+        query: the squared distance from every query
+        sub-vector to every centroid of its subspace.
+
+        Args:
+            query: Vector of shape (D,).
+
+        Returns:
+            Table of shape (n_subquantizers, n_centroids).
+        """
+
+        self._check_fitted()
+
+        query = self.transform(query)[0]
+        subqueries = query.reshape(self.n_subquantizers, -1)
+
+        differences = self.codebooks - subqueries[:, None, :]
+
+        return np.einsum('mkd,mkd->mk', differences, differences).astype(np.float32)
+
+    def search(self, query, codes, top_k=10):
+        """Function to find the encoded vectors closest to
+        an uncompressed query by asymmetric distance
+        computation. The codes are scanned once per
+        subquantizer with table lookups.
+
+        Args:
+            query: Vector of shape (D,), or a matrix of shape
+                   (Q, D) to search several queries.
+            codes: Code matrix of shape (N, n_subquantizers).
+            top_k: Number of results to return per query.
+
+        Returns:
+            Tuple of (indices, squared distances), each of
+            shape (top_k,), or (Q, top_k) for several queries.
+        """
+
+        query = np.asarray(query)
+        if query.ndim == 2:
+            results = [self.search(single_query, codes, top_k) for single_query in query]
+            return np.array([r[0] for r in results]), np.array([r[1] for r in results])
+
+        tables = self.distance_tables(query)
+
+        distances = np.zeros((codes.shape[0],), dtype=np.float32)
+        for m in range(self.n_subquantizers):
+            distances += tables[m][codes[:, m]]
+
+        top_k = min(top_k, len(distances))
+        if top_k == 0:
+            return np.zeros((0,), dtype=np.intp), np.zeros((0,), dtype=np.float32)
+
+        best = np.argpartition(distances, top_k - 1)[:top_k]
+        best = best[np.argsort(distances[best], kind='stable')]
+
+        return best, distances[best]
+
+    def _split(self, vectors):
+        """Function to split vectors into sub-vectors."""
+
+        return np.split(vectors, self.n_subquantizers, axis=1)
+
+    def _check_fitted(self):
+        if self.codebooks is None:
+            raise Exception('Please run fit method.')
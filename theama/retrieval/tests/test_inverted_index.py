@@ -0,0 +1,108 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the inverted-file index.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from theama.retrieval import InvertedIndex
+
+
+class InvertedIndexTests(unittest.TestCase):
+    """
+    Class for inverted index unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.vocabulary_size = 50
+        self.histograms = rng.poisson(0.3, (20, self.vocabulary_size)).astype('float64')
+        self.index = InvertedIndex(self.vocabulary_size)
+        self.index.add_many(range(20), self.histograms)
+
+    def brute_force_scores(self, histograms, query):
+        """Function computing TF-IDF cosine scores densely."""
+
+        tf = histograms / histograms.sum(axis=1, keepdims=True)
+        df = (histograms > 0).sum(axis=0)
+        idf = np.where(df > 0, np.log(len(histograms) / np.maximum(df, 1)), 0)
+        documents = tf * idf
+        query = query / query.sum() * idf
+
+        return documents.dot(query) / (np.linalg.norm(documents, axis=1) * np.linalg.norm(query))
+
+    def test_query_matches_brute_force(self):
+        """Function to test that index scores equal dense
+        TF-IDF cosine similarities, in ranked order.
+        """
+
+        query = self.histograms[3]
+        expected = self.brute_force_scores(self.histograms, query)
+
+        results = self.index.query(query, top_k=5)
+
+        self.assertEqual(results[0][0], 3)
+        np.testing.assert_allclose(
+            [score for _, score in results],
+            np.sort(expected)[::-1][:5]
+        )
+
+    def test_query_with_sparse_histogram(self):
+        """Function to test that sparse rows are accepted
+        and give the same results as dense histograms.
+        """
+
+        dense = self.index.query(self.histograms[5], top_k=3)
+        from_sparse = self.index.query(sparse.csr_matrix(self.histograms[5]), top_k=3)
+
+        self.assertEqual(dense, from_sparse)
+
+    def test_remove_document(self):
+        """Function to test that removed documents are no
+        longer returned and IDF is updated.
+        """
+
+        for document_id in range(15):
+            self.index.remove(document_id)
+
+        results = self.index.query(self.histograms[3], top_k=20)
+        expected = self.brute_force_scores(self.histograms[15:], self.histograms[3])
+
+        self.assertEqual(len(self.index), 5)
+        self.assertTrue(all(document_id >= 15 for document_id, _ in results))
+        np.testing.assert_allclose(
+            sorted(score for _, score in results),
+            np.sort(expected[expected > 0])
+        )
+
+    def test_save_and_load(self):
+        """Function to test that a saved index returns the
+        same results when loaded.
+        """
+
+        self.index.remove(7)
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'index.npz')
+            self.index.save(path)
+            loaded = InvertedIndex.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(len(loaded), 19)
+        self.assertEqual(loaded.query(self.histograms[2]), self.index.query(self.histograms[2]))
+
+        loaded.remove(2)
+        self.assertFalse(2 in loaded)
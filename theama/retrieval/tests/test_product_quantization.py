@@ -0,0 +1,66 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the product quantizer.
+"""
+
+import unittest
+
+import numpy as np
+
+from theama.retrieval import ProductQuantizer
+
+
+class ProductQuantizerTests(unittest.TestCase):
+    """
+    Class for product quantizer unit tests.
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.vectors = rng.standard_normal((500, 32))
+        self.pq = ProductQuantizer(n_subquantizers=4, n_centroids=16, random_state=0)
+
+    def test_encode_shape_and_dtype(self):
+        """Function to test that codes are one byte per
+        subquantizer.
+        """
+
+        codes = self.pq.fit(self.vectors).encode(self.vectors)
+
+        self.assertEqual(codes.shape, (500, 4))
+        self.assertEqual(codes.dtype, np.uint8)
+
+    def test_adc_distances_match_decoded_vectors(self):
+        """Function to test that ADC distances equal the
+        squared distances to the decoded vectors, and that
+        results are sorted.
+        """
+
+        codes = self.pq.fit(self.vectors).encode(self.vectors)
+        query = self.vectors[0]
+
+        indices, distances = self.pq.search(query, codes, top_k=10)
+        expected = ((self.pq.decode(codes) - query) ** 2).sum(axis=1)
+
+        np.testing.assert_allclose(distances, expected[indices], rtol=1e-4)
+        np.testing.assert_allclose(distances, np.sort(expected)[:10], rtol=1e-4)
+
+    def test_pca_whitening_reduces_dimension(self):
+        """Function to test that PCA reduction is applied
+        before quantization, and that batch queries work.
+        """
+
+        pq = ProductQuantizer(n_subquantizers=4, n_centroids=16, n_components=8,
+                              whiten=True, random_state=0)
+        codes = pq.fit(self.vectors).encode(self.vectors)
+
+        indices, distances = pq.search(self.vectors[:3], codes, top_k=5)
+
+        self.assertEqual(pq.decode(codes).shape, (500, 8))
+        self.assertEqual(indices.shape, (3, 5))
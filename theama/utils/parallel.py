@@ -0,0 +1,132 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+General helpers for running work on thread and process pools.
+"""
+
+import os
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+BACKENDS = ('thread', 'process')
+
+
+def effective_n_jobs(n_jobs):
+    """Function to resolve the number of workers to use,
+    following the scikit-learn convention that negative
+    values count back from the number of CPUs.
+
+    Args:
+        n_jobs: Requested number of workers.
+
+    Returns:
+        Positive number of workers.
+    """
+
+    if n_jobs is None or n_jobs == 0:
+        return 1
+
+    if n_jobs < 0:
+        return max(os.cpu_count() + 1 + n_jobs, 1)
+
+    return n_jobs
+
+
+def check_backend(backend):
+    """Function to validate a pool backend name.
+
+    Args:
+        backend: Either 'thread' or 'process'.
+    """
+
+    if backend not in BACKENDS:
+        raise Exception('Backend must be one of: ' + ', '.join(BACKENDS) + '.')
+
+
+def bounded_map(executor, function, iterable, max_in_flight):
+    """Function to map a function over an iterable on an
+    executor while keeping at most max_in_flight tasks
+    submitted at a time. Unlike executor.map, the input is
+    consumed lazily, so it can be an unbounded stream.
+    Results are yielded in input order.
+
+    Args:
+        executor: concurrent.futures executor.
+        function: Function to apply to every item.
+        iterable: Input items.
+        max_in_flight: Maximum number of pending tasks.
+
+    Yields:
+        Results, in input order.
+    """
+
+    pending = deque()
+
+    for item in iterable:
+        pending.append(executor.submit(function, item))
+
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+class SharedArray(object):
+    """
+    Context manager that copies an array into a named
+    shared memory block so that worker processes can map
+    it without it being pickled.
+    """
+
+    def __init__(self, array):
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+
+        self.view()[...] = array
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def view(self):
+        """Function to return an array view of the shared
+        block. Views must be released before the block is
+        closed.
+        """
+
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_shared_array(name, shape, dtype):
+    """Function to map a shared memory block created by
+    SharedArray in another process.
+
+    Args:
+        name: Name of the shared memory block.
+        shape: Array shape.
+        dtype: Array data type.
+
+    Returns:
+        Tuple of (SharedMemory handle, NumPy array view). The
+        handle must be kept alive while the view is used.
+    """
+
+    shm = shared_memory.SharedMemory(name=name)
+
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
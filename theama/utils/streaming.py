@@ -0,0 +1,185 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- OpenCV: https://opencv.org/license/
+
+Module for streaming images and video frames from disk.
+Decoding runs in background threads that fill a bounded
+queue, so that it overlaps with computation while only a
+few frames are held in memory at any time.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Full
+
+import cv2
+
+from .parallel import bounded_map
+
+DEFAULT_PREFETCH = 8
+
+IMAGE_EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.tif', '.tiff', '.webp')
+
+_END = object()
+
+
+def prefetch(iterable, max_prefetch=DEFAULT_PREFETCH):
+    """Function to consume an iterable in a background
+    thread, keeping up to max_prefetch items ready in a
+    bounded queue. Exceptions raised while producing items
+    are re-raised in the consuming thread.
+
+    Args:
+        iterable: Iterable to consume.
+        max_prefetch: Maximum number of items buffered ahead.
+
+    Yields:
+        The items of the iterable, in order.
+    """
+
+    queue = Queue(maxsize=max_prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except BaseException as error:
+            put((_END, error))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = queue.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Let the producer exit if the consumer stops early
+        stop.set()
+
+
+def list_images(directory):
+    """Function to list the image files in a directory,
+    sorted by name.
+
+    Args:
+        directory: Directory path.
+
+    Returns:
+        List of image file paths.
+    """
+
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def read_image(path, grayscale=False):
+    """Function to read a single image from disk.
+
+    Args:
+        path: Image file path.
+        grayscale: Boolean flag indicating whether to read
+                   the image as grayscale.
+
+    Returns:
+        Loaded image as uint8 NumPy array.
+    """
+
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+
+    if image is None:
+        raise Exception('Could not read image: ' + path)
+
+    return image
+
+
+def read_images(images, grayscale=False, n_threads=2, max_prefetch=DEFAULT_PREFETCH):
+    """Function to stream images from disk, decoding them
+    on a pool of threads with a bounded number of images
+    decoded ahead of the consumer.
+
+    Args:
+        images: Directory path, or iterable of image paths.
+        grayscale: Boolean flag indicating whether to read
+                   the images as grayscale.
+        n_threads: Number of decoding threads.
+        max_prefetch: Maximum number of images decoded ahead.
+
+    Yields:
+        Loaded images as uint8 NumPy arrays, in order.
+    """
+
+    if isinstance(images, str):
+        images = list_images(images)
+
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        for image in bounded_map(
+                executor,
+                lambda path: read_image(path, grayscale),
+                images,
+                max_prefetch
+        ):
+            yield image
+
+
+def _video_frames(path, grayscale):
+    """Function to decode the frames of a video file."""
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise Exception('Could not open video: ' + path)
+
+    try:
+        while True:
+            success, frame = capture.read()
+            if not success:
+                break
+
+            if grayscale:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+            yield frame
+    finally:
+        capture.release()
+
+
+def read_video(path, grayscale=False, max_prefetch=DEFAULT_PREFETCH):
+    """Function to stream the frames of a video file,
+    decoding them in a background thread with a bounded
+    number of frames decoded ahead of the consumer.
+
+    Args:
+        path: Video file path.
+        grayscale: Boolean flag indicating whether to convert
+                   frames to grayscale.
+        max_prefetch: Maximum number of frames decoded ahead.
+
+    Returns:
+        Generator of uint8 frames.
+    """
+
+    return prefetch(_video_frames(path, grayscale), max_prefetch)
@@ -0,0 +1,83 @@
+"""
+Author: David Torpey
+
+License: Apache 2.0
+
+Redistribution Licensing:
+- NumPy: https://www.numpy.org/license.html#
+
+Module with unit tests for the streaming readers.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from theama.utils.streaming import prefetch, read_images, read_video
+
+
+class StreamingTests(unittest.TestCase):
+    """
+    Class for streaming reader unit tests.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.frames = [rng.randint(0, 256, (48, 64, 3)).astype('uint8') for _ in range(5)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_prefetch_preserves_order(self):
+        """Function to test that prefetching yields every
+        item in order.
+        """
+
+        self.assertEqual(list(prefetch(iter(range(100)), max_prefetch=3)), list(range(100)))
+
+    def test_prefetch_propagates_errors(self):
+        """Function to test that an exception raised by the
+        producer is re-raised in the consumer.
+        """
+
+        def failing():
+            yield 1
+            raise ValueError('decode failed')
+
+        with self.assertRaises(ValueError):
+            list(prefetch(failing()))
+
+    def test_read_images_from_directory(self):
+        """Function to test that images in a directory are
+        read in sorted order.
+        """
+
+        for i, frame in enumerate(self.frames):
+            cv2.imwrite(os.path.join(self.directory, '{:02d}.png'.format(i)), frame)
+
+        images = list(read_images(self.directory, max_prefetch=2))
+
+        self.assertEqual(len(images), len(self.frames))
+        for image, frame in zip(images, self.frames):
+            np.testing.assert_array_equal(image, frame)
+
+    def test_read_video(self):
+        """Function to test that video frames are streamed
+        with the expected shape.
+        """
+
+        path = os.path.join(self.directory, 'video.avi')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+        for frame in self.frames:
+            writer.write(frame)
+        writer.release()
+
+        frames = list(read_video(path, grayscale=True))
+
+        self.assertEqual(len(frames), len(self.frames))
+        self.assertEqual(frames[0].shape, (48, 64))